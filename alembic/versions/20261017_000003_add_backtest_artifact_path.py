@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000003"
+down_revision = "20261017_000002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("backtest_results", sa.Column("artifact_path", sa.String(500)))
+
+
+def downgrade() -> None:
+    op.drop_column("backtest_results", "artifact_path")
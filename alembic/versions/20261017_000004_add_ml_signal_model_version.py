@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000004"
+down_revision = "20261017_000003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("ml_signals", sa.Column("model_name", sa.String(100)))
+    op.add_column("ml_signals", sa.Column("model_version", sa.Integer))
+    op.create_index(
+        "uq_ml_signals_model_bar",
+        "ml_signals",
+        ["symbol", "model_name", "model_version", "signal_timestamp"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_ml_signals_model_bar", table_name="ml_signals")
+    op.drop_column("ml_signals", "model_version")
+    op.drop_column("ml_signals", "model_name")
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000005"
+down_revision = "20261017_000004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("backtest_jobs", sa.Column("worker_id", sa.String(100)))
+    op.add_column("backtest_jobs", sa.Column("heartbeat_at", sa.DateTime(timezone=True)))
+
+
+def downgrade() -> None:
+    op.drop_column("backtest_jobs", "heartbeat_at")
+    op.drop_column("backtest_jobs", "worker_id")
@@ -1,85 +1,210 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from datetime import datetime
 import pandas as pd
+import asyncio
+import json
 import logging
 
-from app.services.backtest_service import BacktestService
-from app.services.ml_signal_service import MLSignalService
 from app.services.data_service import DataService
-from app.schemas.backtest import BacktestRequest, BacktestResponse
-from app.db.database import get_db  # Import your DB dependency
+from app.services.job_service import JobQueueFullError, JobStatus, backtest_jobs
+from app.services.sweep_service import ParameterSweepService, grid_parameters, random_parameters
+from app.schemas.backtest import (
+    BacktestJobStatus,
+    BacktestRequest,
+    BacktestResponse,
+    ParameterSweepRequest,
+    PortfolioBacktestRequest,
+    PortfolioBacktestResponse,
+    WalkForwardRequest,
+    WalkForwardResponse,
+)
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/backtest", tags=["Backtesting"])
 
-@router.post("/run", response_model=BacktestResponse)
-async def run_backtest(
-    request: BacktestRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)  # Use Depends() for injection
-):
-    """Run ML-enhanced backtest"""
+def require_job_queue() -> None:
+    """Refuse backtest requests while the job queue is not running"""
+    if not backtest_jobs.running:
+        raise HTTPException(status_code=503, detail="Backtest job queue is not running")
+
+
+router = APIRouter(prefix="/backtest", tags=["Backtesting"], dependencies=[Depends(require_job_queue)])
+
+@router.post("/run", response_model=BacktestJobStatus, status_code=202)
+async def run_backtest(request: BacktestRequest):
+    """Queue an ML-enhanced backtest and return its job id"""
+    # Job queue calls are blocking DB round trips; keep them off the event loop
+    try:
+        job_id = await run_in_threadpool(backtest_jobs.submit, "backtest", request.model_dump(mode="json"))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return BacktestJobStatus(**await run_in_threadpool(backtest_jobs.get, job_id))
+
+
+@router.get("/jobs/{job_id}", response_model=BacktestJobStatus)
+async def get_backtest_job(job_id: str):
+    """Backtest job status"""
+    job = await run_in_threadpool(backtest_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return BacktestJobStatus(**job)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=BacktestJobStatus)
+async def cancel_backtest_job(job_id: str):
+    """Cancel a backtest job that has not started yet"""
+    job = await run_in_threadpool(backtest_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    cancelled = await run_in_threadpool(backtest_jobs.cancel, job_id)
+    job = await run_in_threadpool(backtest_jobs.get, job_id)
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    return BacktestJobStatus(**job)
+
+
+@router.get("/jobs/{job_id}/result", response_model=BacktestResponse)
+async def get_backtest_job_result(job_id: str):
+    """Metrics of a completed backtest job"""
+    job = await run_in_threadpool(backtest_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != JobStatus.COMPLETED.value:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return BacktestResponse(**await run_in_threadpool(backtest_jobs.result, job_id))
+
+
+@router.post("/sweep")
+async def run_parameter_sweep(request: ParameterSweepRequest):
+    """
+    Sweep BacktestStrategy params over a process pool
+    
+    Streams one NDJSON line per completed run, each carrying its current
+    Sharpe rank among the runs finished so far.
+    """
+    # Imported per request so workers that never backtest skip TensorFlow and sklearn
+    from app.services.feature_store import default_feature_store
+    from app.services.ml_signal_service import MLSignalService
+    
     try:
-        # Get market data
         data_service = DataService()
         data = await data_service.get_historical_data(
             request.symbol,
             request.start_date,
             request.end_date,
-            '1d'
+            request.timeframe
         )
         
-        # Generate ML signals
-        ml_service = MLSignalService()
-        signals = ml_service.generate_signals(data)
+        def prepare():
+            ml_service = MLSignalService(feature_store=default_feature_store())
+            signals = ml_service.generate_signals(data, request.symbol, request.timeframe)
+            if request.grid is not None:
+                param_sets = grid_parameters(request.grid)
+            else:
+                param_sets = random_parameters(request.random_ranges, request.n_samples, request.seed)
+            return signals, param_sets
         
-        # Run backtest
-        backtest_service = BacktestService(db)
-        metrics = backtest_service.run_backtest(
+        # Feature prep may wait on the feature store lock; keep it and the grid off the event loop
+        signals, param_sets = await run_in_threadpool(prepare)
+        
+        sweep = ParameterSweepService(max_workers=request.max_workers)
+        results = sweep.iter_results(data, signals, param_sets, request.initial_capital)
+        
+        return StreamingResponse(
+            (json.dumps(result, default=str) + "\n" for result in results),
+            media_type="application/x-ndjson",
+        )
+        
+    except Exception as e:
+        logger.error(f"Parameter sweep failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/walk-forward", response_model=WalkForwardResponse)
+async def run_walk_forward(request: WalkForwardRequest):
+    """Retrain ML models per rolling window and backtest each out-of-sample slice"""
+    from app.services.feature_store import default_feature_store
+    from app.services.walk_forward_service import WalkForwardService
+    
+    try:
+        data_service = DataService()
+        data = await data_service.get_historical_data(
             request.symbol,
             request.start_date,
             request.end_date,
-            data,
-            signals,
-            request.initial_capital
+            request.timeframe
         )
         
-        # Save to database
-        background_tasks.add_task(
-            _save_backtest_results,
-            db,
+        walk_forward = WalkForwardService(max_workers=request.max_workers, feature_store=default_feature_store())
+        result = await run_in_threadpool(
+            walk_forward.run,
             request.symbol,
-            metrics
+            data,
+            request.train_size,
+            request.test_size,
+            step=request.step,
+            anchored=request.anchored,
+            lookback_period=request.lookback_period,
+            use_lstm=request.use_lstm,
+            epochs=request.epochs,
+            initial_cash=request.initial_capital,
+            engine=request.engine,
+            timeframe=request.timeframe,
         )
         
-        return BacktestResponse(**metrics)
+        return WalkForwardResponse(**result)
         
     except Exception as e:
-        logger.error(f"Backtest failed: {str(e)}")
+        logger.error(f"Walk-forward failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def _save_backtest_results(db: Session, symbol: str, metrics: dict):
-    """Background task to save results"""
-    from app.db.models import BacktestResult
-    
-    result = BacktestResult(
-        symbol=symbol,
-        strategy_name="ML-Enhanced",
-        start_date=metrics['start_date'],
-        end_date=metrics['end_date'],
-        initial_capital=metrics.get('initial_capital', 10000),
-        final_value=metrics['final_value'],
-        total_return=metrics['total_return'],
-        sharpe_ratio=metrics['sharpe_ratio'],
-        max_drawdown=metrics['max_drawdown'],
-        total_trades=metrics['total_trades'],
-        win_rate=metrics['win_rate'],
-        profit_factor=metrics['profit_factor'],
-    )
+@router.post("/portfolio", response_model=PortfolioBacktestResponse)
+async def run_portfolio_backtest(request: PortfolioBacktestRequest):
+    """Backtest several symbols against one shared cash account"""
+    from app.services.backtest_service import BacktestService
+    from app.services.feature_store import default_feature_store
+    from app.services.ml_signal_service import MLSignalService
     
-    db.add(result)
-    db.commit()
\ No newline at end of file
+    try:
+        data_service = DataService()
+        frames = await asyncio.gather(*(
+            data_service.get_historical_data(
+                symbol,
+                request.start_date,
+                request.end_date,
+                request.timeframe
+            )
+            for symbol in request.symbols
+        ))
+        data = dict(zip(request.symbols, frames))
+        
+        def generate_all():
+            ml_service = MLSignalService(feature_store=default_feature_store())
+            return {
+                symbol: ml_service.generate_signals(frame, symbol, request.timeframe)
+                for symbol, frame in data.items()
+            }
+        
+        # Feature prep and inference are CPU-bound; keep them off the event loop
+        signals = await run_in_threadpool(generate_all)
+        
+        result = await run_in_threadpool(
+            BacktestService(None).run_portfolio_backtest,
+            request.start_date,
+            request.end_date,
+            data,
+            signals,
+            request.initial_capital,
+            params={'position_size': request.position_size},
+        )
+        
+        return PortfolioBacktestResponse(**result)
+        
+    except Exception as e:
+        logger.error(f"Portfolio backtest failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
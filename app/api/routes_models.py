@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List
+import pandas as pd
+
+from app.schemas.model import ModelInfo, ModelPredictionRequest, ModelPredictionResponse
+from app.services.inference_batcher import default_inference_server
+from app.services.model_registry import ModelNotFoundError, default_model_registry
+
+router = APIRouter()
+
+@router.get("", response_model=List[ModelInfo])
+async def list_models() -> List[ModelInfo]:
+    """Registered models and the versions currently held in memory."""
+    registry = default_model_registry()
+    loaded = registry.status()["loaded"]
+    return [
+        ModelInfo(
+            name=name,
+            versions=registry.versions(name),
+            loaded_versions=[int(key.rsplit(":", 1)[1]) for key in loaded if key.rsplit(":", 1)[0] == name],
+        )
+        for name in registry.names()
+    ]
+
+@router.get("/inference")
+async def inference_stats() -> Dict[str, Dict[str, float]]:
+    """Batch sizes and latency percentiles of the prediction batchers, per model version."""
+    return default_inference_server().stats()
+
+@router.post("/{name}/predict", response_model=ModelPredictionResponse)
+async def predict(name: str, req: ModelPredictionRequest) -> ModelPredictionResponse:
+    """Signal of a registered model for the newest candle; loads the model on first use."""
+    registry = default_model_registry()
+    try:
+        version = registry.resolve(name, req.version)
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    candles = pd.DataFrame([candle.model_dump() for candle in req.candles])
+    try:
+        signal = await run_in_threadpool(registry.predict, name, candles, version)
+    except ValueError as e:
+        # A version saved without what is needed to rebuild its training features
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return ModelPredictionResponse(name=name, version=version, signal=signal)
@@ -2,7 +2,6 @@
 from fastapi import APIRouter, HTTPException
 
 from app.strategies.mean_reversion import MeanReversionStrategy
-from app.services.backtest_service import BacktestService
 
 router = APIRouter(prefix="/strategies", tags=["strategies"])
 
@@ -49,6 +49,13 @@ class Settings(BaseSettings):
     ALLOWED_ORIGINS: str = "http://localhost:3000"
     TRADING_MODE: str = "kraken"
     REDIS_URL: str = "redis://localhost:6379/0"
+    BACKTEST_CACHE_DIR: str = ".cache/backtests"
+    BACKTEST_CACHE_MAX_MB: int = 512
+    BACKTEST_ARTIFACT_DIR: str = "artifacts/backtests"
+    FEATURE_STORE_DIR: str = ".cache/features"
+    MODEL_REGISTRY_DIR: str = "artifacts/models"
+    MODEL_CACHE_MAX_MB: int = 1024
+    MODEL_TUNING_DIR: str = "artifacts/tuning"
 
     # Risk profiles
     RISK_PROFILES: Dict[str, Any] = {
@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 import asyncio
 from app.db.database import SessionLocal
 from app.db.models import BacktestResult, GridTrade, KrakenOrder
+from app.services.backtest_artifacts import equity_frame, load_run_columns
+from app.services.performance_metrics import equity_metrics, periods_per_year
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,6 +40,7 @@ def get_backtest_metrics():
                 'strategy': r.strategy_name,
                 'total_return': float(r.total_return),
                 'sharpe_ratio': float(r.sharpe_ratio) if r.sharpe_ratio else 0,
+                'sortino_ratio': float(r.sortino_ratio) if r.sortino_ratio else 0,
                 'max_drawdown': float(r.max_drawdown) if r.max_drawdown else 0,
                 'total_trades': r.total_trades,
                 'win_rate': float(r.win_rate) if r.win_rate else 0,
@@ -49,6 +52,38 @@ def get_backtest_metrics():
         db.close()
 
 
+def get_latest_run(max_points: int = 2000):
+    """
+    Newest stored backtest run: symbol, equity strided to at most
+    max_points, and risk metrics over the full equity curve
+    """
+    db = SessionLocal()
+    try:
+        result = (
+            db.query(BacktestResult)
+            .filter(BacktestResult.artifact_path.isnot(None))
+            .order_by(BacktestResult.created_at.desc())
+            .first()
+        )
+    finally:
+        db.close()
+    if result is None:
+        return None, pd.DataFrame(), {}
+
+    try:
+        columns = load_run_columns(result.artifact_path)
+    except OSError as exc:
+        logger.warning("Backtest artifact unavailable for %s: %s", result.symbol, exc)
+        return result.symbol, pd.DataFrame(), {}
+    equity = columns['equity']
+    index = pd.DatetimeIndex(columns['timestamp'].view('datetime64[ns]'))
+    risk = equity_metrics(equity, periods_per_year(index), float(result.initial_capital))
+    risk['final_value'] = float(equity[-1])
+    # Memory-mapped, so striding only reads the sampled pages
+    stride = max(len(equity) // max_points, 1)
+    return result.symbol, equity_frame(columns, stride), risk
+
+
 def get_grid_trades():
     """Fetch grid trades from DB"""
     db = SessionLocal()
@@ -95,6 +130,8 @@ def get_kraken_orders():
 st.title("🎯 AI Trading Risk Dashboard")
 st.subheader("Real-time Portfolio & Strategy Analytics")
 
+equity_symbol, df_equity, risk = get_latest_run()
+
 # KPIs
 col1, col2, col3, col4 = st.columns(4)
 
@@ -116,15 +153,13 @@ with col2:
 with col3:
     st.metric(
         label="Sharpe Ratio",
-        value="2.34",
-        delta="From 2.12"
+        value=f"{risk['sharpe_ratio']:.2f}" if risk else "n/a",
     )
 
 with col4:
     st.metric(
         label="Max Drawdown",
-        value="-8.5%",
-        delta="Improved"
+        value=f"-{risk['max_drawdown']:.1f}%" if risk else "n/a",
     )
 
 st.divider()
@@ -224,18 +259,23 @@ with tab4:
     
     col1, col2, col3 = st.columns(3)
     
+    # Per-bar VaR scaled to the latest account value
     with col1:
-        st.metric("Value at Risk (95%)", "-$4,521")
+        st.metric(
+            "Value at Risk (95%)",
+            f"-${risk['value_at_risk'] * risk['final_value']:,.0f}" if risk else "n/a",
+        )
     with col2:
-        st.metric("Sortino Ratio", "3.45")
+        st.metric("Sortino Ratio", f"{risk['sortino_ratio']:.2f}" if risk else "n/a")
     with col3:
-        st.metric("Calmar Ratio", "4.12")
+        st.metric("Calmar Ratio", f"{risk['calmar_ratio']:.2f}" if risk else "n/a")
     
-    # Equity curve simulation
-    st.line_chart({
-        'Equity': [100, 102, 101, 105, 103, 108, 106, 110, 112, 115],
-        'Benchmark': [100, 101, 100, 102, 101, 103, 102, 104, 105, 106]
-    })
+    # Equity curve of the latest stored backtest
+    if not df_equity.empty:
+        st.caption(f"Latest backtest equity: {equity_symbol}")
+        st.line_chart(df_equity[['equity']])
+    else:
+        st.info("No stored backtest equity curves yet")
 
 # Tab 5: Strategy Comparison
 with tab5:
@@ -3,6 +3,7 @@ from .trade import (
     OrderSide,
     OrderStatus,
     BacktestResult,
+    BacktestJob,
     MLSignal,
     GridTrade,
     KrakenOrder,
@@ -13,6 +14,7 @@ __all__ = [
     "OrderSide",
     "OrderStatus",
     "BacktestResult",
+    "BacktestJob",
     "MLSignal",
     "GridTrade",
     "KrakenOrder",
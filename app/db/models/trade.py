@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Boolean, Numeric
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Boolean, Numeric, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 from typing import Any
@@ -47,14 +47,41 @@ class BacktestResult(Base):
     total_trades = Column(Integer)
     win_rate = Column(Numeric(10, 4))
     profit_factor = Column(Numeric(10, 4))
+    # .npz with the run's equity curve, positions and trade log
+    artifact_path = Column(String(500))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class BacktestJob(Base):
+    __tablename__ = "backtest_jobs"
+
+    id = Column(String(36), primary_key=True)
+    job_type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, index=True)
+    payload = Column(Text, nullable=False)
+    result = Column(Text)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    # Queue running the job and its last sign of life; stale rows are re-queued
+    worker_id = Column(String(100))
+    heartbeat_at = Column(DateTime(timezone=True))
+
+
 class MLSignal(Base):
     __tablename__ = "ml_signals"
 
+    # One row per bar and model version; also the index of range reads
+    __table_args__ = (
+        Index("uq_ml_signals_model_bar", "symbol", "model_name", "model_version", "signal_timestamp",
+              unique=True),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), nullable=False)
+    model_name = Column(String(100))
+    model_version = Column(Integer)
     signal_timestamp = Column(DateTime(timezone=True), nullable=False)
     lstm_prediction = Column(Numeric(10, 6))
     rf_prediction = Column(Numeric(10, 6))
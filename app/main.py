@@ -13,10 +13,13 @@ from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.services.websocket_service import ConnectionManager
+from app.services.job_service import backtest_jobs
+from app.services.strategy_sandbox import default_strategy_sandbox
+from app.services.inference_batcher import default_inference_server
 from app.strategy_manager import StrategyManager
 from app.brokers.kraken import KrakenBroker
 from app.utils.ai_models import TradingAIModels
-from app.api import routes_auth, routes_users, routes_portfolio, routes_trade, routes_data, routes_risk, routes_indicators, routes_strategy, routes_backtest, routes_webhooks
+from app.api import routes_auth, routes_users, routes_portfolio, routes_trade, routes_data, routes_risk, routes_indicators, routes_strategy, routes_backtest, routes_models, routes_webhooks
 
 logger = logging.getLogger(__name__)
 
@@ -48,10 +51,20 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as exc:
         logger.error("Failed to initialize application: %s", exc)
     
+    # Trading and data routes stay up without the queue; /backtest/* answers 503 meanwhile
+    try:
+        await backtest_jobs.start()
+        logger.info("Backtest job queue started")
+    except Exception:
+        logger.exception("Backtest job queue failed to start; backtest routes are unavailable")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down AI Trading application...")
+    await backtest_jobs.stop()
+    default_strategy_sandbox().shutdown()
+    default_inference_server().close()
     if models:
         models = None
 
@@ -72,6 +85,7 @@ app.include_router(routes_risk.router, prefix="/risk", tags=["risk"])
 app.include_router(routes_indicators.router, prefix="/indicators", tags=["indicators"])
 app.include_router(routes_strategy.router, prefix="/strategy", tags=["strategy"])
 app.include_router(routes_backtest.router, prefix="/backtest", tags=["backtest"])
+app.include_router(routes_models.router, prefix="/models", tags=["models"])
 app.include_router(routes_webhooks.router, prefix="/api", tags=["webhooks"])
 
 @app.get("/health")
@@ -155,6 +169,23 @@ async def websocket_prices(websocket: WebSocket, symbol: str) -> None:
         except Exception:
             pass
 
+@app.websocket("/ws/backtest/{job_id}")
+async def websocket_backtest_progress(websocket: WebSocket, job_id: str) -> None:
+    """Throttled progress, throughput and downsampled equity of a backtest job."""
+    await websocket.accept()
+    try:
+        async for update in backtest_jobs.watch(job_id):
+            await websocket.send_json(update)
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("Client disconnected from backtest job %s", job_id)
+    except Exception as exc:
+        logger.error("Backtest progress error for %s: %s", job_id, exc)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
 @app.get("/test/400")
 async def test_400() -> None:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Test 400 error")
@@ -1,7 +1,29 @@
 from __future__ import annotations
 
+import math
 from datetime import datetime
-from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field, model_validator
+
+# Largest number of runs one parameter sweep may request
+MAX_SWEEP_RUNS = 100_000
+
+
+class FeeTierConfig(BaseModel):
+    min_notional: float = Field(..., ge=0)
+    maker: float = Field(..., ge=0, lt=1)
+    taker: float = Field(..., ge=0, lt=1)
+
+
+class CostModelConfig(BaseModel):
+    maker_fee: float = Field(0.0016, ge=0, lt=1)
+    taker_fee: float = Field(0.0026, ge=0, lt=1)
+    tiers: List[FeeTierConfig] = Field(default_factory=list, max_length=20)
+    spread_bps: float = Field(0.0, ge=0)
+    impact_coefficient: float = Field(0.0, ge=0)
+    volatility_window: int = Field(20, ge=2)
+    tier_window_days: float = Field(30.0, gt=0)
 
 
 class BacktestRequest(BaseModel):
@@ -10,6 +32,35 @@ class BacktestRequest(BaseModel):
     end_date: datetime
     initial_capital: float = Field(10000.0, gt=0)
     timeframe: str = Field("1d", min_length=1, max_length=10)
+    engine: Literal["backtrader", "vectorized"] = "backtrader"
+    monte_carlo: bool = False
+    monte_carlo_simulations: int = Field(10000, ge=100, le=100_000)
+    # Replaces the flat commission when set
+    costs: Optional[CostModelConfig] = None
+    # Registered model whose stored signals drive the run; an untrained ensemble when unset
+    signal_model: Optional[str] = Field(None, min_length=1, max_length=100)
+    signal_model_version: Optional[int] = Field(None, ge=1)
+
+
+class ConfidenceInterval(BaseModel):
+    mean: float
+    lower: float
+    upper: float
+
+
+class ResamplingSummary(BaseModel):
+    final_value: ConfidenceInterval
+    max_drawdown: ConfidenceInterval
+    sharpe_ratio: ConfidenceInterval
+    probability_of_loss: float
+
+
+class MonteCarloReport(BaseModel):
+    n_simulations: int
+    n_trades: int
+    confidence: float
+    bootstrap: Optional[ResamplingSummary] = None
+    shuffle: Optional[ResamplingSummary] = None
 
 
 class BacktestResponse(BaseModel):
@@ -23,3 +74,121 @@ class BacktestResponse(BaseModel):
     total_trades: int
     win_rate: float
     profit_factor: float
+    sortino_ratio: Optional[float] = None
+    calmar_ratio: Optional[float] = None
+    annual_return: Optional[float] = None
+    volatility: Optional[float] = None
+    value_at_risk: Optional[float] = None
+    expected_shortfall: Optional[float] = None
+    monte_carlo: Optional[MonteCarloReport] = None
+
+
+class BacktestJobStatus(BaseModel):
+    job_id: str
+    job_type: str
+    status: Literal["queued", "running", "completed", "failed", "cancelled"]
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ParameterSweepRequest(BaseModel):
+    symbol: str = Field(..., min_length=1, max_length=20)
+    start_date: datetime
+    end_date: datetime
+    initial_capital: float = Field(10000.0, gt=0)
+    timeframe: str = Field("1d", min_length=1, max_length=10)
+    grid: Optional[Dict[str, List[Optional[float]]]] = None
+    random_ranges: Optional[Dict[str, Tuple[float, float]]] = None
+    n_samples: int = Field(100, gt=0, le=MAX_SWEEP_RUNS)
+    seed: Optional[int] = None
+    # Further capped at the CPU count by ParameterSweepService
+    max_workers: Optional[int] = Field(None, gt=0, le=64)
+
+    @model_validator(mode="after")
+    def check_search_space(self) -> "ParameterSweepRequest":
+        if (self.grid is None) == (self.random_ranges is None):
+            raise ValueError("Provide exactly one of 'grid' or 'random_ranges'")
+        if self.grid is not None:
+            runs = math.prod(len(values) for values in self.grid.values())
+            if runs > MAX_SWEEP_RUNS:
+                raise ValueError(f"Grid has {runs} combinations; at most {MAX_SWEEP_RUNS} are allowed")
+        return self
+
+
+class WalkForwardRequest(BaseModel):
+    symbol: str = Field(..., min_length=1, max_length=20)
+    start_date: datetime
+    end_date: datetime
+    initial_capital: float = Field(10000.0, gt=0)
+    timeframe: str = Field("1d", min_length=1, max_length=10)
+    train_size: int = Field(500, gt=1)
+    test_size: int = Field(100, gt=0)
+    step: Optional[int] = Field(None, gt=0)
+    anchored: bool = False
+    lookback_period: int = Field(60, gt=0)
+    use_lstm: bool = False
+    epochs: int = Field(10, gt=0)
+    engine: Literal["backtrader", "vectorized"] = "vectorized"
+    max_workers: Optional[int] = Field(None, gt=0)
+
+
+class WalkForwardFold(BaseModel):
+    fold: int
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+    final_value: float
+    total_return: float
+    sharpe_ratio: float
+    max_drawdown: float
+    total_trades: int
+    win_rate: float
+    profit_factor: float
+
+
+class WalkForwardResponse(BaseModel):
+    symbol: str
+    folds: List[WalkForwardFold]
+    combined: BacktestResponse
+
+
+class PortfolioBacktestRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=50)
+    start_date: datetime
+    end_date: datetime
+    initial_capital: float = Field(10000.0, gt=0)
+    timeframe: str = Field("1d", min_length=1, max_length=10)
+    position_size: float = Field(0.1, gt=0, le=1)
+
+
+class SymbolAttribution(BaseModel):
+    pnl: float
+    contribution: float
+    total_trades: int
+    win_rate: float
+    final_position: float
+    drawdown_contribution: float
+
+
+class PortfolioBacktestResponse(BaseModel):
+    symbols: List[str]
+    start_date: datetime
+    end_date: datetime
+    final_value: float
+    total_return: float
+    sharpe_ratio: float
+    max_drawdown: float
+    total_trades: int
+    win_rate: float
+    profit_factor: float
+    sortino_ratio: Optional[float] = None
+    calmar_ratio: Optional[float] = None
+    annual_return: Optional[float] = None
+    volatility: Optional[float] = None
+    value_at_risk: Optional[float] = None
+    expected_shortfall: Optional[float] = None
+    attribution: Dict[str, SymbolAttribution]
+    correlation: Dict[str, Dict[str, float]]
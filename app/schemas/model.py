@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class ModelCandle(BaseModel):
+    close: float = Field(gt=0)
+    volume: float = Field(ge=0)
+
+class ModelPredictionRequest(BaseModel):
+    candles: List[ModelCandle] = Field(..., min_length=2, max_length=10_000)
+    version: Optional[int] = Field(default=None, ge=1)
+
+class ModelPredictionResponse(BaseModel):
+    name: str
+    version: int
+    signal: float = Field(ge=0, le=1)
+
+class ModelInfo(BaseModel):
+    name: str
+    versions: List[int]
+    loaded_versions: List[int]
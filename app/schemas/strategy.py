@@ -21,3 +21,4 @@ class StrategyRunResult(BaseModel):
     max_drawdown: float
     sharpe: float | None = None
     trades: List[Trade]
+    error: str | None = None
@@ -0,0 +1,83 @@
+from typing import Dict
+import logging
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from app.services.backtest_artifacts import load_run_columns, save_run_columns
+
+logger = logging.getLogger(__name__)
+
+# Columns of a candle archive, timestamps as int64 nanoseconds since the epoch
+CANDLE_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+# Backtrader's day number (proleptic ordinal, as bt.date2num) of 1970-01-01
+_EPOCH_DAYNUM = 719163.0
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def candle_columns(data: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    OHLCV columns of a DataFrame as flat arrays
+
+    Float64 columns come back as views of the frame's own blocks; only
+    columns of another dtype (and a non-nanosecond index) are converted.
+    """
+    index = pd.DatetimeIndex(data.index)
+    columns = {'timestamp': index.to_numpy(dtype='datetime64[ns]').view(np.int64)}
+    for name in CANDLE_COLUMNS[1:]:
+        columns[name] = data[name].to_numpy(dtype=np.float64, copy=False)
+    return columns
+
+
+def save_candles(path: str, data: pd.DataFrame) -> str:
+    """Write OHLCV bars as a memory-mappable candle archive"""
+    return save_run_columns(path, candle_columns(data))
+
+
+class ArrayData(bt.feed.DataBase):
+    """
+    Backtrader feed over contiguous OHLCV arrays
+
+    ``dataname`` is a mapping with the CANDLE_COLUMNS keys, such as the
+    result of candle_columns() or of load_run_columns() on a candle
+    archive (in which case bars are paged in from disk as the run reaches
+    them). Unlike PandasData, nothing is copied into a new DataFrame and
+    bars are read by plain array indexing instead of ``DataFrame.iloc``.
+    """
+
+    def start(self):
+        super().start()
+        columns = self.p.dataname
+        missing = set(CANDLE_COLUMNS) - set(columns)
+        if missing:
+            raise ValueError(f"Candle columns missing: {sorted(missing)}")
+
+        # One vectorized conversion instead of a datetime object per bar
+        stamps = np.asarray(columns['timestamp'], dtype=np.int64)
+        self._daynums = stamps / _NS_PER_DAY + _EPOCH_DAYNUM
+        self._fields = [
+            (getattr(self.lines, name), columns[name]) for name in CANDLE_COLUMNS[1:]
+        ]
+        self._idx = -1
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, **kwargs) -> 'ArrayData':
+        """Feed over a DataFrame's OHLCV columns without copying them"""
+        return cls(dataname=candle_columns(data), **kwargs)
+
+    @classmethod
+    def from_archive(cls, path: str, **kwargs) -> 'ArrayData':
+        """Feed over a memory-mapped candle archive written by save_candles"""
+        return cls(dataname=load_run_columns(path), **kwargs)
+
+    def _load(self):
+        self._idx += 1
+        i = self._idx
+        if i >= len(self._daynums):
+            return False
+
+        self.lines.datetime[0] = self._daynums[i]
+        for line, values in self._fields:
+            line[0] = values[i]
+        return True
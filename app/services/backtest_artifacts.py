@@ -0,0 +1,111 @@
+import os
+import struct
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-bar columns of a run
+BAR_COLUMNS = ('timestamp', 'equity', 'cash', 'position')
+# Per-closed-trade columns of a run
+TRADE_COLUMNS = (
+    'trade_entry_bar',
+    'trade_exit_bar',
+    'trade_size',
+    'trade_entry_price',
+    'trade_exit_price',
+    'trade_pnlcomm',
+    'trade_return',
+)
+
+# Zip local file header: signature ... name length, extra length
+_LOCAL_HEADER = struct.Struct('<4s22xHH')
+
+
+def save_run_columns(path: str, columns: Dict[str, np.ndarray]) -> str:
+    """
+    Write run columns to an uncompressed ``.npz`` file, atomically
+
+    Members are stored rather than deflated so load_run_columns can
+    memory-map them in place.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **{name: np.ascontiguousarray(values) for name, values in columns.items()})
+        os.replace(tmp, target)
+    except Exception:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return str(target)
+
+
+def load_run_columns(path: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Read run columns, memory-mapping each one by default
+
+    Only the pages a caller actually touches are read, so slicing or
+    striding a million-point equity curve costs what the slice costs.
+    """
+    if not mmap:
+        with np.load(path, allow_pickle=False) as archive:
+            return {name: archive[name] for name in archive.files}
+
+    columns = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as raw:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}:{info.filename} is compressed and cannot be memory-mapped")
+            raw.seek(info.header_offset)
+            _, name_length, extra_length = _LOCAL_HEADER.unpack(raw.read(_LOCAL_HEADER.size))
+            raw.seek(info.header_offset + _LOCAL_HEADER.size + name_length + extra_length)
+
+            version = np.lib.format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(raw)
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if 0 in shape:
+                columns[name] = np.zeros(shape, dtype=dtype)
+                continue
+            columns[name] = np.memmap(
+                path,
+                dtype=dtype,
+                mode='r',
+                shape=shape,
+                order='F' if fortran_order else 'C',
+                offset=raw.tell(),
+            )
+    return columns
+
+
+def equity_frame(columns: Dict[str, np.ndarray], stride: int = 1) -> pd.DataFrame:
+    """Timestamp-indexed equity/cash/position, optionally every ``stride``-th bar"""
+    index = pd.DatetimeIndex(np.asarray(columns['timestamp'][::stride]).view('datetime64[ns]'))
+    return pd.DataFrame(
+        {name: np.asarray(columns[name][::stride]) for name in BAR_COLUMNS[1:] if name in columns},
+        index=index,
+    )
+
+
+def trade_frame(columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Closed trades as a DataFrame with unprefixed column names"""
+    return pd.DataFrame({
+        name[len('trade_'):]: np.asarray(columns[name]) for name in TRADE_COLUMNS if name in columns
+    })
+
+
+def artifact_path(run_id: str, artifact_dir: Optional[str] = None) -> str:
+    """Where the columns of a stored backtest run live"""
+    return os.path.join(artifact_dir or settings.BACKTEST_ARTIFACT_DIR, f"{run_id}.npz")
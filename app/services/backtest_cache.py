@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.cost_model import CostModel
+
+logger = logging.getLogger(__name__)
+
+# Bump when engine semantics change so stale results are never served
+CACHE_VERSION = 4
+
+
+class BacktestCache:
+    """
+    Content-addressed on-disk cache of backtest metrics and run columns
+
+    Entries are ``<sha256>.npz`` files keyed on every input that affects the
+    result (symbol, range, OHLCV content, signals, cash, commission or cost
+    model, engine and strategy params). Reads bump the file's mtime, and writes evict the
+    least recently used files once the directory exceeds ``max_bytes`` or
+    ``max_entries``.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, max_entries: int = 10000):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime,
+        data: pd.DataFrame,
+        signals: List[float],
+        initial_cash: float,
+        commission: float,
+        engine: str,
+        params: Dict,
+        cost_model: Optional[CostModel] = None,
+    ) -> str:
+        """Hash of all backtest inputs"""
+        digest = hashlib.sha256()
+        header = {
+            'version': CACHE_VERSION,
+            'symbol': symbol,
+            'start_date': str(start_date),
+            'end_date': str(end_date),
+            'initial_cash': float(initial_cash),
+            'commission': float(commission),
+            'engine': engine,
+            'params': params,
+        }
+        if cost_model is not None:
+            header['cost_model'] = asdict(cost_model)
+        digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+
+        index = pd.DatetimeIndex(pd.to_datetime(data.index))
+        digest.update(np.ascontiguousarray(index.to_numpy(dtype='datetime64[ns]')).view(np.int64).tobytes())
+        for column in ('open', 'high', 'low', 'close', 'volume'):
+            if column in data:
+                digest.update(column.encode())
+                digest.update(np.ascontiguousarray(data[column].to_numpy(dtype=float)).tobytes())
+        digest.update(b'signals')
+        digest.update(np.ascontiguousarray(np.asarray(signals, dtype=float)).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[Tuple[Dict, Dict[str, np.ndarray]]]:
+        """Cached (metrics, run columns), or None on a miss"""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                metrics = json.loads(str(entry['metrics']))
+                columns = {name: entry[name] for name in entry.files if name != 'metrics'}
+            os.utime(path)  # LRU: reads count as use
+            return metrics, columns
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable backtest cache entry {key}: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, metrics: Dict, columns: Dict[str, np.ndarray]) -> None:
+        """Store a result atomically, then enforce the size limits"""
+        stored = {
+            k: v for k, v in metrics.items()
+            if k not in ('symbol', 'start_date', 'end_date', 'monte_carlo')
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, metrics=np.array(json.dumps(stored, default=float)), **columns)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, path = entries.pop(0)
+            Path(path).unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                Path(entry.path).unlink(missing_ok=True)
+
+
+def default_backtest_cache() -> BacktestCache:
+    """Cache configured from BACKTEST_CACHE_DIR / BACKTEST_CACHE_MAX_MB"""
+    return BacktestCache(
+        settings.BACKTEST_CACHE_DIR,
+        max_bytes=settings.BACKTEST_CACHE_MAX_MB * 1024 * 1024,
+    )
@@ -0,0 +1,83 @@
+import time
+from typing import Callable, Dict, List, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressTracker:
+    """
+    Throttled progress reports of one running backtest
+
+    ``update`` is called once per bar from inside the engine and must stay
+    cheap: it keeps a downsampled equity curve (every ``stride``-th bar,
+    with the stride doubling whenever ``max_points`` is exceeded) and calls
+    ``publish`` at most once per ``interval`` seconds. Each report replaces
+    the previous one, so readers always see the latest state and never
+    hold up the backtest.
+    """
+
+    # Bars between clock reads
+    CHECK_EVERY = 32
+
+    def __init__(
+        self,
+        total_bars: int,
+        publish: Callable[[Dict], None],
+        interval: float = 0.25,
+        max_points: int = 500,
+    ):
+        self.total_bars = max(total_bars, 1)
+        self.publish = publish
+        self.interval = interval
+        self.max_points = max_points
+        self.stride = 1
+        self.points: List[List[float]] = []
+        self.bars_done = 0
+        self._started = time.monotonic()
+        self._last_publish = self._started
+
+    def update(self, bars_done: int, equity: float) -> None:
+        """Record the account value after bar ``bars_done`` (1-based)"""
+        self.bars_done = bars_done
+        if bars_done % self.stride == 0:
+            self.points.append([bars_done, equity])
+            if len(self.points) > self.max_points:
+                self.points = self.points[1::2]
+                self.stride *= 2
+
+        if bars_done % self.CHECK_EVERY == 0:
+            now = time.monotonic()
+            if now - self._last_publish >= self.interval:
+                self._last_publish = now
+                self._publish(now)
+
+    def complete(self, equity: Optional[np.ndarray] = None) -> None:
+        """Publish the final report, optionally from a whole equity curve"""
+        if equity is not None and len(equity):
+            self.bars_done = len(equity)
+            self.stride = 1
+            while len(equity) // self.stride > self.max_points:
+                self.stride *= 2
+            bars = np.arange(self.stride, len(equity) + 1, self.stride)
+            self.points = np.column_stack([bars, equity[bars - 1]]).tolist()
+        self._publish(time.monotonic())
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        elapsed = (now or time.monotonic()) - self._started
+        return {
+            'progress': min(100.0 * self.bars_done / self.total_bars, 100.0),
+            'bars_processed': self.bars_done,
+            'total_bars': self.total_bars,
+            'bars_per_second': self.bars_done / elapsed if elapsed > 0 else 0.0,
+            'equity': self.points,
+        }
+
+    def _publish(self, now: float) -> None:
+        try:
+            self.publish(self.snapshot(now))
+        except Exception as e:
+            # A lost progress report must never fail the backtest
+            logger.warning(f"Progress publish failed: {str(e)}")
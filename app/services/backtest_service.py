@@ -1,9 +1,34 @@
 import backtrader as bt
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+from bisect import bisect_right
 import logging
 
+from app.services.array_feed import ArrayData
+from app.services.backtest_cache import BacktestCache
+from app.services.backtest_progress import ProgressTracker
+from app.services.cost_model import CostModel, MarketContext
+from app.services.incremental_backtest import (
+    BacktestCheckpoint,
+    checkpoint_from_result,
+    checkpoint_metrics,
+    extend_checkpoint,
+)
+from app.services.monte_carlo import resample_trade_returns
+from app.services.portfolio_backtest import run_portfolio_backtest, compute_portfolio_metrics
+from app.services.strategy_simulator import (
+    simulate_arbitrage,
+    simulate_dca,
+    simulate_grid,
+    simulation_metrics,
+)
+from app.services.vectorized_backtest import run_vectorized_backtest, compute_metrics, summary_metrics
+from app.strategies.arbitrage import ArbitrageStrategy
+from app.strategies.dca_strategy import DCAStrategy
+from app.strategies.grid_trading import GridTradingStrategy
+
 logger = logging.getLogger(__name__)
 
 class BacktestStrategy(bt.Strategy):
@@ -18,34 +43,132 @@ class BacktestStrategy(bt.Strategy):
     def __init__(self):
         self.signals = None
         self.trades_log = []
+        self._open_value = 0.0
+        self._open_size = 0.0
+        self._entry_value = 0.0
         
     def next(self):
         if not self.position:
             if self.signals[0] > 0.5:  # Buy signal
-                size = self.broker.getcash() * self.params['position_size'] / self.data.close[0]
+                self._entry_value = self.broker.getvalue()
+                size = self.broker.getcash() * self.p.position_size / self.data.close[0]
                 self.buy(size=size)
                 
         else:
-            if self.signals[0] < 0.5:  # Sell signal
+            close = self.data.close[0]
+            entry = self.position.price
+            hit_tp = self.p.take_profit and close >= entry * (1 + self.p.take_profit)
+            hit_sl = self.p.stop_loss and close <= entry * (1 - self.p.stop_loss)
+            if self.signals[0] < 0.5 or hit_tp or hit_sl:  # Sell signal or exit level
                 self.sell(size=self.position.size)
     
     def notify_trade(self, trade):
-        if trade.isclosed:
+        if trade.justopened:
+            # Closed trades report size 0, so keep the opening notional
+            self._open_value = abs(trade.value)
+            self._open_size = trade.size
+        elif trade.isclosed:
             self.trades_log.append({
-                'date': bt.num2date(trade.barlen),
-                'entry': trade.barlen,
-                'exit': trade.barlen,
+                'date': bt.num2date(trade.dtclose),
+                'entry': trade.baropen,
+                'exit': trade.barclose,
+                'size': self._open_size,
+                'entry_price': trade.price,
+                'exit_price': trade.price + trade.pnl / self._open_size,
                 'pnl': trade.pnl,
-                'pnlpercent': trade.pnlpercent,
+                'pnlcomm': trade.pnlcomm,
+                'value': self._entry_value,
+                'pnlpercent': 100.0 * trade.pnl / max(self._open_value, 1e-12),
             })
 
 
+class EquityCurve(bt.Analyzer):
+    """Broker value, cash and position at the close of every bar
+    
+    The value is optionally fed to a ProgressTracker.
+    """
+    
+    params = (('progress', None),)
+    
+    def start(self):
+        self.values = []
+        self.cash = []
+        self.position = []
+    
+    def next(self):
+        value = self.strategy.broker.getvalue()
+        self.values.append(value)
+        self.cash.append(self.strategy.broker.getcash())
+        self.position.append(self.strategy.position.size)
+        if self.p.progress is not None:
+            self.p.progress.update(len(self.values), value)
+    
+    def get_analysis(self):
+        return self.values
+
+
+class CostModelCommission(bt.CommInfoBase):
+    """Commission scheme charging a CostModel's rate on every fill
+    
+    The broker also calls this for its cash check on submission, so the
+    notional that decides fee tiers is kept by FillLedger, which only sees
+    completed orders.
+    """
+    
+    params = (
+        ('stocklike', True),
+        ('commtype', bt.CommInfoBase.COMM_PERC),
+        ('percabs', True),
+        ('model', None),
+        ('market', None),
+        ('feed', None),
+    )
+    
+    def __init__(self):
+        super().__init__()
+        self.fill_stamps: List[int] = []
+        self.traded = [0.0]
+        self._window = pd.Timedelta(self.p.model.tier_window).value
+    
+    def record_fill(self, notional: float):
+        self.fill_stamps.append(int(self.p.market.timestamps[len(self.p.feed) - 1]))
+        self.traded.append(self.traded[-1] + notional)
+    
+    def _getcommission(self, size, price, pseudoexec):
+        bar = len(self.p.feed) - 1
+        prior = 0.0
+        if self.p.model.tiers:
+            start = bisect_right(self.fill_stamps, int(self.p.market.timestamps[bar]) - self._window)
+            prior = self.traded[-1] - self.traded[start]
+        rate = self.p.model.fill_rates(self.p.market, np.array([bar]), np.array([size]), np.array([prior]))
+        return abs(size) * price * float(rate[0])
+
+
+class FillLedger(bt.Analyzer):
+    """Feeds executed notional to a CostModelCommission for its fee tiers"""
+    
+    params = (('commission', None),)
+    
+    def notify_order(self, order):
+        if order.status == order.Completed:
+            self.p.commission.record_fill(abs(order.executed.size) * order.executed.price)
+
+
 class BacktestService:
     """Enterprise backtesting with Backtrader"""
     
-    def __init__(self, db_session):
+    def __init__(self, db_session, cache: Optional[BacktestCache] = None):
         self.db_session = db_session
+        self.cache = cache
         self.cerebro = None
+        self.equity_curve: Optional[np.ndarray] = None
+        self.trade_returns: Optional[np.ndarray] = None
+        # Per-bar and per-trade columns of the last run (see backtest_artifacts)
+        self.run_columns: Optional[Dict[str, np.ndarray]] = None
+        # End state of the last vectorized or extended run (None on cache hits)
+        self.checkpoint: Optional[BacktestCheckpoint] = None
+        # Cache key of the last run_backtest call; identical runs share it
+        self.run_key: Optional[str] = None
         
     def run_backtest(
         self,
@@ -56,6 +179,11 @@ class BacktestService:
         signals: List[float],
         initial_cash: float = 10000.0,
         commission: float = 0.001,
+        engine: str = "backtrader",
+        params: Optional[Dict] = None,
+        monte_carlo: int = 0,
+        progress: Optional[ProgressTracker] = None,
+        cost_model: Optional[CostModel] = None,
     ) -> Dict:
         """
         Run accurate backtest with signal integration
@@ -68,28 +196,106 @@ class BacktestService:
             signals: ML-generated signals
             initial_cash: Starting capital
             commission: Trading fee
+            engine: "backtrader" (event-driven) or "vectorized" (NumPy)
+            params: Overrides for BacktestStrategy.params
+            monte_carlo: Resampled paths per method for the trade-return
+                robustness report (0 disables it)
+            progress: Receives per-bar progress and the running equity curve
+            cost_model: Per-fill fees, spread and market impact; replaces
+                ``commission`` in both engines
             
         Returns:
             Backtest results with metrics
         """
+        if engine not in ("backtrader", "vectorized"):
+            raise ValueError(f"Unknown backtest engine: {engine}")
+        strategy_params = self.strategy_params(params)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(
+                symbol, start_date, end_date, data, signals,
+                initial_cash, commission, engine, strategy_params, cost_model,
+            )
+            cached = self.cache.get(cache_key)
+        else:
+            cached = None
+        
+        self.run_key = cache_key
+        self.checkpoint = None
+        if cached is not None:
+            metrics, self.run_columns = cached
+            self.equity_curve = self.run_columns['equity']
+            self.trade_returns = self.run_columns['trade_return']
+            metrics['symbol'] = symbol
+            metrics['start_date'] = start_date
+            metrics['end_date'] = end_date
+            logger.info(f"Backtest cache hit for {symbol} ({start_date} to {end_date})")
+        elif engine == "vectorized":
+            metrics = self._run_vectorized(
+                symbol, start_date, end_date, data, signals, initial_cash, commission,
+                strategy_params, cost_model,
+            )
+        else:
+            metrics = self._run_backtrader(
+                symbol, start_date, end_date, data, signals, initial_cash, commission,
+                strategy_params, progress, cost_model,
+            )
+        
+        if progress is not None:
+            progress.complete(self.equity_curve)
+        
+        if cache_key is not None and cached is None:
+            self.cache.put(cache_key, metrics, self.run_columns)
+        
+        if monte_carlo:
+            index = pd.DatetimeIndex(pd.to_datetime(data.index))
+            metrics['monte_carlo'] = resample_trade_returns(
+                self.trade_returns,
+                initial_cash,
+                years=(index[-1] - index[0]).days / 365.25,
+                n_simulations=monte_carlo,
+            )
+        return metrics
+    
+    def _run_backtrader(
+        self,
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime,
+        data: pd.DataFrame,
+        signals: List[float],
+        initial_cash: float,
+        commission: float,
+        params: Dict,
+        progress: Optional[ProgressTracker] = None,
+        cost_model: Optional[CostModel] = None,
+    ) -> Dict:
+        """Run the event-driven Backtrader engine"""
         try:
             self.cerebro = bt.Cerebro()
             self.cerebro.broker.setcash(initial_cash)
-            self.cerebro.broker.setcommission(commission=commission)
             
             # Prepare data feed
             data_feed = self._prepare_datafeed(data, symbol)
             self.cerebro.adddata(data_feed)
             
+            if cost_model is None:
+                self.cerebro.broker.setcommission(commission=commission)
+            else:
+                comminfo = CostModelCommission(
+                    model=cost_model, market=self._market(cost_model, data), feed=data_feed,
+                )
+                self.cerebro.broker.addcommissioninfo(comminfo)
+                self.cerebro.addanalyzer(FillLedger, commission=comminfo)
+            
             # Add strategy with signals
             strategy_class = self._create_signal_strategy(signals)
-            self.cerebro.addstrategy(strategy_class)
+            self.cerebro.addstrategy(strategy_class, **params)
             
-            # Add analyzers for comprehensive metrics
-            self.cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
-            self.cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
-            self.cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
+            # Return and risk metrics come from the recorded equity curve
             self.cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
+            self.cerebro.addanalyzer(EquityCurve, _name='equity', progress=progress)
             
             # Run backtest
             logger.info(f"Starting backtest for {symbol} ({start_date} to {end_date})")
@@ -97,7 +303,25 @@ class BacktestService:
             strat = results[0]
             
             # Extract metrics
-            metrics = self._extract_metrics(strat, initial_cash)
+            metrics = self._extract_metrics(strat, initial_cash, pd.DatetimeIndex(data.index))
+            bars = strat.analyzers.equity
+            trades = strat.trades_log
+            self.run_columns = {
+                'timestamp': self._timestamps(data),
+                'equity': np.asarray(bars.values, dtype=float),
+                'cash': np.asarray(bars.cash, dtype=float),
+                'position': np.asarray(bars.position, dtype=float),
+                # Backtrader bar numbers are 1-based
+                'trade_entry_bar': np.array([t['entry'] - 1 for t in trades], dtype=np.int64),
+                'trade_exit_bar': np.array([t['exit'] - 1 for t in trades], dtype=np.int64),
+                'trade_size': np.array([t['size'] for t in trades], dtype=float),
+                'trade_entry_price': np.array([t['entry_price'] for t in trades], dtype=float),
+                'trade_exit_price': np.array([t['exit_price'] for t in trades], dtype=float),
+                'trade_pnlcomm': np.array([t['pnlcomm'] for t in trades], dtype=float),
+                'trade_return': np.array([t['pnlcomm'] / t['value'] for t in trades], dtype=float),
+            }
+            self.equity_curve = self.run_columns['equity']
+            self.trade_returns = self.run_columns['trade_return']
             metrics['symbol'] = symbol
             metrics['start_date'] = start_date
             metrics['end_date'] = end_date
@@ -109,18 +333,245 @@ class BacktestService:
             logger.error(f"Backtest failed: {str(e)}")
             raise
     
-    def _prepare_datafeed(self, data: pd.DataFrame, symbol: str) -> bt.feeds.PandasData:
-        """Convert DataFrame to Backtrader feed"""
-        data_copy = data.copy()
-        data_copy['datetime'] = pd.to_datetime(data_copy.index)
-        data_copy.set_index('datetime', inplace=True)
+    def _run_vectorized(
+        self,
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime,
+        data: pd.DataFrame,
+        signals: List[float],
+        initial_cash: float,
+        commission: float,
+        params: Dict,
+        cost_model: Optional[CostModel] = None,
+    ) -> Dict:
+        """Run the NumPy engine with the same strategy rules as Backtrader"""
+        try:
+            logger.info(f"Starting vectorized backtest for {symbol} ({start_date} to {end_date})")
+            result = run_vectorized_backtest(
+                data,
+                signals,
+                initial_cash=initial_cash,
+                commission=commission,
+                cost_model=cost_model,
+                **params,
+            )
+            
+            metrics = compute_metrics(result, initial_cash)
+            n_closed = len(result.exit_bars)
+            closed = result.entry_bars[:n_closed]
+            self.run_columns = {
+                'timestamp': self._timestamps(data),
+                'equity': result.equity,
+                'cash': result.cash,
+                'position': result.position,
+                'trade_entry_bar': closed.astype(np.int64),
+                'trade_exit_bar': result.exit_bars.astype(np.int64),
+                'trade_size': result.sizes[:n_closed],
+                'trade_entry_price': result.entry_prices[:n_closed],
+                'trade_exit_price': result.exit_prices,
+                'trade_pnlcomm': result.pnlcomm,
+                # Flat before every entry, so cash at the decision bar is the account value
+                'trade_return': result.pnlcomm / result.cash[closed - 1],
+            }
+            self.equity_curve = result.equity
+            self.trade_returns = self.run_columns['trade_return']
+            # Checkpoints only carry a flat commission forward
+            if cost_model is None:
+                self.checkpoint = checkpoint_from_result(
+                    result,
+                    data['close'].to_numpy(dtype=float),
+                    signals,
+                    initial_cash,
+                    commission,
+                    **params,
+                )
+            metrics['symbol'] = symbol
+            metrics['start_date'] = start_date
+            metrics['end_date'] = end_date
+            
+            logger.info(f"Vectorized backtest complete. Sharpe: {metrics['sharpe_ratio']:.2f}")
+            return metrics
+            
+        except Exception as e:
+            logger.error(f"Vectorized backtest failed: {str(e)}")
+            raise
+    
+    def extend_backtest(
+        self,
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime,
+        checkpoint: BacktestCheckpoint,
+        data: pd.DataFrame,
+        signals: List[float],
+    ) -> Dict:
+        """
+        Continue a checkpointed run over newly appended bars only
+        
+        Produces the same metrics as re-running the whole history, at a cost
+        proportional to the new bars.
+        
+        Args:
+            symbol: Trading pair (e.g., 'XRPUSD')
+            start_date: Start of the original run
+            end_date: Backtest end
+            checkpoint: State returned by an earlier run (advanced in place)
+            data: OHLCV rows after the checkpoint's last bar
+            signals: ML-generated signals for those rows
+            
+        Returns:
+            Metrics of the full, extended run
+        """
+        try:
+            logger.info(f"Extending backtest for {symbol} by {len(data)} bars")
+            self.checkpoint, self.equity_curve = extend_checkpoint(checkpoint, data, signals)
+            self.run_columns = None
+            self.trade_returns = np.asarray(self.checkpoint.trade_returns, dtype=float)
+            
+            metrics = checkpoint_metrics(self.checkpoint)
+            metrics['symbol'] = symbol
+            metrics['start_date'] = start_date
+            metrics['end_date'] = end_date
+            return metrics
+            
+        except Exception as e:
+            logger.error(f"Backtest extension failed: {str(e)}")
+            raise
+    
+    def run_portfolio_backtest(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        data: Dict[str, pd.DataFrame],
+        signals: Union[pd.DataFrame, Dict[str, List[float]]],
+        initial_cash: float = 10000.0,
+        commission: float = 0.001,
+        params: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        Backtest several symbols against one shared cash account
+        
+        Args:
+            start_date: Backtest start
+            end_date: Backtest end
+            data: Symbol -> OHLCV DataFrame
+            signals: Symbol -> ML-generated signals, or a DataFrame with one
+                column per symbol
+            initial_cash: Starting capital shared by all symbols
+            commission: Trading fee
+            params: Overrides for BacktestStrategy.params; the defaults,
+                exit levels included, are the same as in ``run_backtest``
+            
+        Returns:
+            Portfolio metrics with per-symbol attribution and correlations
+        """
+        strategy_params = self.strategy_params(params)
+        
+        try:
+            logger.info(f"Starting portfolio backtest for {', '.join(data)} ({start_date} to {end_date})")
+            result = run_portfolio_backtest(
+                data,
+                signals,
+                initial_cash=initial_cash,
+                commission=commission,
+                position_size=strategy_params['position_size'],
+                take_profit=strategy_params['take_profit'],
+                stop_loss=strategy_params['stop_loss'],
+            )
+            
+            metrics = compute_portfolio_metrics(result, initial_cash)
+            self.equity_curve = result.equity
+            self.run_columns = None
+            metrics['start_date'] = start_date
+            metrics['end_date'] = end_date
+            
+            logger.info(f"Portfolio backtest complete. Sharpe: {metrics['sharpe_ratio']:.2f}")
+            return metrics
+            
+        except Exception as e:
+            logger.error(f"Portfolio backtest failed: {str(e)}")
+            raise
+    
+    def run_strategy_backtest(
+        self,
+        symbol: str,
+        start_date: datetime,
+        end_date: datetime,
+        strategy: Union[GridTradingStrategy, DCAStrategy, ArbitrageStrategy],
+        data: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+        initial_cash: float = 10000,
+        commission: float = 0.001,
+        arbitrage_amount: float = 1000,
+    ) -> Dict:
+        """
+        Replay a grid, DCA or arbitrage strategy on a simulated clock
         
-        return bt.feeds.PandasData(
-            dataname=data_copy,
-            fromdate=data_copy.index[0],
-            todate=data_copy.index[-1],
+        Args:
+            symbol: Trading pair (e.g., 'XRPUSD')
+            start_date: Backtest start
+            end_date: Backtest end
+            strategy: Fresh strategy instance, mutated as in live trading
+            data: OHLCV bars, or exchange -> bars for arbitrage
+            initial_cash: Starting capital
+            commission: Trading fee
+            arbitrage_amount: Quote amount per arbitrage trade
+            
+        Returns:
+            Metrics dictionary
+        """
+        try:
+            logger.info(f"Simulating {type(strategy).__name__} for {symbol} ({start_date} to {end_date})")
+            if isinstance(strategy, GridTradingStrategy):
+                result = simulate_grid(strategy, data, initial_cash, commission)
+            elif isinstance(strategy, DCAStrategy):
+                result = simulate_dca(strategy, data, initial_cash, commission)
+            elif isinstance(strategy, ArbitrageStrategy):
+                result = simulate_arbitrage(
+                    strategy, data, arbitrage_amount, initial_cash, fee_percent=commission * 100
+                )
+            else:
+                raise ValueError(f"Unsupported strategy: {type(strategy).__name__}")
+            
+            metrics = simulation_metrics(result, initial_cash)
+            self.equity_curve = result.equity
+            self.run_columns = None
+            metrics['symbol'] = symbol
+            metrics['start_date'] = start_date
+            metrics['end_date'] = end_date
+            return metrics
+            
+        except Exception as e:
+            logger.error(f"Strategy simulation failed: {str(e)}")
+            raise
+    
+    @staticmethod
+    def strategy_params(params: Optional[Dict] = None) -> Dict:
+        """BacktestStrategy defaults merged with per-run overrides"""
+        merged = dict(BacktestStrategy.params._getitems())
+        unknown = set(params or {}) - set(merged)
+        if unknown:
+            raise ValueError(f"Unknown strategy params: {sorted(unknown)}")
+        merged.update(params or {})
+        return merged
+    
+    @staticmethod
+    def _timestamps(data: pd.DataFrame) -> np.ndarray:
+        """Bar timestamps as int64 nanoseconds"""
+        return pd.DatetimeIndex(pd.to_datetime(data.index)).to_numpy(dtype='datetime64[ns]').view(np.int64)
+    
+    @staticmethod
+    def _market(cost_model: CostModel, data: pd.DataFrame) -> MarketContext:
+        return cost_model.market(
+            pd.DatetimeIndex(pd.to_datetime(data.index)),
+            data['close'].to_numpy(dtype=float),
+            data['volume'].to_numpy(dtype=float) if 'volume' in data else None,
         )
     
+    def _prepare_datafeed(self, data: pd.DataFrame, symbol: str) -> ArrayData:
+        """Wrap the OHLCV columns in a Backtrader feed without copying them"""
+        return ArrayData.from_frame(data, name=symbol)
+    
     def _create_signal_strategy(self, signals: List[float]):
         """Dynamically create strategy with signals"""
         class SignalStrategy(BacktestStrategy):
@@ -138,33 +589,15 @@ class BacktestService:
         
         return SignalStrategy
     
-    def _extract_metrics(self, strategy, initial_cash: float) -> Dict:
+    def _extract_metrics(self, strategy, initial_cash: float, index: pd.DatetimeIndex) -> Dict:
         """Extract comprehensive backtest metrics"""
-        analyzers = strategy.analyzers
-        
-        final_value = strategy.broker.getvalue()
-        total_return = (final_value - initial_cash) / initial_cash
-        
-        sharpe = analyzers.sharpe.get_analysis().get('sharperatio', 0)
-        drawdown = analyzers.drawdown.get_analysis().get('max', {}).get('drawdown', 0)
-        
-        trades_analysis = analyzers.trades.get_analysis()
+        trades_analysis = strategy.analyzers.trades.get_analysis()
         total_trades = trades_analysis.get('total', {}).get('total', 0)
-        win_rate = trades_analysis.get('won', {}).get('total', 0) / max(total_trades, 1)
         
-        return {
-            'final_value': final_value,
-            'total_return': total_return,
-            'sharpe_ratio': sharpe,
-            'max_drawdown': drawdown,
-            'total_trades': total_trades,
-            'win_rate': win_rate,
-            'profit_factor': self._calculate_profit_factor(trades_analysis),
-        }
-    
-    def _calculate_profit_factor(self, trades_analysis: Dict) -> float:
-        """Calculate profit factor (gross profit / gross loss)"""
-        gross_profit = trades_analysis.get('won', {}).get('pnl', {}).get('total', 0)
-        gross_loss = abs(trades_analysis.get('lost', {}).get('pnl', {}).get('total', 0))
-        
-        return gross_profit / max(gross_loss, 0.001)
+        return summary_metrics(
+            index,
+            np.asarray(strategy.analyzers.equity.values, dtype=float),
+            total_trades,
+            np.array([t['pnlcomm'] for t in strategy.trades_log], dtype=float),
+            initial_cash,
+        )
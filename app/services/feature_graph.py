@@ -0,0 +1,226 @@
+import re
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import load_config
+from app.services.feature_store import DEFAULT_FEATURE_SET, FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+FEATURE_SETS_CONFIG = 'configs/ai/feature_sets.yaml'
+
+# A node is ``(op, *args)``; args are nodes or constants. Equal tuples are
+# the same computation, which is what deduplicates the graph.
+Node = Tuple[Any, ...]
+
+
+def _node(op: str, *args: Any) -> Node:
+    return (op, *args)
+
+
+def _is_node(value: Any) -> bool:
+    return isinstance(value, tuple) and bool(value) and value[0] in _OPS
+
+
+# Inputs and intermediates; every op maps whole columns in one vectorized call
+_OPS: Dict[str, Callable[..., pd.Series]] = {
+    'column': lambda data, name, fallback: pd.Series(
+        data[name if name in data else fallback].to_numpy(dtype=float)
+    ),
+    'diff': lambda data, x, periods: x.diff(periods),
+    'shift': lambda data, x, periods: x.shift(periods),
+    'pct_change': lambda data, x, periods: x.pct_change(periods),
+    'positive': lambda data, x: x.where(x > 0, 0),
+    'negative': lambda data, x: -x.where(x < 0, 0),
+    'rolling_mean': lambda data, x, window: x.rolling(window).mean(),
+    'rolling_std': lambda data, x, window: x.rolling(window).std(),
+    'ema': lambda data, x, span: x.ewm(span=span).mean(),
+    'std': lambda data, x: pd.Series(x.std(), index=x.index),
+    'add': lambda data, a, b: a + b,
+    'sub': lambda data, a, b: a - b,
+    'mul': lambda data, a, b: a * b,
+    'div': lambda data, a, b: a / b,
+    'abs': lambda data, x: x.abs(),
+    'max': lambda data, *xs: pd.Series(np.fmax.reduce([x.to_numpy() for x in xs])),
+    'replace_zero': lambda data, x, value: x.replace(0, value),
+    'fillna': lambda data, x, value: x.fillna(value),
+}
+
+CLOSE = _node('column', 'close', 'close')
+VOLUME = _node('column', 'volume', 'volume')
+# ATR falls back to closes for candles without highs and lows
+HIGH = _node('column', 'high', 'close')
+LOW = _node('column', 'low', 'close')
+
+
+def _rsi(period: int = 14) -> Node:
+    delta = _node('diff', CLOSE, 1)
+    gain = _node('rolling_mean', _node('positive', delta), period)
+    loss = _node('rolling_mean', _node('negative', delta), period)
+    rs = _node('div', gain, _node('replace_zero', loss, 0.001))
+    rsi = _node('sub', 100.0, _node('div', 100.0, _node('add', 1.0, rs)))
+    return _node('div', _node('fillna', rsi, 50.0), 100.0)
+
+
+def _macd(fast: int = 12, slow: int = 26) -> Node:
+    line = _node('sub', _node('ema', CLOSE, fast), _node('ema', CLOSE, slow))
+    return _node('div', line, _node('std', CLOSE))
+
+
+def _bands(window: int) -> Tuple[Node, Node]:
+    return _node('rolling_mean', CLOSE, window), _node('rolling_std', CLOSE, window)
+
+
+def _bollinger(window: int = 20) -> Node:
+    sma, std = _bands(window)
+    lower = _node('sub', sma, _node('mul', std, 2.0))
+    upper = _node('add', sma, _node('mul', std, 2.0))
+    return _node('fillna', _node('div', _node('sub', CLOSE, lower), _node('sub', upper, lower)), 0.5)
+
+
+def _bb_width(window: int = 20) -> Node:
+    sma, std = _bands(window)
+    return _node('fillna', _node('div', _node('mul', std, 4.0), sma), 0.0)
+
+
+def _atr(period: int = 14) -> Node:
+    previous = _node('shift', CLOSE, 1)
+    true_range = _node(
+        'max',
+        _node('sub', HIGH, LOW),
+        _node('abs', _node('sub', HIGH, previous)),
+        _node('abs', _node('sub', LOW, previous)),
+    )
+    return _node('fillna', _node('rolling_mean', true_range, period), 0.0)
+
+
+def _volume_sma_ratio(window: int = 20) -> Node:
+    return _node('fillna', _node('div', VOLUME, _node('rolling_mean', VOLUME, window)), 1.0)
+
+
+def _volatility(window: int = 20) -> Node:
+    return _node('fillna', _bands(window)[1], 0.0)
+
+
+def _change(x: Node, periods: int) -> Node:
+    return _node('fillna', _node('pct_change', x, periods), 0.0)
+
+
+def _price_change(amount: int, unit: str, bar_minutes: float) -> Node:
+    minutes = amount * {'m': 1, 'h': 60, 'd': 1440}[unit]
+    # Changes shorter than a bar are taken over one bar
+    return _change(CLOSE, max(int(round(minutes / bar_minutes)), 1))
+
+
+# Feature name patterns; an omitted period takes the default of the builder
+_FEATURES: List[Tuple[re.Pattern, Callable[..., Node]]] = [
+    (re.compile(r'returns'), lambda m, bar: _change(CLOSE, 1)),
+    (re.compile(r'volatility(?:_(\d+))?'), lambda m, bar: _volatility(*_ints(m))),
+    (re.compile(r'rsi(?:_(\d+))?'), lambda m, bar: _rsi(*_ints(m))),
+    (re.compile(r'macd'), lambda m, bar: _macd()),
+    (re.compile(r'bollinger(?:_(\d+))?'), lambda m, bar: _bollinger(*_ints(m))),
+    (re.compile(r'bb_width(?:_(\d+))?'), lambda m, bar: _bb_width(*_ints(m))),
+    (re.compile(r'atr(?:_(\d+))?'), lambda m, bar: _atr(*_ints(m))),
+    (re.compile(r'volume_change'), lambda m, bar: _change(VOLUME, 1)),
+    (re.compile(r'volume_sma_ratio(?:_(\d+))?'), lambda m, bar: _volume_sma_ratio(*_ints(m))),
+    (re.compile(r'price_change_(\d+)([mhd])'), lambda m, bar: _price_change(int(m.group(1)), m.group(2), bar)),
+]
+
+
+def _ints(match: re.Match) -> Tuple[int, ...]:
+    return tuple(int(group) for group in match.groups() if group is not None)
+
+
+def timeframe_minutes(timeframe: str) -> float:
+    """Bar length of a timeframe such as ``"15m"``, ``"1h"`` or ``"1d"``"""
+    match = re.fullmatch(r'(\d+)([mhdw])', timeframe)
+    if match is None:
+        raise ValueError(f"Unknown timeframe {timeframe!r}")
+    return int(match.group(1)) * {'m': 1, 'h': 60, 'd': 1440, 'w': 10080}[match.group(2)]
+
+
+def feature_node(name: str, bar_minutes: float = 60.0) -> Node:
+    """Graph node computing feature ``name``"""
+    for pattern, build in _FEATURES:
+        match = pattern.fullmatch(name)
+        if match is not None:
+            return build(match, bar_minutes)
+    raise ValueError(f"Unknown feature {name!r}")
+
+
+def load_feature_sets() -> Dict[str, List[str]]:
+    """Feature sets of configs/ai/feature_sets.yaml plus the built-in default set"""
+    return {DEFAULT_FEATURE_SET: list(FEATURE_COLUMNS), **load_config(FEATURE_SETS_CONFIG)}
+
+
+class FeatureGraph:
+    """
+    Feature columns compiled into a DAG of shared intermediates
+
+    Each feature is an expression over the OHLCV columns. Identical
+    subexpressions (the close diff behind every RSI, the rolling mean and
+    std behind Bollinger bands, band width and volatility, the EMAs behind
+    MACD...) are one node, evaluated once per call in dependency order.
+    Every node is one vectorized pandas/numpy operation over whole columns.
+
+    Args:
+        columns: Feature names, in output order
+        bar_minutes: Bar length, used by duration features such as
+            ``price_change_4h``
+    """
+
+    def __init__(self, columns: Sequence[str], bar_minutes: float = 60.0):
+        self.columns = list(columns)
+        self.outputs = [feature_node(name, bar_minutes) for name in self.columns]
+        self.nodes = self._order(self.outputs)
+        # Position of the last node reading each node; later it can be freed
+        self._last_use = {node: k for k, consumer in enumerate(self.nodes)
+                          for node in consumer[1:] if _is_node(node)}
+
+    @classmethod
+    def from_feature_set(cls, name: str, timeframe: str = "1h") -> 'FeatureGraph':
+        feature_sets = load_feature_sets()
+        if name not in feature_sets:
+            raise ValueError(f"Unknown feature set {name!r}; known: {sorted(feature_sets)}")
+        return cls(feature_sets[name], timeframe_minutes(timeframe))
+
+    @staticmethod
+    def _order(outputs: List[Node]) -> List[Node]:
+        """Distinct nodes, each after its inputs"""
+        order: List[Node] = []
+        seen = set()
+
+        def visit(node: Node) -> None:
+            if node in seen:
+                return
+            for arg in node[1:]:
+                if _is_node(arg):
+                    visit(arg)
+            seen.add(node)
+            order.append(node)
+
+        for node in outputs:
+            visit(node)
+        return order
+
+    def evaluate(self, data: pd.DataFrame) -> np.ndarray:
+        """rows x columns feature matrix of ``data``"""
+        matrix = np.empty((len(data), len(self.outputs)))
+        columns: Dict[Node, List[int]] = {}
+        for k, node in enumerate(self.outputs):
+            columns.setdefault(node, []).append(k)
+
+        values: Dict[Node, pd.Series] = {}
+        for k, node in enumerate(self.nodes):
+            args = [values[arg] if _is_node(arg) else arg for arg in node[1:]]
+            values[node] = _OPS[node[0]](data, *args)
+            for column in columns.get(node, ()):
+                matrix[:, column] = values[node].to_numpy(dtype=float)
+            # Drop intermediates nothing later reads, so memory tracks the live set
+            for arg in node[1:]:
+                if _is_node(arg) and self._last_use[arg] == k:
+                    values.pop(arg, None)
+        return np.nan_to_num(matrix, copy=False)
@@ -0,0 +1,361 @@
+import fcntl
+import json
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from sklearn.preprocessing import MinMaxScaler
+
+logger = logging.getLogger(__name__)
+
+# Columns of MLSignalService.compute_features, in order
+FEATURE_COLUMNS = ('returns', 'volatility', 'rsi', 'macd', 'bollinger', 'volume_change')
+DEFAULT_FEATURE_SET = 'default'
+# Bump when a feature definition changes; stored sets of another version are rebuilt
+FEATURE_SET_VERSION = 1
+
+# Longest rolling window over closes (volatility, Bollinger); RSI needs fewer
+_WINDOW = 20
+_RSI_PERIOD = 14
+_EMA_SPANS = (12, 26)
+_MACD = FEATURE_COLUMNS.index('macd')
+# Leading rows of a set whose rolling windows and EMAs are still filling up
+WARMUP_BARS = max(_WINDOW, *_EMA_SPANS)
+
+
+class FeatureGapError(ValueError):
+    """New bars do not start right after the newest stored bar"""
+
+
+@dataclass
+class FeatureState:
+    """What extend_features needs from earlier bars to compute the next ones"""
+    closes: List[float] = field(default_factory=list)
+    volume: Optional[float] = None
+    ema_num: List[float] = field(default_factory=list)
+    ema_den: List[float] = field(default_factory=list)
+    # Running count, mean and sum of squared deviations of all closes
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    @property
+    def close_std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+
+def _ema(prices: np.ndarray, span: int, num: Optional[float], den: Optional[float]) -> Tuple[np.ndarray, float, float]:
+    """
+    Adjusted EWM mean (pandas ``ewm(span).mean()``) continued from earlier bars
+
+    The adjusted mean is num/den with num = sum(beta**k * x[t-k]) and
+    den = sum(beta**k), so continuing it only needs the previous num and den.
+    """
+    beta = 1.0 - 2.0 / (span + 1.0)
+    local = pd.Series(prices).ewm(span=span).mean().to_numpy()
+    decay = np.power(beta, np.arange(1, len(prices) + 1))
+    local_den = (1.0 - decay) / (1.0 - beta)
+    if num is None:
+        return local, float(local[-1] * local_den[-1]), float(local_den[-1])
+    total_num = decay * num + local * local_den
+    total_den = decay * den + local_den
+    return total_num / total_den, float(total_num[-1]), float(total_den[-1])
+
+
+def extend_features(
+    close: np.ndarray,
+    volume: np.ndarray,
+    state: Optional[FeatureState] = None,
+) -> Tuple[np.ndarray, FeatureState]:
+    """
+    Raw feature rows for new bars, continuing from ``state``
+
+    Rolling features are recomputed over the last ``_WINDOW`` stored closes
+    plus the new bars, EMAs continue from their running sums, and MACD is
+    left unnormalized (finish_features divides it by the std of all
+    closes). Cost is O(new bars).
+
+    Returns:
+        (rows x FEATURE_COLUMNS matrix, state after the last new bar)
+    """
+    state = state or FeatureState()
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    tail = len(state.closes)
+    prices = pd.Series(np.concatenate((state.closes, close)))
+
+    returns = prices.pct_change(1).fillna(0).to_numpy()[tail:]
+    volatility = prices.rolling(_WINDOW).std().fillna(0).to_numpy()[tail:]
+
+    delta = prices.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=_RSI_PERIOD).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=_RSI_PERIOD).mean()
+    rsi = (100 - 100 / (1 + gain / loss.replace(0, 0.001))).fillna(50).to_numpy()[tail:] / 100
+
+    emas, ema_num, ema_den = [], [], []
+    for k, span in enumerate(_EMA_SPANS):
+        ema, num, den = _ema(
+            close, span,
+            state.ema_num[k] if state.ema_num else None,
+            state.ema_den[k] if state.ema_den else None,
+        )
+        emas.append(ema)
+        ema_num.append(num)
+        ema_den.append(den)
+    macd = emas[0] - emas[1]
+
+    sma = prices.rolling(_WINDOW).mean()
+    std = prices.rolling(_WINDOW).std()
+    lower = sma - std * 2
+    bollinger = ((prices - lower) / ((sma + std * 2) - lower)).fillna(0.5).to_numpy()[tail:]
+
+    volumes = pd.Series(np.concatenate(([state.volume], volume)) if state.volume is not None else volume)
+    volume_change = volumes.pct_change(1).fillna(0).to_numpy()[len(volumes) - len(volume):]
+
+    matrix = np.nan_to_num(np.column_stack([returns, volatility, rsi, macd, bollinger, volume_change]))
+
+    # Chan et al. pairwise merge of the close mean/variance
+    count = state.count + len(close)
+    chunk_mean = float(close.mean())
+    chunk_m2 = float(((close - chunk_mean) ** 2).sum())
+    shift = chunk_mean - state.mean
+    new_state = FeatureState(
+        closes=prices.to_numpy()[-_WINDOW:].tolist(),
+        volume=float(volume[-1]),
+        ema_num=ema_num,
+        ema_den=ema_den,
+        count=count,
+        mean=state.mean + shift * len(close) / count,
+        m2=state.m2 + chunk_m2 + shift ** 2 * state.count * len(close) / count,
+    )
+    return matrix, new_state
+
+
+def finish_features(raw: np.ndarray, close_std: float) -> np.ndarray:
+    """Unscaled feature matrix from raw rows: MACD over the std of all closes"""
+    matrix = np.array(raw, dtype=float)
+    matrix[:, _MACD] /= close_std
+    return np.nan_to_num(matrix, copy=False)
+
+
+@dataclass
+class StoredFeatures:
+    """Memory-mapped feature columns of one (symbol, timeframe, feature set)"""
+    timestamps: np.ndarray
+    close: np.ndarray
+    raw: np.ndarray
+    state: FeatureState
+    scaler: 'MinMaxScaler'
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.timestamps.view('datetime64[ns]'))
+
+    def locate(self, index: pd.Index) -> np.ndarray:
+        """Stored row of every timestamp in ``index``"""
+        stamps = pd.DatetimeIndex(index).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        rows = np.searchsorted(self.timestamps, stamps)
+        found = rows < len(self.timestamps)
+        found[found] = self.timestamps[rows[found]] == stamps[found]
+        if not found.all():
+            raise KeyError(f"{int((~found).sum())} timestamps are not in the feature store")
+        return rows
+
+    def features(self, rows=slice(None)) -> np.ndarray:
+        """Unscaled features, as MLSignalService.compute_features returns them"""
+        return finish_features(self.raw[rows], self.state.close_std)
+
+    def scaled(self, rows=slice(None)) -> np.ndarray:
+        """
+        Features min-max scaled over the whole stored history
+
+        Scaling the MACD column cancels its normalization, so raw rows are
+        scaled directly.
+        """
+        return self.scaler.transform(np.asarray(self.raw[rows]))
+
+    def target(self, rows=slice(None)) -> np.ndarray:
+        """Next-bar direction of the selected rows (0 for the newest bar)"""
+        rows = np.asarray(range(len(self))[rows] if isinstance(rows, slice) else rows)
+        following = np.minimum(rows + 1, len(self) - 1)
+        return (self.close[following] > self.close[rows]).astype(int)
+
+
+class FeatureStore:
+    """
+    Append-only on-disk feature columns per (symbol, timeframe, feature set)
+
+    Each set is a directory of raw little-endian column files (timestamps,
+    closes, the rows x FEATURE_COLUMNS matrix) plus ``meta.json`` with the
+    row count, the FeatureState of the last bar and the running column
+    min/max of the scaler. New bars are appended to the files and the
+    metadata is replaced atomically afterwards, so a crashed append is
+    truncated away on the next one. Reads memory-map the files.
+
+    Appends to a set hold an exclusive lock on its ``.lock`` file, so API
+    threads and backtest worker processes can share one store directory.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _dir(self, symbol: str, timeframe: str, feature_set: str) -> Path:
+        parts = [re.sub(r'[^A-Za-z0-9_.-]', '_', part) for part in (symbol, timeframe, feature_set)]
+        return self.root.joinpath(*parts)
+
+    @contextmanager
+    def _locked(self, directory: Path) -> Iterator[None]:
+        """Exclusive lock of one set, across threads and processes"""
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / '.lock', 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def load(self, symbol: str, timeframe: str, feature_set: str = DEFAULT_FEATURE_SET) -> Optional[StoredFeatures]:
+        """Stored features, or None if the set is missing or outdated"""
+        from sklearn.preprocessing import MinMaxScaler
+
+        directory = self._dir(symbol, timeframe, feature_set)
+        try:
+            meta = json.loads((directory / 'meta.json').read_text())
+        except FileNotFoundError:
+            return None
+        if meta['version'] != FEATURE_SET_VERSION or meta['columns'] != list(FEATURE_COLUMNS):
+            logger.info(f"Feature set {feature_set} of {symbol} {timeframe} is outdated; rebuilding")
+            return None
+
+        rows = meta['rows']
+        scaler = MinMaxScaler().partial_fit(np.array([meta['data_min'], meta['data_max']]))
+        scaler.n_samples_seen_ = rows
+        return StoredFeatures(
+            timestamps=np.memmap(directory / 'timestamp.i8', dtype='<i8', mode='r', shape=(rows,)),
+            close=np.memmap(directory / 'close.f8', dtype='<f8', mode='r', shape=(rows,)),
+            raw=np.memmap(directory / 'features.f8', dtype='<f8', mode='r', shape=(rows, len(FEATURE_COLUMNS))),
+            state=FeatureState(**meta['state']),
+            scaler=scaler,
+        )
+
+    def update(
+        self,
+        symbol: str,
+        timeframe: str,
+        data: pd.DataFrame,
+        feature_set: str = DEFAULT_FEATURE_SET,
+    ) -> StoredFeatures:
+        """
+        Append feature rows for the bars of ``data`` newer than the store
+
+        ``data`` must be sorted by time and only needs to contain the new
+        bars; older rows are skipped with a binary search, so keeping a live
+        set current costs O(new bars). The first new bar must be one
+        ``timeframe`` after the newest stored bar, since the stored rolling
+        windows and EMAs would otherwise run across the missing bars.
+
+        Raises:
+            FeatureGapError: If bars between the set and ``data`` are missing
+            ValueError: If the set is empty and ``data`` has no bars
+        """
+        directory = self._dir(symbol, timeframe, feature_set)
+        with self._locked(directory):
+            stored = self._append(directory, symbol, timeframe, data, feature_set)
+        if stored is None:
+            raise ValueError(f"No {timeframe} bars to store for {symbol}")
+        return stored
+
+    def _append(
+        self,
+        directory: Path,
+        symbol: str,
+        timeframe: str,
+        data: pd.DataFrame,
+        feature_set: str,
+    ) -> Optional[StoredFeatures]:
+        from sklearn.preprocessing import MinMaxScaler
+
+        stored = self.load(symbol, timeframe, feature_set)
+        stamps = pd.DatetimeIndex(pd.to_datetime(data.index)).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        start = 0
+        if stored is not None and len(stored):
+            start = int(np.searchsorted(stamps, stored.timestamps[-1], side='right'))
+        if start == len(stamps):
+            return stored
+        if stored is not None and len(stored) and stamps[start] - stored.timestamps[-1] != pd.Timedelta(timeframe).value:
+            raise FeatureGapError(
+                f"{symbol} {timeframe} bars resume at {pd.Timestamp(stamps[start])}, "
+                f"not one bar after {pd.Timestamp(stored.timestamps[-1])}"
+            )
+
+        close = data['close'].to_numpy(dtype=float)[start:]
+        volume = data['volume'].to_numpy(dtype=float)[start:]
+        raw, state = extend_features(close, volume, stored.state if stored is not None else None)
+
+        rows = len(stored) if stored is not None else 0
+        scaler = stored.scaler if stored is not None else MinMaxScaler()
+        scaler.partial_fit(raw)
+        for name, values, width in (
+            ('timestamp.i8', stamps[start:].astype('<i8'), 8),
+            ('close.f8', close.astype('<f8'), 8),
+            ('features.f8', raw.astype('<f8'), 8 * len(FEATURE_COLUMNS)),
+        ):
+            with open(directory / name, 'ab') as handle:
+                # Drop rows of an append that crashed before its metadata was written
+                handle.truncate(rows * width)
+                handle.write(np.ascontiguousarray(values).tobytes())
+
+        meta = {
+            'version': FEATURE_SET_VERSION,
+            'columns': list(FEATURE_COLUMNS),
+            'rows': rows + len(close),
+            'state': asdict(state),
+            'data_min': scaler.data_min_.tolist(),
+            'data_max': scaler.data_max_.tolist(),
+        }
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(meta, handle)
+        os.replace(tmp, directory / 'meta.json')
+        logger.debug(f"Appended {len(close)} feature rows for {symbol} {timeframe} ({feature_set})")
+        return self.load(symbol, timeframe, feature_set)
+
+    def lookup(
+        self,
+        symbol: str,
+        timeframe: str,
+        data: pd.DataFrame,
+        feature_set: str = DEFAULT_FEATURE_SET,
+    ) -> Optional[Tuple[StoredFeatures, np.ndarray]]:
+        """
+        Set after appending the new bars of ``data``, and the rows of all its bars
+
+        None when some bars of ``data`` predate the set, fall in a gap of
+        it, or follow a gap after its newest bar, so their features cannot
+        come from the stored history.
+        """
+        try:
+            stored = self.update(symbol, timeframe, data, feature_set)
+            return stored, stored.locate(data.index)
+        except (FeatureGapError, KeyError) as e:
+            logger.warning(f"{symbol} {timeframe}: {e}")
+            return None
+
+
+def default_feature_store() -> FeatureStore:
+    """Store rooted at FEATURE_STORE_DIR"""
+    return FeatureStore(settings.FEATURE_STORE_DIR)
@@ -0,0 +1,339 @@
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.core.config import load_config, settings
+from app.services.sweep_service import grid_parameters
+from app.services.window_dataset import WindowDataset
+
+logger = logging.getLogger(__name__)
+
+MODEL_PARAMETERS_CONFIG = 'configs/ai/model_parameters.yaml'
+TUNABLE_MODELS = ('momentum_classifier', 'trend_lstm')
+VALIDATION_SPLIT = 0.2
+
+# Set once per worker process by _init_worker
+_worker_state: Dict = {}
+
+
+def halving_schedule(n_trials: int, eta: int, min_epochs: int, max_epochs: int) -> List[Tuple[int, int]]:
+    """
+    (trials trained, cumulative epochs) per successive halving rung
+
+    Each rung keeps the best 1/eta of the previous one and trains it eta
+    times longer, until one trial is left or ``max_epochs`` is reached.
+    """
+    rungs = [(n_trials, min(min_epochs, max_epochs))]
+    while rungs[-1][0] > 1 and rungs[-1][1] < max_epochs:
+        n_active, epochs = rungs[-1]
+        rungs.append((max(n_active // eta, 1), min(epochs * eta, max_epochs)))
+    return rungs
+
+
+def build_model(model_name: str, params: Dict[str, Any], n_features: int):
+    """Compiled Keras model of ``model_name`` with hyperparameters ``params``"""
+    import tensorflow as tf
+    from tensorflow.keras.layers import Dense, Dropout, Input, LSTM
+
+    if model_name == 'momentum_classifier':
+        layers = [Input(shape=(n_features,))]
+        for units in params['layers']:
+            layers += [Dense(units, activation='relu'), Dropout(params['dropout'])]
+    elif model_name == 'trend_lstm':
+        layers = [Input(shape=(params['sequence_length'], n_features))]
+        units = params['lstm_units']
+        for k, size in enumerate(units):
+            layers += [LSTM(size, return_sequences=k < len(units) - 1), Dropout(params['dropout'])]
+    else:
+        raise ValueError(f"Unknown model {model_name!r}; tunable: {', '.join(TUNABLE_MODELS)}")
+
+    model = tf.keras.Sequential(layers + [Dense(1, activation='sigmoid')])
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=params.get('learning_rate', 0.001)),
+        loss='binary_crossentropy',
+        metrics=['accuracy'],
+    )
+    return model
+
+
+def _init_worker(data_dir: str, threads: int):
+    """Process pool initializer: cap math library threads, then map the data"""
+    from threadpoolctl import threadpool_limits
+
+    # Read by OpenMP/MKL and TensorFlow when they load, so set before importing them
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ[name] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    # Unpickling this initializer imported this module and NumPy already, so
+    # its BLAS has sized its pool; resize the pools of loaded libraries too
+    threadpool_limits(limits=threads)
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _worker_state.update(
+        X=np.load(os.path.join(data_dir, 'X.npy'), mmap_mode='r'),
+        y=np.load(os.path.join(data_dir, 'y.npy'), mmap_mode='r'),
+    )
+
+
+def _run_trial(task: Dict) -> Dict:
+    """Train one trial up to ``task['epochs']``, resuming from its checkpoint"""
+    import tensorflow as tf
+
+    started = time.perf_counter()
+    X, y = _worker_state['X'], _worker_state['y']
+    params = task['params']
+    if task['initial_epoch'] and os.path.exists(task['checkpoint']):
+        model = tf.keras.models.load_model(task['checkpoint'])
+    else:
+        model = build_model(task['model'], params, X.shape[1])
+
+    batch_size = params.get('batch_size', 32)
+    if task['model'] == 'trend_lstm':
+        windows = WindowDataset(X, y, params['sequence_length'], batch_size)
+        train, validation = windows.split(VALIDATION_SPLIT)
+        fit_args = {'x': train.to_tf_dataset(), 'validation_data': validation.to_tf_dataset()}
+    else:
+        cut = int(len(X) * (1.0 - VALIDATION_SPLIT))
+        fit_args = {
+            'x': np.asarray(X[:cut]), 'y': np.asarray(y[:cut]), 'batch_size': batch_size,
+            'validation_data': (np.asarray(X[cut:]), np.asarray(y[cut:])),
+        }
+
+    stopper = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=task['patience'])
+    history = model.fit(
+        **fit_args,
+        initial_epoch=task['initial_epoch'],
+        epochs=task['epochs'],
+        callbacks=[stopper],
+        verbose=0,
+    ).history
+    model.save(task['checkpoint'])
+    return {
+        'trial': task['trial'],
+        'val_loss': float(np.min(history['val_loss'])),
+        'val_accuracy': float(np.max(history['val_accuracy'])),
+        'epochs': task['initial_epoch'] + len(history['val_loss']),
+        'early_stopped': bool(stopper.stopped_epoch),
+        'threads': tf.config.threading.get_intra_op_parallelism_threads(),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+class HyperparameterTuner:
+    """
+    Successive halving search over model_parameters.yaml configs
+
+    Candidates are the configured settings of a model plus combinations of
+    its ``search_spaces`` values. Every candidate is trained for
+    ``min_epochs`` across a process pool, then the best 1/``eta`` by
+    validation loss continue from their checkpoints for ``eta`` times more
+    epochs, until one is left or ``max_epochs`` is reached. Within a rung,
+    Keras early stopping ends a trial whose validation loss stops
+    improving for ``patience`` epochs, and such trials are not promoted.
+
+    Each worker gets ``cpu_count // max_workers`` math threads, so the
+    pool never runs more threads than cores. The training data is written
+    once and memory-mapped by the workers.
+
+    The leaderboard is rewritten to ``<root>/<model>/<run>/leaderboard.json``
+    after every finished trial. Checkpoints of pruned trials are deleted;
+    the leader's stays under ``trials/``.
+
+    Args:
+        root: Directory of tuning runs
+        max_workers: Trials trained at once
+        eta: Fraction 1/eta of trials promoted per rung, and epoch multiplier
+        min_epochs: Epochs of the first rung
+        max_epochs: Epochs of the last rung
+        patience: Early stopping patience, in epochs
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        eta: int = 3,
+        min_epochs: int = 1,
+        max_epochs: int = 9,
+        patience: int = 2,
+    ):
+        self.root = Path(root or settings.MODEL_TUNING_DIR)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.eta = eta
+        self.min_epochs = min_epochs
+        self.max_epochs = max_epochs
+        self.patience = patience
+
+    def candidates(self, model_name: str, n_trials: Optional[int] = None, seed: Optional[int] = None) -> List[Dict]:
+        """Configured settings first, then up to ``n_trials - 1`` sampled search-space combinations"""
+        config = load_config(MODEL_PARAMETERS_CONFIG)
+        if model_name not in TUNABLE_MODELS or model_name not in config:
+            raise ValueError(f"Unknown model {model_name!r}; tunable: {', '.join(TUNABLE_MODELS)}")
+        base = dict(config[model_name])
+        space = config.get('search_spaces', {}).get(model_name, {})
+
+        seen = {json.dumps(base, sort_keys=True)}
+        candidates = [base]
+        for params in grid_parameters(space):
+            params = {**base, **params}
+            key = json.dumps(params, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(params)
+        if n_trials is not None and n_trials < len(candidates):
+            candidates = [base] + random.Random(seed).sample(candidates[1:], n_trials - 1)
+        return candidates
+
+    def tune(
+        self,
+        model_name: str,
+        X: np.ndarray,
+        y: np.ndarray,
+        n_trials: Optional[int] = None,
+        seed: Optional[int] = None,
+        run_name: Optional[str] = None,
+    ) -> Dict:
+        """
+        Search hyperparameters of ``model_name`` on scaled features ``X`` and targets ``y``
+
+        The last 20% of rows validate. The last row is dropped, as its
+        target is not known yet.
+
+        Returns:
+            ``run`` directory, ``best`` entry and the full ``leaderboard``,
+            best first
+        """
+        candidates = self.candidates(model_name, n_trials, seed)
+        run_name = run_name or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        run_dir = self.root / model_name / run_name
+        (run_dir / 'trials').mkdir(parents=True, exist_ok=True)
+        board = {
+            k: {'trial': k, 'params': params, 'rung': 0, 'epochs': 0, 'val_loss': None,
+                'val_accuracy': None, 'early_stopped': False, 'status': 'pending'}
+            for k, params in enumerate(candidates)
+        }
+        schedule = halving_schedule(len(candidates), self.eta, self.min_epochs, self.max_epochs)
+        threads = max((os.cpu_count() or 1) // self.max_workers, 1)
+        logger.info(
+            f"Tuning {model_name}: {len(candidates)} trials, rungs {schedule}, "
+            f"{self.max_workers} workers x {threads} threads"
+        )
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            np.save(os.path.join(data_dir, 'X.npy'), np.asarray(X[:-1], dtype=np.float32))
+            np.save(os.path.join(data_dir, 'y.npy'), np.asarray(y[:-1], dtype=np.float32))
+            # spawn: the API process may hold TensorFlow threads, unsafe to fork
+            with ProcessPoolExecutor(
+                max_workers=min(self.max_workers, len(candidates)),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(data_dir, threads),
+            ) as pool:
+                active = list(board)
+                for rung, (_, epochs) in enumerate(schedule):
+                    self._run_rung(pool, model_name, board, active, rung, epochs, run_dir)
+                    if rung + 1 == len(schedule):
+                        break
+                    active = self._promote(board, active, schedule[rung + 1][0], run_dir)
+
+        for entry in board.values():
+            if entry['status'] == 'running':
+                entry['status'] = 'completed'
+        leaderboard = self._ranked(board)
+        leaderboard[0]['status'] = 'best'
+        self._save(run_dir, model_name, leaderboard)
+        logger.info(f"Best {model_name} trial {leaderboard[0]['trial']}: val_loss {leaderboard[0]['val_loss']}")
+        return {'run': str(run_dir), 'best': leaderboard[0], 'leaderboard': leaderboard}
+
+    def _run_rung(
+        self,
+        pool: ProcessPoolExecutor,
+        model_name: str,
+        board: Dict[int, Dict],
+        active: List[int],
+        rung: int,
+        epochs: int,
+        run_dir: Path,
+    ) -> None:
+        futures = {
+            pool.submit(_run_trial, {
+                'trial': k,
+                'model': model_name,
+                'params': board[k]['params'],
+                'initial_epoch': board[k]['epochs'],
+                'epochs': epochs,
+                'patience': self.patience,
+                'checkpoint': str(run_dir / 'trials' / f'{k}.keras'),
+            }): k
+            for k in active
+        }
+        for future in as_completed(futures):
+            entry = board[futures[future]]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Trial {entry['trial']} failed: {e}")
+                entry.update(status='failed', error=str(e))
+                continue
+            previous = entry['val_loss']
+            entry.update(
+                rung=rung,
+                epochs=result['epochs'],
+                val_loss=result['val_loss'] if previous is None else min(previous, result['val_loss']),
+                val_accuracy=max(entry['val_accuracy'] or 0.0, result['val_accuracy']),
+                early_stopped=result['early_stopped'],
+                threads=result['threads'],
+                seconds=entry.get('seconds', 0.0) + result['seconds'],
+                status='running',
+            )
+            self._save(run_dir, model_name, self._ranked(board))
+
+    def _promote(self, board: Dict[int, Dict], active: List[int], keep: int, run_dir: Path) -> List[int]:
+        """Best ``keep`` trials that can still improve; the others are pruned"""
+        finished = [k for k in active if board[k]['status'] == 'running']
+        ranked = sorted(finished, key=lambda k: board[k]['val_loss'])
+        promoted = [k for k in ranked if not board[k]['early_stopped']][:keep]
+        for k in finished:
+            if k not in promoted:
+                board[k]['status'] = 'early_stopped' if board[k]['early_stopped'] else 'pruned'
+                if ranked and k != ranked[0]:
+                    (run_dir / 'trials' / f'{k}.keras').unlink(missing_ok=True)
+        return promoted
+
+    @staticmethod
+    def _ranked(board: Dict[int, Dict]) -> List[Dict]:
+        """Trials that got further first, then by validation loss"""
+        return sorted(
+            (dict(entry) for entry in board.values()),
+            key=lambda e: (e['status'] in ('failed', 'pending'), -e['rung'],
+                           e['val_loss'] if e['val_loss'] is not None else np.inf),
+        )
+
+    @staticmethod
+    def _save(run_dir: Path, model_name: str, leaderboard: List[Dict]) -> None:
+        payload = {
+            'model': model_name,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            'leaderboard': leaderboard,
+        }
+        fd, tmp = tempfile.mkstemp(dir=run_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(payload, handle, indent=2, default=str)
+        os.replace(tmp, run_dir / 'leaderboard.json')
+
+    def leaderboard(self, model_name: str, run_name: str) -> List[Dict]:
+        """Persisted leaderboard of a run, best first"""
+        path = self.root / model_name / run_name / 'leaderboard.json'
+        return json.loads(path.read_text())['leaderboard']
@@ -0,0 +1,248 @@
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.services.performance_metrics import bars_per_year, sharpe_ratio
+from app.services.vectorized_backtest import VectorizedBacktestResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BacktestCheckpoint:
+    """
+    Final state of a signal-strategy run, enough to continue it bar by bar
+
+    Fields are plain Python types so ``dataclasses.asdict`` round-trips
+    through JSON.
+    """
+    # Run configuration
+    initial_cash: float
+    commission: float
+    position_size: float
+    take_profit: Optional[float]
+    stop_loss: Optional[float]
+    # Broker and strategy state after the last bar
+    last_timestamp: int
+    n_bars: int
+    cash: float
+    units: float = 0.0
+    entry_price: float = 0.0
+    entry_cost: float = 0.0
+    entry_value: float = 0.0
+    # Order decided on the last bar, filled at the next bar's open
+    pending: Optional[str] = None
+    pending_size: float = 0.0
+    pending_value: float = 0.0
+    # Analyzer accumulators
+    equity: float = 0.0
+    peak_equity: float = 0.0
+    max_drawdown: float = 0.0
+    first_timestamp: int = 0
+    # Running mean and sum of squared deviations of the per-bar returns (n_bars of them)
+    return_mean: float = 0.0
+    return_m2: float = 0.0
+    trades_opened: int = 0
+    trades_won: int = 0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0
+    trade_returns: List[float] = field(default_factory=list)
+
+
+def checkpoint_from_result(
+    result: VectorizedBacktestResult,
+    close: np.ndarray,
+    signals: List[float],
+    initial_cash: float,
+    commission: float,
+    position_size: float = 0.1,
+    take_profit: Optional[float] = None,
+    stop_loss: Optional[float] = None,
+) -> BacktestCheckpoint:
+    """
+    Checkpoint the end state of a vectorized run
+
+    Also reconstructs the order the strategy decides on the last bar, which
+    the vectorized engine drops because it has no next bar to fill at.
+    """
+    n = len(result.equity)
+    equity = result.equity
+    returns = equity / np.concatenate(([initial_cash], equity[:-1])) - 1.0
+    peak = np.maximum.accumulate(equity)
+    stamps = result.index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+    n_closed = len(result.exit_bars)
+    closed_entries = result.entry_bars[:n_closed]
+    won = result.pnlcomm >= 0.0
+
+    checkpoint = BacktestCheckpoint(
+        initial_cash=float(initial_cash),
+        commission=float(commission),
+        position_size=float(position_size),
+        take_profit=take_profit,
+        stop_loss=stop_loss,
+        last_timestamp=int(stamps[-1]),
+        n_bars=n,
+        cash=float(result.cash[-1]),
+        equity=float(equity[-1]),
+        peak_equity=float(peak[-1]),
+        max_drawdown=float(np.max(100.0 * (peak - equity) / peak)),
+        first_timestamp=int(stamps[0]),
+        return_mean=float(returns.mean()),
+        return_m2=float(((returns - returns.mean()) ** 2).sum()),
+        trades_opened=len(result.entry_bars),
+        trades_won=int(won.sum()),
+        gross_profit=float(result.pnlcomm[won].sum()),
+        gross_loss=abs(float(result.pnlcomm[~won].sum())),
+        trade_returns=(result.pnlcomm / result.cash[closed_entries - 1]).tolist(),
+    )
+
+    if len(result.entry_bars) > n_closed:
+        checkpoint.units = float(result.sizes[-1])
+        checkpoint.entry_price = float(result.entry_prices[-1])
+        checkpoint.entry_cost = checkpoint.units * checkpoint.entry_price * (1.0 + commission)
+        checkpoint.entry_value = float(result.cash[result.entry_bars[-1] - 1])
+
+    # Bars past the last signal take no action, so only a signal on the
+    # final bar can leave an order pending
+    if len(signals) >= n:
+        _decide(checkpoint, float(close[-1]), float(np.ravel(signals[n - 1])[0]))
+    return checkpoint
+
+
+def _decide(state: BacktestCheckpoint, close: float, signal: float) -> None:
+    """BacktestStrategy.next() at a bar's close"""
+    if not state.units:
+        if signal > 0.5:
+            state.pending = 'buy'
+            state.pending_size = state.cash * state.position_size / close
+            # Flat, so cash is the whole account value
+            state.pending_value = state.cash
+    else:
+        hit_tp = state.take_profit and close >= state.entry_price * (1 + state.take_profit)
+        hit_sl = state.stop_loss and close <= state.entry_price * (1 - state.stop_loss)
+        if signal < 0.5 or hit_tp or hit_sl:
+            state.pending = 'sell'
+
+
+def _fill(state: BacktestCheckpoint, price: float) -> None:
+    """Execute the pending order at a bar's open"""
+    if state.pending == 'buy':
+        state.units = state.pending_size
+        state.entry_price = price
+        state.entry_cost = state.units * price * (1.0 + state.commission)
+        state.entry_value = state.pending_value
+        state.cash -= state.entry_cost
+        state.trades_opened += 1
+    elif state.pending == 'sell':
+        proceeds = state.units * price * (1.0 - state.commission)
+        pnlcomm = proceeds - state.entry_cost
+        state.cash += proceeds
+        if pnlcomm >= 0.0:
+            state.trades_won += 1
+            state.gross_profit += pnlcomm
+        else:
+            state.gross_loss += -pnlcomm
+        state.trade_returns.append(pnlcomm / state.entry_value)
+        state.units = state.entry_price = state.entry_cost = state.entry_value = 0.0
+    state.pending = None
+
+
+def extend_checkpoint(
+    checkpoint: BacktestCheckpoint,
+    data: pd.DataFrame,
+    signals: List[float],
+) -> Tuple[BacktestCheckpoint, np.ndarray]:
+    """
+    Advance a checkpoint over newly appended bars
+
+    Work is proportional to ``len(data)``; history before the checkpoint is
+    never revisited. ``signals`` are aligned with the rows of ``data``.
+
+    Args:
+        checkpoint: State after the last processed bar (modified in place)
+        data: OHLCV rows strictly after the checkpoint's last bar
+        signals: ML signals for those rows
+
+    Returns:
+        (checkpoint, equity of every new bar)
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(data.index))
+    stamps = index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    if len(stamps) and stamps[0] <= checkpoint.last_timestamp:
+        raise ValueError("New bars must start after the checkpoint's last bar")
+
+    opens = data['open'].to_numpy(dtype=float)
+    closes = data['close'].to_numpy(dtype=float)
+    equity = np.empty(len(data))
+    state = checkpoint
+
+    for i in range(len(data)):
+        previous = state.equity
+        if state.pending is not None:
+            _fill(state, opens[i])
+        if i < len(signals):
+            _decide(state, closes[i], float(np.ravel(signals[i])[0]))
+
+        state.equity = state.cash + state.units * closes[i]
+        equity[i] = state.equity
+        # Welford update of the per-bar return moments
+        change = state.equity / previous - 1.0
+        delta = change - state.return_mean
+        state.return_mean += delta / (state.n_bars + i + 1)
+        state.return_m2 += delta * (change - state.return_mean)
+        state.peak_equity = max(state.peak_equity, state.equity)
+        state.max_drawdown = max(
+            state.max_drawdown, 100.0 * (state.peak_equity - state.equity) / state.peak_equity
+        )
+
+    if len(stamps):
+        state.last_timestamp = int(stamps[-1])
+        state.n_bars += len(stamps)
+    return state, equity
+
+
+def checkpoint_metrics(checkpoint: BacktestCheckpoint) -> Dict:
+    """
+    Headline metrics with the same keys as BacktestService._extract_metrics
+
+    Sharpe comes from the running moments of the per-bar returns. The other
+    risk metrics (Sortino, Calmar, VaR, ...) need the whole equity curve,
+    which a checkpoint does not keep, so they are omitted.
+    """
+    periods = bars_per_year(checkpoint.n_bars, checkpoint.first_timestamp, checkpoint.last_timestamp)
+    stddev = np.sqrt(checkpoint.return_m2 / checkpoint.n_bars)
+
+    return {
+        'final_value': checkpoint.equity,
+        'total_return': (checkpoint.equity - checkpoint.initial_cash) / checkpoint.initial_cash,
+        'sharpe_ratio': sharpe_ratio(checkpoint.return_mean, stddev, periods),
+        'max_drawdown': checkpoint.max_drawdown,
+        'total_trades': checkpoint.trades_opened,
+        'win_rate': checkpoint.trades_won / max(checkpoint.trades_opened, 1),
+        'profit_factor': checkpoint.gross_profit / max(checkpoint.gross_loss, 0.001),
+    }
+
+
+def save_checkpoint(checkpoint: BacktestCheckpoint, path: str) -> None:
+    """Write a checkpoint as JSON, atomically replacing any previous one"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(asdict(checkpoint), f)
+        os.replace(tmp, path)
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+
+def load_checkpoint(path: str) -> BacktestCheckpoint:
+    """Read a checkpoint written by save_checkpoint"""
+    with open(path) as f:
+        return BacktestCheckpoint(**json.load(f))
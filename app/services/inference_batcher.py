@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+import logging
+
+import numpy as np
+
+from app.services.prometheus_service import (
+    inference_batch_size,
+    inference_latency,
+    inference_requests,
+)
+
+logger = logging.getLogger(__name__)
+
+# Recent requests kept for the in-process latency percentiles
+_STATS_WINDOW = 10000
+
+
+class BatcherClosedError(RuntimeError):
+    """The batcher was closed before the request was queued"""
+
+
+@dataclass
+class _Request:
+    sample: np.ndarray
+    future: Future
+    submitted: float
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-sample predictions into batched calls
+
+    The first request of a batch waits at most ``max_wait_ms`` for others
+    to join, up to ``max_batch_size``. The samples are then stacked and
+    ``predict_fn`` runs once on the batch, on the batcher's own thread.
+    Row ``k`` of the output resolves request ``k``'s future; an exception
+    fails every request of the batch. Samples of a different shape than
+    the batch's first go to the next batch.
+
+    Args:
+        predict_fn: Maps a ``(batch, *sample_shape)`` array to one output
+            row per sample (e.g. ``model.predict``)
+        name: Label of the Prometheus metrics
+        max_batch_size: Most samples per call
+        max_wait_ms: Longest time a request waits for company
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], Any],
+        name: str = "model",
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        self.predict_fn = predict_fn
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Deque[_Request] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._latencies: Deque[float] = deque(maxlen=_STATS_WINDOW)
+        self._batch_sizes: Deque[int] = deque(maxlen=_STATS_WINDOW)
+        self.requests = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, sample: np.ndarray) -> Future:
+        """Queue one sample; the future resolves to its output row"""
+        request = _Request(np.asarray(sample), Future(), time.perf_counter())
+        with self._condition:
+            if self._closed:
+                raise BatcherClosedError(f"Batcher {self.name} is closed")
+            self._queue.append(request)
+            self._condition.notify()
+        return request.future
+
+    def predict(self, sample: np.ndarray, timeout: Optional[float] = None) -> Any:
+        """Blocking submit"""
+        return self.submit(sample).result(timeout)
+
+    def close(self) -> None:
+        """Finish queued requests, then stop the batching thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def stats(self) -> Dict[str, float]:
+        """Batch size and request latency (queueing plus predict) over recent requests"""
+        with self._condition:
+            latencies = np.array(self._latencies)
+            sizes = np.array(self._batch_sizes)
+        stats = {'requests': self.requests, 'batches': self.batches}
+        if len(latencies):
+            stats.update({
+                'mean_batch_size': float(sizes.mean()),
+                'max_batch_size': int(sizes.max()),
+                'latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+                'latency_p95_ms': float(np.percentile(latencies, 95) * 1000),
+                'latency_p99_ms': float(np.percentile(latencies, 99) * 1000),
+            })
+        return stats
+
+    def _next_batch(self) -> List[_Request]:
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+            if not self._queue:
+                return []
+            deadline = self._queue[0].submitted + self.max_wait
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            shape = self._queue[0].sample.shape
+            batch, rest = [], deque()
+            while self._queue and len(batch) < self.max_batch_size:
+                request = self._queue.popleft()
+                (batch if request.sample.shape == shape else rest).append(request)
+            self._queue.extendleft(reversed(rest))
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                outputs = self.predict_fn(np.stack([request.sample for request in batch]))
+            except Exception as exc:
+                logger.error(f"Batched predict of {self.name} failed: {exc}")
+                for request in batch:
+                    request.future.set_exception(exc)
+                continue
+
+            done = time.perf_counter()
+            for request, output in zip(batch, outputs):
+                request.future.set_result(output)
+            latencies = [done - request.submitted for request in batch]
+            with self._condition:
+                self._latencies.extend(latencies)
+                self._batch_sizes.append(len(batch))
+                self.requests += len(batch)
+                self.batches += 1
+            inference_batch_size.labels(model=self.name).observe(len(batch))
+            inference_requests.labels(model=self.name).inc(len(batch))
+            for latency in latencies:
+                inference_latency.labels(model=self.name).observe(latency)
+
+
+class InferenceServer:
+    """One MicroBatcher per model, created on first use"""
+
+    def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._lock = threading.Lock()
+
+    def batcher(self, key: str, predict_fn: Callable[[np.ndarray], Any]) -> MicroBatcher:
+        """Batcher of model ``key``; ``predict_fn`` is only used to create it"""
+        with self._lock:
+            if key not in self._batchers:
+                self._batchers[key] = MicroBatcher(predict_fn, key, self.max_batch_size, self.max_wait_ms)
+            return self._batchers[key]
+
+    def submit(self, key: str, predict_fn: Callable[[np.ndarray], Any], sample: np.ndarray) -> Future:
+        while True:
+            try:
+                return self.batcher(key, predict_fn).submit(sample)
+            except BatcherClosedError:
+                # Discarded between lookup and submit; the next lookup creates a new one
+                continue
+
+    def discard(self, key: str) -> None:
+        """Close the batcher of a model that was unloaded or replaced"""
+        with self._lock:
+            batcher = self._batchers.pop(key, None)
+        if batcher is not None:
+            batcher.close()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            batchers = dict(self._batchers)
+        return {key: batcher.stats() for key, batcher in batchers.items()}
+
+    def close(self) -> None:
+        with self._lock:
+            batchers, self._batchers = self._batchers, {}
+        for batcher in batchers.values():
+            batcher.close()
+
+
+_default_server: Optional[InferenceServer] = None
+_default_lock = threading.Lock()
+
+
+def default_inference_server() -> InferenceServer:
+    """Process-wide inference server"""
+    global _default_server
+    with _default_lock:
+        if _default_server is None:
+            _default_server = InferenceServer()
+        return _default_server
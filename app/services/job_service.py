@@ -1,8 +1,511 @@
-from typing import Final
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, Final, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.database import SessionLocal
+from app.db.models import BacktestJob
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_RESULT: Final = "job completed"
 
+# Worker-process globals set by _init_worker and _run_job
+_progress_board: Optional[Any] = None
+_current_job: Optional[str] = None
+
 async def run_scheduled_job(job_type: str) -> str:
     """Run a scheduled task and return its status message."""
     job = job_type.strip() or "unknown"
-    return f"{job} {DEFAULT_RESULT}"
\ No newline at end of file
+    return f"{job} {DEFAULT_RESULT}"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+TERMINAL_STATUSES: Final = frozenset(
+    {JobStatus.COMPLETED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value}
+)
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when too many jobs are already waiting."""
+
+
+def run_backtest_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch data, generate ML signals and backtest inside a worker process."""
+    # Heavy services (TensorFlow, Backtrader) load in the worker only
+    from app.schemas.backtest import BacktestRequest, BacktestResponse
+    from app.services.backtest_cache import default_backtest_cache
+    from app.services.backtest_progress import ProgressTracker
+    from app.services.backtest_service import BacktestService
+    from app.services.cost_model import CostModel, FeeTier
+    from app.services.data_service import DataService
+    from app.services.feature_store import default_feature_store
+    from app.services.ml_signal_service import MLSignalService
+    from app.services.model_registry import default_model_registry
+
+    request = BacktestRequest(**payload)
+    data = asyncio.run(DataService().get_historical_data(
+        request.symbol,
+        request.start_date,
+        request.end_date,
+        request.timeframe,
+    ))
+    if request.signal_model is not None:
+        # Served from ml_signals; only bars this version has not predicted yet run the model
+        signals = default_model_registry().signals(
+            request.signal_model, data, request.signal_model_version, request.symbol,
+        )['ensemble'].tolist()
+    else:
+        ml_service = MLSignalService(feature_store=default_feature_store())
+        signals = ml_service.generate_signals(data, request.symbol, request.timeframe)
+
+    cost_model = None
+    if request.costs is not None:
+        costs = request.costs
+        cost_model = CostModel(
+            maker_fee=costs.maker_fee,
+            taker_fee=costs.taker_fee,
+            tiers=tuple(FeeTier(t.min_notional, t.maker, t.taker) for t in costs.tiers),
+            spread_bps=costs.spread_bps,
+            impact_coefficient=costs.impact_coefficient,
+            volatility_window=costs.volatility_window,
+            tier_window=timedelta(days=costs.tier_window_days),
+        )
+
+    db = SessionLocal()
+    try:
+        service = BacktestService(db, cache=default_backtest_cache())
+        metrics = service.run_backtest(
+            request.symbol,
+            request.start_date,
+            request.end_date,
+            data,
+            signals,
+            request.initial_capital,
+            engine=request.engine,
+            monte_carlo=request.monte_carlo_simulations if request.monte_carlo else 0,
+            progress=ProgressTracker(len(data), report_progress),
+            cost_model=cost_model,
+        )
+        metrics["initial_capital"] = request.initial_capital
+        _save_backtest_result(db, request.symbol, metrics, service.run_columns, service.run_key)
+    finally:
+        db.close()
+
+    return BacktestResponse(**metrics).model_dump(mode="json")
+
+
+def _save_backtest_result(
+    db: Session,
+    symbol: str,
+    metrics: Dict[str, Any],
+    run_columns: Optional[Dict[str, Any]] = None,
+    run_key: Optional[str] = None,
+) -> None:
+    from app.db.models import BacktestResult
+    from app.services.backtest_artifacts import artifact_path, save_run_columns
+
+    path = None
+    if run_columns is not None:
+        # Identical runs (cache hits included) share one file named by their cache key
+        path = artifact_path(run_key or str(uuid.uuid4()))
+        if run_key is None or not os.path.exists(path):
+            save_run_columns(path, run_columns)
+
+    db.add(BacktestResult(
+        symbol=symbol,
+        strategy_name="ML-Enhanced",
+        start_date=metrics["start_date"],
+        end_date=metrics["end_date"],
+        initial_capital=metrics.get("initial_capital", 10000),
+        final_value=metrics["final_value"],
+        total_return=metrics["total_return"],
+        sharpe_ratio=metrics["sharpe_ratio"],
+        sortino_ratio=metrics.get("sortino_ratio"),
+        max_drawdown=metrics["max_drawdown"],
+        total_trades=metrics["total_trades"],
+        win_rate=metrics["win_rate"],
+        profit_factor=metrics["profit_factor"],
+        artifact_path=path,
+    ))
+    db.commit()
+
+
+def report_progress(snapshot: Dict[str, Any]) -> None:
+    """Publish the running job's latest progress, replacing the previous report."""
+    if _progress_board is not None and _current_job is not None:
+        _progress_board[_current_job] = snapshot
+
+
+def _init_worker(progress_board: Any) -> None:
+    """Process pool initializer: lower priority and attach the progress board."""
+    global _progress_board
+    _progress_board = progress_board
+    # Let API workers win CPU contention
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def _run_job(
+    handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+    job_id: str,
+    payload: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Run a handler with report_progress bound to ``job_id``."""
+    global _current_job
+    _current_job = job_id
+    try:
+        return handler(payload)
+    finally:
+        _current_job = None
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "backtest": run_backtest_job,
+}
+
+
+class BacktestJobQueue:
+    """Persistent job queue backed by the ``backtest_jobs`` table.
+
+    Jobs are stored as ``queued`` rows; a dispatcher task claims at most
+    ``max_concurrency`` of them at a time and runs them in a process pool, so
+    the event loop never executes Cerebro, TensorFlow or feature prep.
+    Claimed rows carry the claiming queue's ``worker_id`` and a heartbeat it
+    refreshes every ``heartbeat_interval`` seconds. Any queue re-queues
+    ``running`` rows whose heartbeat is older than ``stale_after`` seconds,
+    so jobs of a crashed process are recovered while those still running
+    in another worker or replica are left alone.
+    Workers publish throttled progress into a manager-backed dict that
+    only ever holds the latest report per job.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        max_concurrency: Optional[int] = None,
+        max_queued: int = 100,
+        poll_interval: float = 1.0,
+        handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 60.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_concurrency = max_concurrency or max((os.cpu_count() or 2) // 2, 1)
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.handlers = handlers or JOB_HANDLERS
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        # Unique across processes and hosts sharing the table
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # SQLite shares one connection across threads; serialize access to it
+        self._db_lock = threading.Lock()
+        # spawn: never fork an API process holding TensorFlow/event-loop threads
+        self._context = multiprocessing.get_context("spawn")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._manager: Optional[Any] = None
+        self._progress: Optional[Any] = None
+
+    def submit(self, job_type: str, payload: Dict[str, Any]) -> str:
+        """Persist a new queued job and return its id."""
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job_id = str(uuid.uuid4())
+        with self._db_lock, self.session_factory() as db:
+            queued = db.query(BacktestJob).filter(BacktestJob.status == JobStatus.QUEUED.value).count()
+            if queued >= self.max_queued:
+                raise JobQueueFullError(f"{queued} jobs already queued")
+            db.add(BacktestJob(
+                id=job_id,
+                job_type=job_type,
+                status=JobStatus.QUEUED.value,
+                payload=json.dumps(payload, default=str),
+                created_at=datetime.now(timezone.utc),
+            ))
+            db.commit()
+
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status view of a job, or None if unknown."""
+        with self._db_lock, self.session_factory() as db:
+            job = db.get(BacktestJob, job_id)
+            if job is None:
+                return None
+            return {
+                "job_id": job.id,
+                "job_type": job.job_type,
+                "status": job.status,
+                "error": job.error,
+                "created_at": job.created_at,
+                "started_at": job.started_at,
+                "finished_at": job.finished_at,
+            }
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Stored result of a completed job."""
+        with self._db_lock, self.session_factory() as db:
+            job = db.get(BacktestJob, job_id)
+            if job is None or job.result is None:
+                return None
+            return json.loads(job.result)
+
+    def progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Latest progress report of a running job, if any."""
+        if self._progress is None:
+            return None
+        return self._progress.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet."""
+        with self._db_lock, self.session_factory() as db:
+            updated = (
+                db.query(BacktestJob)
+                .filter(BacktestJob.id == job_id, BacktestJob.status == JobStatus.QUEUED.value)
+                .update({
+                    BacktestJob.status: JobStatus.CANCELLED.value,
+                    BacktestJob.finished_at: datetime.now(timezone.utc),
+                })
+            )
+            db.commit()
+        return updated == 1
+
+    async def watch(self, job_id: str, interval: float = 0.5) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the latest progress every ``interval`` seconds until the job ends.
+
+        Reports published in between are conflated into the newest one, so
+        a slow consumer only ever falls behind on intermediate updates.
+        """
+        last = None
+        while True:
+            job = await asyncio.to_thread(self.get, job_id)
+            if job is None:
+                yield {"job_id": job_id, "status": None, "error": "Job not found"}
+                return
+            if job["status"] in TERMINAL_STATUSES:
+                final = {"job_id": job_id, "status": job["status"], "error": job["error"]}
+                if job["status"] == JobStatus.COMPLETED.value:
+                    final["progress"] = 100.0
+                yield final
+                return
+
+            report = await asyncio.to_thread(self.progress, job_id)
+            if report is not None and report != last:
+                last = report
+                yield {"job_id": job_id, "status": job["status"], **report}
+            await asyncio.sleep(interval)
+
+    async def start(self) -> None:
+        """Recover orphaned jobs and start dispatching."""
+        requeued = await asyncio.to_thread(self._requeue_orphans)
+        if requeued:
+            logger.info("Re-queued %d backtest jobs whose worker stopped heartbeating", requeued)
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._manager = self._context.Manager()
+        self._progress = self._manager.dict()
+        self._pool = self._new_pool()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    @property
+    def running(self) -> bool:
+        """Whether start succeeded and the dispatcher is still alive."""
+        return self._dispatcher is not None and not self._dispatcher.done()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_concurrency,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._progress,),
+        )
+
+    def _replace_broken_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Swap in a fresh pool after a worker died; the jobs of every broken pool fail once."""
+        if self._pool is not pool:
+            return
+        logger.warning("A backtest worker process died; starting a new process pool")
+        pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+
+    async def stop(self) -> None:
+        """Stop dispatching; unfinished jobs are re-queued once their heartbeat is stale."""
+        for task in (self._heartbeat, self._dispatcher):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        for task in list(self._running.values()):
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+        self._dispatcher = self._heartbeat = self._pool = self._loop = self._wakeup = None
+        self._manager = self._progress = None
+        self._running.clear()
+
+    async def _dispatch(self) -> None:
+        while True:
+            free = self.max_concurrency - len(self._running)
+            if free > 0:
+                for job_id, job_type, payload in await asyncio.to_thread(self._claim, free):
+                    pool = self._pool
+                    try:
+                        submitted = pool.submit(_run_job, self.handlers[job_type], job_id, payload)
+                    except BrokenProcessPool:
+                        self._replace_broken_pool(pool)
+                        pool = self._pool
+                        submitted = pool.submit(_run_job, self.handlers[job_type], job_id, payload)
+                    future = asyncio.wrap_future(submitted)
+                    self._running[job_id] = asyncio.create_task(self._finish(job_id, future, pool))
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _beat(self) -> None:
+        """Refresh the heartbeat of this queue's jobs and recover those of dead queues."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.to_thread(self._touch)
+                requeued = await asyncio.to_thread(self._requeue_orphans)
+            except Exception as exc:
+                logger.error("Backtest job heartbeat failed: %s", exc)
+                continue
+            if requeued:
+                logger.info("Re-queued %d backtest jobs whose worker stopped heartbeating", requeued)
+                self._wakeup.set()
+
+    async def _finish(self, job_id: str, future: asyncio.Future, pool: ProcessPoolExecutor) -> None:
+        try:
+            result = await future
+            await asyncio.to_thread(self._record, job_id, JobStatus.COMPLETED, json.dumps(result, default=str), None)
+        except asyncio.CancelledError:
+            raise
+        except BrokenProcessPool:
+            # Not re-queued: the job may be what killed the worker
+            logger.error("Backtest job %s lost its worker process", job_id)
+            self._replace_broken_pool(pool)
+            await asyncio.to_thread(
+                self._record, job_id, JobStatus.FAILED, None, "Backtest worker process died",
+            )
+        except Exception as exc:
+            logger.error("Backtest job %s failed: %s", job_id, exc)
+            await asyncio.to_thread(self._record, job_id, JobStatus.FAILED, None, str(exc))
+        finally:
+            self._running.pop(job_id, None)
+            if self._progress is not None:
+                try:
+                    self._progress.pop(job_id, None)
+                except Exception:
+                    pass
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def _claim(self, limit: int) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Atomically move up to ``limit`` queued jobs to running."""
+        claimed = []
+        with self._db_lock, self.session_factory() as db:
+            candidates = (
+                db.query(BacktestJob)
+                .filter(BacktestJob.status == JobStatus.QUEUED.value)
+                .order_by(BacktestJob.created_at)
+                .limit(limit)
+                .all()
+            )
+            for job in candidates:
+                # Conditional update: a concurrent cancel wins over the claim
+                updated = (
+                    db.query(BacktestJob)
+                    .filter(BacktestJob.id == job.id, BacktestJob.status == JobStatus.QUEUED.value)
+                    .update({
+                        BacktestJob.status: JobStatus.RUNNING.value,
+                        BacktestJob.started_at: datetime.now(timezone.utc),
+                        BacktestJob.worker_id: self.worker_id,
+                        BacktestJob.heartbeat_at: datetime.now(timezone.utc),
+                    })
+                )
+                if updated:
+                    claimed.append((job.id, job.job_type, json.loads(job.payload)))
+            db.commit()
+        return claimed
+
+    def _record(self, job_id: str, status: JobStatus, result: Optional[str], error: Optional[str]) -> None:
+        with self._db_lock, self.session_factory() as db:
+            db.query(BacktestJob).filter(BacktestJob.id == job_id).update({
+                BacktestJob.status: status.value,
+                BacktestJob.result: result,
+                BacktestJob.error: error,
+                BacktestJob.finished_at: datetime.now(timezone.utc),
+            })
+            db.commit()
+
+    def _touch(self) -> None:
+        """Refresh the heartbeat of the jobs this queue is running."""
+        with self._db_lock, self.session_factory() as db:
+            db.query(BacktestJob).filter(
+                BacktestJob.worker_id == self.worker_id,
+                BacktestJob.status == JobStatus.RUNNING.value,
+            ).update({BacktestJob.heartbeat_at: datetime.now(timezone.utc)})
+            db.commit()
+
+    def _requeue_orphans(self) -> int:
+        """Re-queue running jobs whose heartbeat is stale or missing."""
+        stale = datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)
+        with self._db_lock, self.session_factory() as db:
+            updated = (
+                db.query(BacktestJob)
+                .filter(
+                    BacktestJob.status == JobStatus.RUNNING.value,
+                    or_(BacktestJob.heartbeat_at.is_(None), BacktestJob.heartbeat_at < stale),
+                )
+                .update({
+                    BacktestJob.status: JobStatus.QUEUED.value,
+                    BacktestJob.started_at: None,
+                    BacktestJob.worker_id: None,
+                    BacktestJob.heartbeat_at: None,
+                }, synchronize_session=False)
+            )
+            db.commit()
+        return updated
+
+
+backtest_jobs = BacktestJobQueue()
@@ -1,25 +1,63 @@
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.ensemble import RandomForestRegressor
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.optimizers import Adam
 import logging
-from typing import Tuple, List
+from typing import TYPE_CHECKING, Dict, Tuple, List, Optional
+
+from app.services.feature_graph import FeatureGraph
+from app.services.feature_store import (
+    DEFAULT_FEATURE_SET,
+    FeatureStore,
+    StoredFeatures,
+    extend_features,
+    finish_features,
+)
+from app.services.window_dataset import WindowDataset, sliding_windows
+
+if TYPE_CHECKING:
+    from sklearn.preprocessing import MinMaxScaler
 
 logger = logging.getLogger(__name__)
 
 class MLSignalService:
-    """Machine Learning signal generation (LSTM + Random Forest ensemble)"""
+    """
+    Machine Learning signal generation (LSTM + Random Forest ensemble)
+    
+    scikit-learn and TensorFlow are imported by the methods that use them,
+    so importing this module stays cheap for API workers that never train
+    or predict.
+    """
     
-    def __init__(self, lookback_period: int = 60):
+    def __init__(
+        self,
+        lookback_period: int = 60,
+        feature_store: Optional[FeatureStore] = None,
+        feature_set: str = DEFAULT_FEATURE_SET,
+        timeframe: str = "1d",
+        macd_scale: Optional[float] = None,
+    ):
+        from sklearn.preprocessing import MinMaxScaler
+        
         self.lookback_period = lookback_period
         self.scaler = MinMaxScaler()
         self.lstm_model = None
         self.rf_model = None
+        # Persisted features per (symbol, timeframe); used when a symbol is given
+        self.feature_store = feature_store
+        # Named set of configs/ai/feature_sets.yaml; the default set is the six built-in features
+        self.feature_set = feature_set
+        # Bar length of the training data; set by prepare_features and saved with the models
+        self.timeframe = timeframe
+        # Close std the MACD column was divided by when the scaler was fit
+        # (1.0 for raw feature store rows); None if unknown
+        self.macd_scale = macd_scale
+        self._graphs: Dict[str, FeatureGraph] = {}
         
-    def prepare_features(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    def prepare_features(
+        self,
+        data: pd.DataFrame,
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Prepare features for ML models
         
@@ -29,55 +67,126 @@ class MLSignalService:
         - RSI
         - MACD
         - Bollinger Bands
-        """
-        features = []
         
-        # Returns momentum
-        returns = data['close'].pct_change(1).fillna(0)
-        features.append(returns.values)
+        or the columns of ``feature_set``.
         
-        # Volatility (20-period)
-        volatility = data['close'].rolling(20).std().fillna(0)
-        features.append(volatility.values)
+        With a feature store and a symbol, only bars newer than the store
+        are computed, and rows are scaled over the whole stored history.
+        The store only holds the default feature set.
         
-        # RSI (14-period)
-        rsi = self._calculate_rsi(data['close'], 14)
-        features.append(rsi)
+        The scaler is fit here, so ``timeframe`` (``self.timeframe`` if
+        omitted) becomes the service's timeframe.
+        """
+        self.timeframe = timeframe = timeframe or self.timeframe
+        located = self.stored_features(data, symbol, timeframe)
+        if located is not None:
+            stored, rows = located
+            self.scaler = stored.scaler
+            # The store scales raw rows, whose MACD is not normalized
+            self.macd_scale = 1.0
+            return stored.scaled(rows), stored.target(rows)
         
-        # MACD
-        macd = self._calculate_macd(data['close'])
-        features.append(macd)
+        feature_matrix, target = self.compute_features(data, timeframe)
+        if self.feature_set == DEFAULT_FEATURE_SET:
+            self.macd_scale = float(data['close'].std())
         
-        # Bollinger Bands
-        bb = self._calculate_bollinger_bands(data['close'], 20)
-        features.append(bb)
+        # Scale features
+        feature_matrix = self.scaler.fit_transform(feature_matrix)
         
-        # Volume change
-        volume_change = data['volume'].pct_change(1).fillna(0)
-        features.append(volume_change.values)
+        return feature_matrix, target
+    
+    def stored_features(
+        self,
+        data: pd.DataFrame,
+        symbol: Optional[str],
+        timeframe: Optional[str] = None,
+    ) -> Optional[Tuple[StoredFeatures, np.ndarray]]:
+        """
+        Feature store set of ``symbol`` and the stored rows of ``data``'s bars
         
-        feature_matrix = np.column_stack(features)
-        feature_matrix = np.nan_to_num(feature_matrix, 0)
+        New bars of ``data`` are appended first. None when there is no
+        store or symbol, the feature set is not the default one, or some
+        bars of ``data`` predate the set (or fall in a gap of it); callers
+        then compute features from ``data`` alone.
+        """
+        if self.feature_store is None or symbol is None or self.feature_set != DEFAULT_FEATURE_SET:
+            return None
+        return self.feature_store.lookup(symbol, timeframe or self.timeframe, data)
+    
+    def compute_features(self, data: pd.DataFrame,
+                         timeframe: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Unscaled feature matrix and next-bar direction target
         
-        # Scale features
-        feature_matrix = self.scaler.fit_transform(feature_matrix)
+        ``timeframe`` is the bar length, which duration features such as
+        ``price_change_4h`` convert to a number of bars; ``self.timeframe``
+        by default.
+        """
+        timeframe = timeframe or self.timeframe
+        if self.feature_set == DEFAULT_FEATURE_SET:
+            # Same definitions the feature store extends bar by bar
+            raw, _ = extend_features(data['close'].to_numpy(dtype=float), data['volume'].to_numpy(dtype=float))
+            feature_matrix = finish_features(raw, data['close'].std())
+        else:
+            if timeframe not in self._graphs:
+                self._graphs[timeframe] = FeatureGraph.from_feature_set(self.feature_set, timeframe)
+            feature_matrix = self._graphs[timeframe].evaluate(data)
         
         # Target: next day return (1 if positive, 0 if negative)
         target = (data['close'].pct_change(1).shift(-1) > 0).astype(int).values
         
         return feature_matrix, target
     
-    def train_lstm_model(self, X: np.ndarray, y: np.ndarray, epochs: int = 50):
-        """Train LSTM for price prediction"""
+    def serving_features(self, data: pd.DataFrame, timeframe: Optional[str] = None) -> np.ndarray:
+        """
+        Unscaled features of ``data`` on the scale the fitted scaler expects
+        
+        Unlike compute_features, the default set's MACD is divided by
+        ``macd_scale`` from training rather than by the std of ``data``, so
+        a bar served from a short window gets the features it was trained on.
+        
+        Raises:
+            ValueError: If the default set's ``macd_scale`` is unknown
+        """
+        if self.feature_set != DEFAULT_FEATURE_SET:
+            return self.compute_features(data, timeframe)[0]
+        raw, _ = extend_features(data['close'].to_numpy(dtype=float), data['volume'].to_numpy(dtype=float))
+        return self.finish_raw(raw)
+    
+    def finish_raw(self, raw: np.ndarray) -> np.ndarray:
+        """Unscaled default-set features from raw rows (extend_features), MACD over ``macd_scale``"""
+        if self.macd_scale is None:
+            raise ValueError("The MACD scale this model was trained with is unknown; retrain and save it again")
+        return finish_features(raw, self.macd_scale)
+    
+    def train_lstm_model(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        epochs: int = 50,
+        batch_size: int = 32,
+        scaler: Optional['MinMaxScaler'] = None,
+    ):
+        """
+        Train LSTM for price prediction
+        
+        Windows are streamed in batches from zero-copy views of ``X``, which
+        may be memory-mapped (e.g. FeatureStore raw columns with the store's
+        ``scaler`` applied per batch), so memory is bounded by the batch
+        rather than by ``lookback_period`` copies of the data.
+        """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Input, LSTM, Dense, Dropout
+        from tensorflow.keras.optimizers import Adam
+        
         logger.info("Training LSTM model...")
         
-        # Reshape for LSTM (samples, timesteps, features)
-        X_lstm = np.array([X[i-self.lookback_period:i] 
-                          for i in range(self.lookback_period, len(X))])
-        y_lstm = y[self.lookback_period:]
+        windows = WindowDataset(X, y, self.lookback_period, batch_size, shuffle=True, scaler=scaler)
+        train, validation = windows.split(0.2)
         
         self.lstm_model = Sequential([
-            LSTM(64, activation='relu', input_shape=(self.lookback_period, X.shape[1])),
+            Input(shape=(self.lookback_period, X.shape[1])),
+            LSTM(64, activation='relu', return_sequences=True),
             Dropout(0.2),
             LSTM(32, activation='relu'),
             Dropout(0.2),
@@ -89,14 +198,20 @@ class MLSignalService:
                                loss='binary_crossentropy',
                                metrics=['accuracy'])
         
-        self.lstm_model.fit(X_lstm, y_lstm, epochs=epochs, batch_size=32, 
-                           validation_split=0.2, verbose=0)
+        self.lstm_model.fit(
+            train.to_tf_dataset(),
+            validation_data=validation.to_tf_dataset() if validation.n_windows else None,
+            epochs=epochs,
+            verbose=0,
+        )
         
         logger.info("LSTM training complete")
         return self.lstm_model
     
-    def train_rf_model(self, X: np.ndarray, y: np.ndarray):
+    def train_rf_model(self, X: np.ndarray, y: np.ndarray, n_jobs: int = -1):
         """Train Random Forest for signal generation"""
+        from sklearn.ensemble import RandomForestRegressor
+        
         logger.info("Training Random Forest model...")
         
         self.rf_model = RandomForestRegressor(
@@ -104,41 +219,98 @@ class MLSignalService:
             max_depth=15,
             min_samples_split=5,
             random_state=42,
-            n_jobs=-1
+            n_jobs=n_jobs
         )
         
         self.rf_model.fit(X, y)
         logger.info("Random Forest training complete")
         return self.rf_model
     
-    def generate_signals(self, data: pd.DataFrame) -> List[float]:
+    def generate_signals(
+        self,
+        data: pd.DataFrame,
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
+    ) -> List[float]:
         """
         Generate buy/sell signals using ensemble
         
         Returns:
             List of signals (0.0-1.0 confidence)
         """
-        X, _ = self.prepare_features(data)
+        X, _ = self.prepare_features(data, symbol, timeframe)
+        return self.predict_signals(X).tolist()
+    
+    def latest_signals(
+        self,
+        data: pd.DataFrame,
+        symbol: str,
+        timeframe: Optional[str] = None,
+        n_bars: int = 1,
+    ) -> List[float]:
+        """
+        Signals of the newest ``n_bars`` bars from the feature store
+        
+        ``data`` only needs the bars the store has not seen yet. Just those
+        are featurized, and the models only see the last
+        ``lookback_period + n_bars`` rows, so a live bar costs O(new bars)
+        rather than O(history).
+        """
+        if self.feature_store is None or self.feature_set != DEFAULT_FEATURE_SET:
+            raise ValueError("latest_signals needs a feature_store and the default feature set")
+        stored = self.feature_store.update(symbol, timeframe or self.timeframe, data)
+        self.scaler = stored.scaler
+        X = stored.scaled(slice(max(len(stored) - self.lookback_period - n_bars, 0), None))
+        return self.predict_signals(X)[-n_bars:].tolist()
+    
+    def predict_signals(self, X: np.ndarray) -> np.ndarray:
+        """
+        Ensemble signals for an already scaled feature matrix
+        
+        Rows before ``lookback_period`` have no LSTM window and get the
+        LSTM's neutral zero. Untrained models are left out of the average.
+        """
+        return self.predict_components(X)['ensemble']
+    
+    def predict_components(self, X: np.ndarray,
+                           rows: Optional[np.ndarray] = None) -> Dict[str, Optional[np.ndarray]]:
+        """
+        LSTM, Random Forest and ensemble predictions for rows of a scaled feature matrix
+        
+        Args:
+            X: Scaled feature matrix; rows before each predicted row are the
+                LSTM's history
+            rows: Row positions to predict, all rows by default. Only these
+                rows and their LSTM windows reach the models.
+            
+        Returns:
+            ``{'lstm', 'rf', 'ensemble'}`` arrays aligned with ``rows``; the
+            entry of an untrained model is None
+        """
+        every_row = rows is None
+        rows = np.arange(len(X)) if every_row else np.asarray(rows, dtype=int)
         
         # LSTM predictions
+        lstm_preds = None
         if self.lstm_model:
-            X_lstm = np.array([X[i-self.lookback_period:i] 
-                              for i in range(self.lookback_period, len(X))])
-            lstm_preds = self.lstm_model.predict(X_lstm, verbose=0)
-            lstm_preds = np.concatenate([np.zeros((self.lookback_period, 1)), 
-                                        lstm_preds])
-        else:
-            lstm_preds = np.zeros((len(X), 1))
+            lstm_preds = np.zeros(len(rows))
+            windowed = rows >= self.lookback_period
+            starts = rows[windowed] - self.lookback_period
+            if every_row and len(starts):
+                # Every window: stream them rather than materializing all
+                windows = WindowDataset(X, None, self.lookback_period, batch_size=1024).to_tf_dataset()
+                lstm_preds[windowed] = self.lstm_model.predict(windows, verbose=0).reshape(-1)
+            elif len(starts):
+                windows = sliding_windows(X, self.lookback_period)[starts]
+                lstm_preds[windowed] = self.lstm_model.predict(windows, batch_size=1024, verbose=0).reshape(-1)
         
         # Random Forest predictions
-        if self.rf_model:
-            rf_preds = self.rf_model.predict(X).reshape(-1, 1)
-        else:
-            rf_preds = np.zeros((len(X), 1))
+        rf_preds = self.rf_model.predict(X[rows]).reshape(-1) if self.rf_model else None
         
-        # Ensemble: average both predictions
-        signals = (lstm_preds + rf_preds) / 2
-        return signals.flatten().tolist()
+        # Ensemble: average the trained models' predictions
+        trained = [preds for preds in (lstm_preds, rf_preds) if preds is not None]
+        ensemble = np.mean(trained, axis=0) if trained else np.zeros(len(rows))
+        return {'lstm': lstm_preds, 'rf': rf_preds, 'ensemble': ensemble}
     
     def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> np.ndarray:
         """Calculate Relative Strength Index"""
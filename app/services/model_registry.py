@@ -0,0 +1,314 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.feature_store import DEFAULT_FEATURE_SET, default_feature_store
+from app.services.inference_batcher import InferenceServer, default_inference_server
+from app.services.ml_signal_service import MLSignalService
+from app.services.signal_store import SignalStore
+
+logger = logging.getLogger(__name__)
+
+_LSTM_FILE = 'lstm.keras'
+_RF_FILE = 'rf.joblib'
+_SCALER_FILE = 'scaler.joblib'
+_META_FILE = 'meta.json'
+
+
+class ModelNotFoundError(KeyError):
+    """No stored version matches the requested model name and version"""
+
+
+class ModelRegistry:
+    """
+    Versioned on-disk store of MLSignalService models with an in-memory LRU
+
+    Each save writes ``<root>/<name>/<version>/`` with the Keras LSTM, the
+    Random Forest, the fitted scaler and ``meta.json``, built in a temporary
+    directory and renamed into place, so readers never see half a version.
+    Versions are increasing integers and the highest one is served by
+    default.
+
+    ``load`` reads a version on first use and keeps it in an LRU bounded by
+    ``memory_budget`` bytes, estimated from the artifact sizes. The least
+    recently used models are dropped once the budget is exceeded. The one
+    just loaded always stays, even if it alone exceeds the budget.
+    Concurrent loads of the same version share one read.
+
+    ``predict`` goes through ``inference_server``, so concurrent requests
+    for one version share a batched model call. ``signals`` serves
+    per-bar predictions through ``signal_store``.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        memory_budget: int = 1024 * 1024 * 1024,
+        inference_server: Optional[InferenceServer] = None,
+        signal_store: Optional[SignalStore] = None,
+    ):
+        self.root = Path(root)
+        self.memory_budget = memory_budget
+        # Batchers are keyed by name and version, so registries must not share a server
+        self.inference_server = inference_server or InferenceServer()
+        self.signal_store = signal_store or SignalStore()
+        self._cache: 'OrderedDict[Tuple[str, int], Tuple[MLSignalService, int]]' = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple[str, int], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _dir(self, name: str) -> Path:
+        return self.root / re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+
+    def names(self) -> List[str]:
+        """Names with at least one stored version"""
+        if not self.root.is_dir():
+            return []
+        return sorted(path.name for path in self.root.iterdir() if path.is_dir() and self.versions(path.name))
+
+    def versions(self, name: str) -> List[int]:
+        """Stored versions of ``name``, oldest first"""
+        directory = self._dir(name)
+        if not directory.is_dir():
+            return []
+        return sorted(int(path.name) for path in directory.iterdir() if path.name.isdigit())
+
+    def resolve(self, name: str, version: Optional[int] = None) -> int:
+        """``version`` if stored, else the latest one"""
+        versions = self.versions(name)
+        if not versions or (version is not None and version not in versions):
+            raise ModelNotFoundError(f"No model {name!r} version {version or 'latest'}")
+        return versions[-1] if version is None else version
+
+    def metadata(self, name: str, version: Optional[int] = None) -> Dict[str, Any]:
+        version = self.resolve(name, version)
+        return json.loads((self._dir(name) / str(version) / _META_FILE).read_text())
+
+    def save(self, name: str, service: MLSignalService, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Store the models and scaler of ``service`` as a new version of ``name``
+
+        Args:
+            name: Model name, e.g. a symbol or ``"XRPUSD-1h"``
+            service: Service whose trained models and fitted scaler are saved
+            metadata: Extra fields for ``meta.json`` (training range, metrics...)
+
+        Returns:
+            The new version number
+        """
+        import joblib
+
+        if service.lstm_model is None and service.rf_model is None:
+            raise ValueError("MLSignalService has no trained model to save")
+        directory = self._dir(name)
+        directory.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=directory, prefix='.staging-'))
+        try:
+            if service.lstm_model is not None:
+                service.lstm_model.save(staging / _LSTM_FILE)
+            if service.rf_model is not None:
+                joblib.dump(service.rf_model, staging / _RF_FILE)
+            joblib.dump(service.scaler, staging / _SCALER_FILE)
+            meta = {
+                'name': name,
+                'lookback_period': service.lookback_period,
+                'feature_set': service.feature_set,
+                'timeframe': service.timeframe,
+                'macd_scale': service.macd_scale,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'size_bytes': sum(path.stat().st_size for path in staging.iterdir()),
+                'models': sorted(path.stem for path in staging.iterdir() if path.stem != 'scaler'),
+                **(metadata or {}),
+            }
+            while True:
+                version = (self.versions(name) or [0])[-1] + 1
+                meta['version'] = version
+                (staging / _META_FILE).write_text(json.dumps(meta, default=str))
+                try:
+                    os.rename(staging, directory / str(version))
+                    break
+                except OSError:
+                    # Another writer took this version number
+                    if not (directory / str(version)).exists():
+                        raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.info(f"Saved model {name} version {version}")
+        return version
+
+    def load(self, name: str, version: Optional[int] = None) -> MLSignalService:
+        """MLSignalService with the stored models, read from disk on first use"""
+        key = (name, self.resolve(name, version))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key][0]
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        with loading:
+            with self._lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return self._cache[key][0]
+            service, size = self._read(*key)
+            evicted = []
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = (service, size)
+                self._cached_bytes += size
+                while self._cached_bytes > self.memory_budget and len(self._cache) > 1:
+                    old_key, (_, old_size) = self._cache.popitem(last=False)
+                    self._cached_bytes -= old_size
+                    evicted.append(old_key)
+                    logger.info(f"Evicted model {old_key[0]} version {old_key[1]} from memory")
+                self._loading.pop(key, None)
+        self._discard(evicted)
+        return service
+
+    def _read(self, name: str, version: int) -> Tuple[MLSignalService, int]:
+        import joblib
+
+        directory = self._dir(name) / str(version)
+        meta = json.loads((directory / _META_FILE).read_text())
+        service = MLSignalService(
+            lookback_period=meta['lookback_period'],
+            feature_set=meta.get('feature_set', DEFAULT_FEATURE_SET),
+            timeframe=meta.get('timeframe', "1d"),
+            macd_scale=meta.get('macd_scale'),
+        )
+        if (directory / _LSTM_FILE).exists():
+            import tensorflow as tf
+            service.lstm_model = tf.keras.models.load_model(directory / _LSTM_FILE)
+        if (directory / _RF_FILE).exists():
+            service.rf_model = joblib.load(directory / _RF_FILE)
+        service.scaler = joblib.load(directory / _SCALER_FILE)
+        logger.info(f"Loaded model {name} version {version}")
+        return service, meta['size_bytes']
+
+    def evict(self, name: str, version: Optional[int] = None) -> None:
+        """Drop cached versions of ``name`` (all of them if ``version`` is None)"""
+        with self._lock:
+            evicted = [key for key in self._cache if key[0] == name and version in (None, key[1])]
+            for key in evicted:
+                self._cached_bytes -= self._cache.pop(key)[1]
+        self._discard(evicted)
+
+    def _discard(self, keys: List[Tuple[str, int]]) -> None:
+        """Close the batchers of unloaded versions, which hold their models"""
+        # Outside self._lock: closing waits for the batcher's in-flight batch
+        for name, version in keys:
+            self.inference_server.discard(f"{name}:{version}")
+
+    def predict(self, name: str, data: pd.DataFrame, version: Optional[int] = None) -> float:
+        """
+        Ensemble signal for the newest bar of ``data``
+
+        Features are built on the training scale (timeframe and MACD
+        normalization saved with the model) and scaled with the saved
+        scaler; only the last ``lookback_period + 1`` rows reach the models,
+        batched with the concurrent requests for the same version.
+
+        Raises:
+            ValueError: If the version was saved without its MACD scale
+        """
+        version = self.resolve(name, version)
+        service = self.load(name, version)
+        try:
+            X = service.serving_features(data)
+        except ValueError as e:
+            raise ValueError(f"{name}:{version}: {e}") from e
+        X = service.scaler.transform(X[-(service.lookback_period + 1):])
+        if len(X) <= service.lookback_period:
+            # Too short for an LSTM window; predict_signals handles it alone
+            return float(service.predict_signals(X)[-1])
+        # The batcher keeps this service until the version is evicted and its batcher discarded
+        future = self.inference_server.submit(
+            f"{name}:{version}", lambda batch: self._predict_batch(service, batch), X,
+        )
+        signal = float(future.result())
+        with self._lock:
+            cached = (name, version) in self._cache
+        if not cached:
+            # Evicted while this request was in flight: do not leave its batcher behind
+            self._discard([(name, version)])
+        return signal
+
+    def signals(
+        self,
+        name: str,
+        data: pd.DataFrame,
+        version: Optional[int] = None,
+        symbol: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Per-bar LSTM, Random Forest and ensemble predictions for all of ``data``
+
+        Bars already predicted by this version are read from ``ml_signals``;
+        only the others are run through the model, over the signal store's
+        feature history, and stored once warmed up.
+
+        Args:
+            name: Model name
+            data: OHLCV bars
+            version: Model version, the latest by default
+            symbol: Symbol of ``data``, ``name`` by default
+        """
+        version = self.resolve(name, version)
+        service = self.load(name, version)
+        return self.signal_store.signals(
+            service, data, symbol or name, name, version, service.timeframe,
+        )
+
+    @staticmethod
+    def _predict_batch(service: MLSignalService, batch: np.ndarray) -> np.ndarray:
+        """Newest-bar ensemble signal per ``(lookback + 1, n_features)`` sample"""
+        signals = []
+        if service.lstm_model is not None:
+            # The window before the newest bar predicts it
+            signals.append(service.lstm_model.predict(batch[:, :-1], verbose=0).reshape(-1))
+        if service.rf_model is not None:
+            signals.append(service.rf_model.predict(batch[:, -1]).reshape(-1))
+        return np.mean(signals, axis=0) if signals else np.zeros(len(batch))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            loaded = [f"{name}:{version}" for name, version in self._cache]
+            cached_bytes = self._cached_bytes
+        return {
+            'registered': len(self.names()),
+            'loaded': loaded,
+            'cached_bytes': cached_bytes,
+            'memory_budget': self.memory_budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'inference': self.inference_server.stats(),
+        }
+
+
+@lru_cache(maxsize=None)
+def default_model_registry() -> ModelRegistry:
+    """Process-wide registry at MODEL_REGISTRY_DIR, budgeted by MODEL_CACHE_MAX_MB"""
+    return ModelRegistry(
+        settings.MODEL_REGISTRY_DIR,
+        settings.MODEL_CACHE_MAX_MB * 1024 * 1024,
+        default_inference_server(),
+        SignalStore(feature_store=default_feature_store()),
+    )
@@ -0,0 +1,89 @@
+import numpy as np
+from typing import Dict, Optional
+import logging
+
+from app.services.performance_metrics import equity_metrics
+
+logger = logging.getLogger(__name__)
+
+# Cap on simulated (paths x trades) cells held in memory at once
+MAX_CHUNK_CELLS = 4_000_000
+
+
+def _path_stats(
+    returns: np.ndarray,
+    initial_cash: float,
+    trades_per_year: float,
+) -> Dict[str, np.ndarray]:
+    """Final equity, max drawdown (%) and Sharpe of every row of trade returns"""
+    equity = initial_cash * np.cumprod(1.0 + returns, axis=1)
+    stats = equity_metrics(equity, trades_per_year, initial_cash, riskfreerate=0.0)
+    return {
+        'final_value': equity[:, -1],
+        'max_drawdown': stats['max_drawdown'],
+        'sharpe_ratio': stats['sharpe_ratio'],
+    }
+
+
+def _summarize(stats: Dict[str, np.ndarray], initial_cash: float, confidence: float) -> Dict:
+    tail = 100.0 * (1.0 - confidence) / 2.0
+    summary = {}
+    for name, values in stats.items():
+        lower, upper = np.percentile(values, [tail, 100.0 - tail])
+        summary[name] = {'mean': float(values.mean()), 'lower': float(lower), 'upper': float(upper)}
+    summary['probability_of_loss'] = float(np.mean(stats['final_value'] < initial_cash))
+    return summary
+
+
+def resample_trade_returns(
+    trade_returns: np.ndarray,
+    initial_cash: float,
+    years: float,
+    n_simulations: int = 10000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> Dict:
+    """
+    Bootstrap and shuffle resampling of closed-trade returns
+
+    Every simulated path compounds a sequence of per-trade returns (net PnL
+    over account value at entry). ``bootstrap`` draws trades with
+    replacement, so it varies the outcome itself. ``shuffle`` permutes the
+    realized trades, which keeps the final equity but shows how much the
+    drawdown owed to their order. Paths are rows of one matrix, so the
+    whole run is a handful of NumPy reductions.
+
+    Args:
+        trade_returns: Net return of each closed trade, in order
+        initial_cash: Starting capital
+        years: Calendar span of the backtest, used to annualize Sharpe
+        n_simulations: Paths per resampling method
+        confidence: Two-sided interval width
+        seed: RNG seed for reproducible intervals
+
+    Returns:
+        Mean and confidence interval of final value, max drawdown and
+        per-trade Sharpe (annualized by trades per year) for both methods
+    """
+    returns = np.asarray(trade_returns, dtype=float)
+    n_trades = len(returns)
+    result = {'n_simulations': n_simulations, 'n_trades': n_trades, 'confidence': confidence}
+    if n_trades == 0:
+        return result
+
+    rng = np.random.default_rng(seed)
+    trades_per_year = n_trades / years if years > 0 else float(n_trades)
+    chunk = max(MAX_CHUNK_CELLS // n_trades, 1)
+
+    bootstrap, shuffle = [], []
+    for start in range(0, n_simulations, chunk):
+        rows = min(chunk, n_simulations - start)
+        sampled = returns[rng.integers(0, n_trades, size=(rows, n_trades))]
+        bootstrap.append(_path_stats(sampled, initial_cash, trades_per_year))
+        permuted = rng.permuted(np.broadcast_to(returns, (rows, n_trades)), axis=1)
+        shuffle.append(_path_stats(permuted, initial_cash, trades_per_year))
+
+    for name, chunks in (('bootstrap', bootstrap), ('shuffle', shuffle)):
+        stats = {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0]}
+        result[name] = _summarize(stats, initial_cash, confidence)
+    return result
@@ -0,0 +1,200 @@
+import copy
+import threading
+import time
+from typing import Any, Dict, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.services.feature_store import DEFAULT_FEATURE_SET, FeatureState, extend_features
+from app.services.ml_signal_service import MLSignalService
+from app.services.window_dataset import WindowDataset
+
+logger = logging.getLogger(__name__)
+
+
+class OnlineLearner:
+    """
+    Keeps an MLSignalService's models current as labeled bars stream in
+
+    Features of new bars continue from a FeatureState, so an update costs
+    O(new bars) rather than a pass over the history. A bar is labeled (next
+    bar up or not) once its successor arrives, and labeled rows go into a
+    replay buffer holding the newest ``buffer_size`` rows.
+
+    On each update:
+
+    - a model with ``partial_fit`` (e.g. ``SGDRegressor``) learns from the
+      newly labeled rows;
+    - a Random Forest grows ``trees_per_update`` trees fitted on the buffer
+      and drops its oldest trees beyond ``max_trees``, so it tracks recent
+      regimes at a fixed size;
+    - the LSTM is fine-tuned for ``lstm_epochs`` on windows of the buffer.
+
+    Models are updated on copies and swapped into the service in one
+    assignment, so predictions made meanwhile use the previous models. The
+    scaler fitted by the initial training and the service's ``macd_scale``
+    are kept, which keeps the inputs of the updated and the previous models
+    comparable.
+
+    Args:
+        service: Service whose models are updated
+        buffer_size: Labeled rows kept for replay
+        trees_per_update: Trees fitted per Random Forest update
+        max_trees: Largest forest kept
+        lstm_epochs: Fine-tuning passes over the buffer per update
+        lstm_learning_rate: Fine-tuning learning rate, below the training one
+        min_new_rows: Labeled rows needed before the models are updated
+    """
+
+    def __init__(
+        self,
+        service: MLSignalService,
+        buffer_size: int = 5000,
+        trees_per_update: int = 10,
+        max_trees: int = 100,
+        lstm_epochs: int = 1,
+        lstm_learning_rate: float = 1e-4,
+        min_new_rows: int = 1,
+    ):
+        self.service = service
+        self.buffer_size = buffer_size
+        self.trees_per_update = trees_per_update
+        self.max_trees = max_trees
+        self.lstm_epochs = lstm_epochs
+        self.lstm_learning_rate = lstm_learning_rate
+        self.min_new_rows = min_new_rows
+        self.state: Optional[FeatureState] = None
+        self.X = np.empty((0, 0))
+        self.y = np.empty(0)
+        self.updates = 0
+        self._pending_row: Optional[np.ndarray] = None
+        self._pending_close: Optional[float] = None
+        self._pending_X = np.empty((0, 0))
+        self._pending_y = np.empty(0)
+        self._last_index: Any = None
+        self._lock = threading.Lock()
+
+    def start(self, data: pd.DataFrame) -> None:
+        """
+        Build the feature state and replay buffer from history
+
+        Models the service does not have yet are trained on the buffer; an
+        unfitted scaler is fitted on the history, as prepare_features does.
+        MACD is divided by the service's ``macd_scale``, or by the history's
+        close std when it has none, which then becomes its ``macd_scale``.
+        """
+        if self.service.feature_set != DEFAULT_FEATURE_SET:
+            raise ValueError("Online updates continue the default feature set only")
+        with self._lock:
+            close = data['close'].to_numpy(dtype=float)
+            raw, self.state = extend_features(close, data['volume'].to_numpy(dtype=float))
+            if self.service.macd_scale is None:
+                # Fixed from here on: replayed and new rows must share the scaler's MACD scale
+                self.service.macd_scale = self.state.close_std
+            features = self.service.finish_raw(raw)
+            if not hasattr(self.service.scaler, 'scale_'):
+                self.service.scaler.fit(features)
+            X = self.service.scaler.transform(features)
+            y = (close[1:] > close[:-1]).astype(int)
+            self.X, self.y = X[:-1][-self.buffer_size:], y[-self.buffer_size:]
+            self._pending_row, self._pending_close = X[-1], close[-1]
+            self._pending_X, self._pending_y = np.empty((0, X.shape[1])), np.empty(0)
+            self._last_index = data.index[-1]
+
+            if self.service.rf_model is None:
+                self.service.train_rf_model(self.X, self.y)
+            logger.info(f"Online learner started with {len(self.X)} buffered rows")
+
+    def update(self, bars: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Learn from new bars; rows of ``bars`` not newer than the last seen are skipped
+
+        Returns:
+            Rows labeled by these bars, whether the models were updated, the
+            forest size and the seconds taken
+        """
+        if self.state is None:
+            raise RuntimeError("OnlineLearner.start must be called with history first")
+        started = time.perf_counter()
+        with self._lock:
+            bars = bars[bars.index > self._last_index]
+            labeled = self._append(bars) if len(bars) else 0
+            updated = labeled > 0 and len(self._pending_y) >= self.min_new_rows
+            if updated:
+                self._update_rf(self._pending_X, self._pending_y)
+                self._update_lstm()
+                self._pending_X = self._pending_X[:0]
+                self._pending_y = self._pending_y[:0]
+                self.updates += 1
+
+        seconds = time.perf_counter() - started
+        rf = self.service.rf_model
+        result = {
+            'labeled': labeled,
+            'updated': updated,
+            'trees': len(rf.estimators_) if hasattr(rf, 'estimators_') else None,
+            'seconds': seconds,
+        }
+        if updated:
+            logger.info(f"Online update {self.updates}: {labeled} new rows in {seconds:.2f}s")
+        return result
+
+    def _append(self, bars: pd.DataFrame) -> int:
+        close = bars['close'].to_numpy(dtype=float)
+        raw, self.state = extend_features(close, bars['volume'].to_numpy(dtype=float), self.state)
+        X = self.service.scaler.transform(self.service.finish_raw(raw))
+
+        # The pending bar and every new bar but the last now have a successor
+        rows = np.vstack([self._pending_row[np.newaxis], X[:-1]])
+        previous = np.concatenate(([self._pending_close], close[:-1]))
+        y = (close > previous).astype(int)
+        self._pending_row, self._pending_close = X[-1], close[-1]
+        self._last_index = bars.index[-1]
+
+        self.X = np.concatenate([self.X, rows])[-self.buffer_size:]
+        self.y = np.concatenate([self.y, y])[-self.buffer_size:]
+        self._pending_X = np.concatenate([self._pending_X, rows])
+        self._pending_y = np.concatenate([self._pending_y, y])
+        return len(y)
+
+    def _update_rf(self, X_new: np.ndarray, y_new: np.ndarray) -> None:
+        from sklearn.base import clone
+        from sklearn.ensemble import RandomForestRegressor
+
+        model = self.service.rf_model
+        if hasattr(model, 'partial_fit'):
+            updated = copy.deepcopy(model)
+            updated.partial_fit(X_new, y_new)
+            self.service.rf_model = updated
+            return
+        if not isinstance(model, RandomForestRegressor):
+            return
+
+        fresh = clone(model).set_params(n_estimators=self.trees_per_update)
+        if isinstance(model.random_state, int):
+            # New trees must not repeat the bootstrap draws of earlier ones
+            fresh.set_params(random_state=model.random_state + self.updates + 1)
+        fresh.fit(self.X, self.y)
+        fresh.estimators_ = (model.estimators_ + fresh.estimators_)[-self.max_trees:]
+        fresh.n_estimators = len(fresh.estimators_)
+        self.service.rf_model = fresh
+
+    def _update_lstm(self) -> None:
+        model = self.service.lstm_model
+        lookback = self.service.lookback_period
+        if model is None or len(self.X) <= lookback:
+            return
+        import tensorflow as tf
+
+        tuned = tf.keras.models.clone_model(model)
+        tuned.set_weights(model.get_weights())
+        tuned.compile(
+            optimizer=tf.keras.optimizers.Adam(learning_rate=self.lstm_learning_rate),
+            loss='binary_crossentropy',
+            metrics=['accuracy'],
+        )
+        windows = WindowDataset(self.X, self.y, lookback, batch_size=32, shuffle=True)
+        tuned.fit(windows.to_tf_dataset(), epochs=self.lstm_epochs, verbose=0)
+        self.service.lstm_model = tuned
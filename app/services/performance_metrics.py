@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Risk-free rate used by bt.analyzers.SharpeRatio (yearly timeframe)
+RISK_FREE_RATE = 0.01
+_NS_PER_YEAR = 365.25 * 86_400 * 10**9
+
+Metric = Union[float, np.ndarray]
+
+# Keys of every equity_metrics() result
+METRIC_NAMES = (
+    'total_return',
+    'annual_return',
+    'volatility',
+    'sharpe_ratio',
+    'sortino_ratio',
+    'max_drawdown',
+    'calmar_ratio',
+    'value_at_risk',
+    'expected_shortfall',
+)
+
+
+def periods_per_year(index: pd.DatetimeIndex) -> float:
+    """Average number of bars per calendar year spanned by ``index``"""
+    stamps = pd.DatetimeIndex(index).to_numpy(dtype='datetime64[ns]').view(np.int64)
+    if not len(stamps):
+        return 1.0
+    return bars_per_year(len(stamps), int(stamps[0]), int(stamps[-1]))
+
+
+def bars_per_year(n_bars: int, first_ns: int, last_ns: int) -> float:
+    """periods_per_year() of ``n_bars`` bars from ``first_ns`` to ``last_ns`` (epoch nanoseconds)"""
+    if n_bars < 2 or last_ns == first_ns:
+        return 1.0
+    return (n_bars - 1) * _NS_PER_YEAR / float(last_ns - first_ns)
+
+
+def sharpe_ratio(
+    mean_return: Metric,
+    stddev: Metric,
+    periods_per_year: float,
+    riskfreerate: float = RISK_FREE_RATE,
+) -> Metric:
+    """
+    Annualized Sharpe ratio from the mean and (population) std of per-bar returns
+
+    0.0 where the returns do not vary.
+    """
+    period_rate = (1.0 + riskfreerate) ** (1.0 / periods_per_year) - 1.0
+    mean_return = np.asarray(mean_return, dtype=float)
+    stddev = np.asarray(stddev, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(stddev > 0.0, (mean_return - period_rate) / stddev * np.sqrt(periods_per_year), 0.0)
+    return _unwrap(sharpe)
+
+
+def year_end_bars(index: pd.DatetimeIndex) -> np.ndarray:
+    """Position of the last bar of every calendar year in ``index``"""
+    years = pd.DatetimeIndex(index).year.to_numpy()
+    return np.flatnonzero(np.diff(years, append=years[-1] + 1) != 0)
+
+
+def annual_sharpe(
+    year_end_values: np.ndarray,
+    initial_value: Metric,
+    riskfreerate: float = RISK_FREE_RATE,
+) -> Metric:
+    """
+    Sharpe ratio over calendar-year returns, as bt.analyzers.SharpeRatio
+
+    ``year_end_values`` holds the account value at each year's last bar
+    along its last axis. Reports 0.0 where the analyzer would give None
+    (no variation between yearly returns).
+    """
+    values = np.asarray(year_end_values, dtype=float)
+    start = np.broadcast_to(np.asarray(initial_value, dtype=float)[..., None], values.shape[:-1] + (1,))
+    previous = np.concatenate((start, values[..., :-1]), axis=-1)
+    excess = values / previous - 1.0 - riskfreerate
+
+    stddev = excess.std(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(stddev != 0.0, excess.mean(axis=-1) / stddev, 0.0)
+    return _unwrap(sharpe)
+
+
+def equity_metrics(
+    equity: np.ndarray,
+    periods_per_year: float,
+    initial_value: Optional[Metric] = None,
+    riskfreerate: float = RISK_FREE_RATE,
+    confidence: float = 0.95,
+) -> Dict[str, Metric]:
+    """
+    Return and risk metrics of one equity curve or a batch of them
+
+    Every statistic is a NumPy reduction along the last axis, so a
+    ``(runs, bars)`` matrix of equity curves (parameter sweeps, Monte Carlo
+    paths) is evaluated at once and each metric comes back as an array of
+    one value per run; a 1-D curve gives plain floats.
+
+    Args:
+        equity: Account value at the close of every bar
+        periods_per_year: Bars per year, used to annualize
+        initial_value: Value before the first bar; when given, the first
+            bar's return and the drawdown peak start from it
+        riskfreerate: Yearly risk-free rate for Sharpe and Sortino
+        confidence: Level of the historical VaR and expected shortfall
+
+    Returns:
+        total_return, annual_return (compounded), volatility (annualized),
+        sharpe_ratio and sortino_ratio (per-bar returns, annualized),
+        max_drawdown (%), calmar_ratio, and value_at_risk /
+        expected_shortfall as positive per-bar loss fractions
+    """
+    equity = np.asarray(equity, dtype=float)
+    if initial_value is None:
+        start = equity[..., :1]
+        previous = equity[..., :-1]
+        current = equity[..., 1:]
+    else:
+        start = np.broadcast_to(np.asarray(initial_value, dtype=float)[..., None], equity.shape[:-1] + (1,))
+        previous = np.concatenate((start, equity[..., :-1]), axis=-1)
+        current = equity
+    returns = current / previous - 1.0
+    n_returns = returns.shape[-1]
+    if n_returns == 0:
+        zero = np.zeros(equity.shape[:-1])
+        return {name: _unwrap(zero) for name in METRIC_NAMES}
+
+    annualize = np.sqrt(periods_per_year)
+    period_rate = (1.0 + riskfreerate) ** (1.0 / periods_per_year) - 1.0
+    excess = returns - period_rate
+    mean_excess = excess.mean(axis=-1)
+    stddev = returns.std(axis=-1)
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2, axis=-1))
+
+    total_return = equity[..., -1] / start[..., 0] - 1.0
+    annual_return = np.maximum(1.0 + total_return, 0.0) ** (periods_per_year / n_returns) - 1.0
+
+    peak = np.maximum.accumulate(equity, axis=-1)
+    if initial_value is not None:
+        peak = np.maximum(peak, start)
+    max_drawdown = 100.0 * np.max((peak - equity) / peak, axis=-1)
+
+    cutoff = np.quantile(returns, 1.0 - confidence, axis=-1)
+    tail = returns <= cutoff[..., None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = {
+            'total_return': total_return,
+            'annual_return': annual_return,
+            'volatility': stddev * annualize,
+            'sharpe_ratio': np.asarray(sharpe_ratio(returns.mean(axis=-1), stddev, periods_per_year, riskfreerate)),
+            'sortino_ratio': np.where(downside > 0.0, mean_excess / downside * annualize, 0.0),
+            'max_drawdown': max_drawdown,
+            'calmar_ratio': np.where(max_drawdown > 0.0, annual_return / (max_drawdown / 100.0), 0.0),
+            'value_at_risk': -cutoff,
+            'expected_shortfall': -np.sum(returns * tail, axis=-1) / np.sum(tail, axis=-1),
+        }
+    return {name: _unwrap(values) for name, values in metrics.items()}
+
+
+def returns_metrics(
+    returns: np.ndarray,
+    periods_per_year: float,
+    riskfreerate: float = RISK_FREE_RATE,
+    confidence: float = 0.95,
+) -> Dict[str, Metric]:
+    """equity_metrics() of per-period returns, compounded from a value of 1"""
+    equity = np.cumprod(1.0 + np.asarray(returns, dtype=float), axis=-1)
+    return equity_metrics(equity, periods_per_year, 1.0, riskfreerate, confidence)
+
+
+def _unwrap(values: np.ndarray) -> Metric:
+    """Plain float for a single run, the array for a batch"""
+    return float(values) if np.ndim(values) == 0 else values
@@ -0,0 +1,255 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+
+from app.services.vectorized_backtest import trade_bars, summary_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PortfolioBacktestResult:
+    """Per-bar portfolio state of a multi-symbol vectorized run"""
+    index: pd.DatetimeIndex
+    symbols: List[str]
+    equity: np.ndarray
+    cash: np.ndarray
+    positions: np.ndarray
+    symbol_pnl: np.ndarray
+    trade_symbols: np.ndarray
+    pnlcomm: np.ndarray
+    trades_opened: np.ndarray
+
+
+def align_portfolio(
+    data: Dict[str, pd.DataFrame],
+    signals: Union[pd.DataFrame, Dict[str, List[float]]],
+) -> Tuple[pd.DatetimeIndex, List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Stack per-symbol OHLCV and signals into (bars, symbols) matrices
+
+    Only timestamps present for every symbol are kept. Signals given as a
+    dict are aligned with the rows of their symbol's own DataFrame; a
+    DataFrame of signals must be indexed by timestamp with one column per
+    symbol.
+
+    Returns:
+        (index, symbols, open, close, signals) with 2-D float arrays
+    """
+    if not data:
+        raise ValueError("Portfolio backtest needs at least one symbol")
+    symbols = list(data)
+
+    index = None
+    for frame in data.values():
+        frame_index = pd.DatetimeIndex(pd.to_datetime(frame.index))
+        index = frame_index if index is None else index.intersection(frame_index)
+    if len(index) == 0:
+        raise ValueError("Symbols share no common timestamps")
+
+    opens, closes, sigs = [], [], []
+    for symbol in symbols:
+        frame = data[symbol].set_axis(pd.DatetimeIndex(pd.to_datetime(data[symbol].index)))
+        if isinstance(signals, pd.DataFrame):
+            symbol_signals = signals[symbol].set_axis(pd.DatetimeIndex(pd.to_datetime(signals.index)))
+        else:
+            values = np.full(len(frame), 0.5)
+            k = min(len(signals[symbol]), len(frame))
+            values[:k] = np.asarray(signals[symbol][:k], dtype=float).ravel()
+            symbol_signals = pd.Series(values, index=frame.index)
+        opens.append(frame['open'].reindex(index).to_numpy(dtype=float))
+        closes.append(frame['close'].reindex(index).to_numpy(dtype=float))
+        # Missing signals mean "keep the current state"
+        sigs.append(symbol_signals.reindex(index).fillna(0.5).to_numpy(dtype=float))
+
+    return index, symbols, np.column_stack(opens), np.column_stack(closes), np.column_stack(sigs)
+
+
+def simulate_portfolio(
+    index: pd.DatetimeIndex,
+    symbols: List[str],
+    open_: np.ndarray,
+    close: np.ndarray,
+    signals: np.ndarray,
+    initial_cash: float = 10000.0,
+    commission: float = 0.001,
+    position_size: float = 0.1,
+    take_profit: Optional[float] = None,
+    stop_loss: Optional[float] = None,
+) -> PortfolioBacktestResult:
+    """
+    Simulate the signal strategy on every symbol against one cash account
+
+    Each column follows the single-symbol rules of simulate_signal_strategy:
+    decisions at bar i fill at the open of bar i+1, take-profit and
+    stop-loss exits are checked against each bar's close relative to the
+    entry fill, and an entry buys ``cash * position_size / close`` units,
+    where ``cash`` is the shared balance at the decision bar. Fill bars
+    depend on a symbol's own prices and signals only, so they are found
+    per column first. Exits of a bar fill before its entries; if the
+    entries of one bar together cost more than the cash left they are
+    scaled down pro rata instead of being rejected.
+
+    Cash only changes on bars where some symbol fills, so the loop visits
+    those bars only and handles all symbols of a bar at once; the per-bar
+    position, equity and attribution matrices are then filled in by
+    forward-filling those event rows.
+    """
+    n, m = close.shape
+    change = np.zeros((n, m), dtype=np.int8)
+    for j in range(m):
+        entries, exits = trade_bars(open_[:, j], close[:, j], signals[:, j], take_profit, stop_loss)
+        change[entries, j] = 1
+        change[exits, j] = -1
+    event_bars = np.flatnonzero(change.any(axis=1))
+
+    units = np.zeros(m)
+    cost = np.zeros(m)
+    cash = float(initial_cash)
+    event_units = np.zeros((len(event_bars), m))
+    event_cash = np.zeros(len(event_bars))
+    flows = np.zeros((n, m))
+    trade_symbols, pnlcomm = [], []
+    trades_opened = np.zeros(m, dtype=np.intp)
+
+    for e, bar in enumerate(event_bars):
+        price = open_[bar]
+        decision_cash = cash
+
+        sells = np.flatnonzero(change[bar] == -1)
+        if len(sells):
+            proceeds = units[sells] * price[sells] * (1.0 - commission)
+            flows[bar, sells] = proceeds
+            trade_symbols.extend(sells)
+            pnlcomm.extend(proceeds - cost[sells])
+            cash += proceeds.sum()
+            units[sells] = 0.0
+            cost[sells] = 0.0
+
+        buys = np.flatnonzero(change[bar] == 1)
+        if len(buys):
+            size = decision_cash * position_size / close[bar - 1, buys]
+            outlay = size * price[buys] * (1.0 + commission)
+            total = outlay.sum()
+            if total > cash:
+                scale = max(cash, 0.0) / total
+                size *= scale
+                outlay *= scale
+            units[buys] = size
+            cost[buys] = outlay
+            flows[bar, buys] = -outlay
+            trades_opened[buys] += 1
+            cash -= outlay.sum()
+
+        event_units[e] = units
+        event_cash[e] = cash
+
+    last_event = np.searchsorted(event_bars, np.arange(n), side='right') - 1
+    before_first = last_event < 0
+    positions = event_units[np.maximum(last_event, 0)] if len(event_bars) else np.zeros((n, m))
+    positions[before_first] = 0.0
+    cash_path = event_cash[np.maximum(last_event, 0)] if len(event_bars) else np.zeros(n)
+    cash_path[before_first] = initial_cash
+
+    market_value = positions * close
+    # Net PnL per symbol so far: realized cash flows plus open marked value
+    symbol_pnl = np.cumsum(flows, axis=0) + market_value
+
+    return PortfolioBacktestResult(
+        index=index,
+        symbols=symbols,
+        equity=cash_path + market_value.sum(axis=1),
+        cash=cash_path,
+        positions=positions,
+        symbol_pnl=symbol_pnl,
+        trade_symbols=np.asarray(trade_symbols, dtype=np.intp),
+        pnlcomm=np.asarray(pnlcomm, dtype=float),
+        trades_opened=trades_opened,
+    )
+
+
+def run_portfolio_backtest(
+    data: Dict[str, pd.DataFrame],
+    signals: Union[pd.DataFrame, Dict[str, List[float]]],
+    initial_cash: float = 10000.0,
+    commission: float = 0.001,
+    position_size: float = 0.1,
+    take_profit: Optional[float] = None,
+    stop_loss: Optional[float] = None,
+) -> PortfolioBacktestResult:
+    """
+    Backtest several symbols in one pass over a shared cash account
+
+    Args:
+        data: Symbol -> OHLCV DataFrame
+        signals: Symbol -> ML signals aligned with that symbol's rows, or a
+            timestamp-indexed DataFrame with one signal column per symbol
+        initial_cash: Starting capital shared by all symbols
+        commission: Percentage fee charged on every fill's notional
+        position_size: Fraction of cash committed per entry
+        take_profit: Exit once close rises this fraction above entry
+        stop_loss: Exit once close falls this fraction below entry
+
+    Returns:
+        PortfolioBacktestResult with per-bar equity, positions and attribution
+    """
+    index, symbols, open_, close, sig = align_portfolio(data, signals)
+    return simulate_portfolio(
+        index, symbols, open_, close, sig,
+        initial_cash=initial_cash,
+        commission=commission,
+        position_size=position_size,
+        take_profit=take_profit,
+        stop_loss=stop_loss,
+    )
+
+
+def compute_portfolio_metrics(result: PortfolioBacktestResult, initial_cash: float) -> Dict:
+    """
+    Portfolio metrics plus per-symbol attribution
+
+    Drawdown is measured on the combined equity curve, so offsetting moves
+    of correlated or anti-correlated symbols net out bar by bar. Each
+    symbol's ``drawdown_contribution`` is its PnL change between the peak
+    and the trough of that max drawdown; the contributions sum to the
+    portfolio's loss over the same span.
+    """
+    metrics = summary_metrics(
+        result.index, result.equity, int(result.trades_opened.sum()), result.pnlcomm, initial_cash
+    )
+
+    equity = result.equity
+    peak = np.maximum.accumulate(equity)
+    trough_bar = int(np.argmax((peak - equity) / peak))
+    peak_bar = int(np.argmax(equity[:trough_bar + 1]))
+    drawdown_pnl = result.symbol_pnl[trough_bar] - result.symbol_pnl[peak_bar]
+
+    bar_pnl = np.diff(result.symbol_pnl, axis=0, prepend=0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = np.atleast_2d(np.corrcoef(bar_pnl, rowvar=False))
+    # Symbols that never traded have no variance; report them as uncorrelated
+    correlation = np.nan_to_num(correlation)
+    np.fill_diagonal(correlation, 1.0)
+
+    attribution = {}
+    for j, symbol in enumerate(result.symbols):
+        closed = result.pnlcomm[result.trade_symbols == j]
+        pnl = float(result.symbol_pnl[-1, j])
+        attribution[symbol] = {
+            'pnl': pnl,
+            'contribution': pnl / initial_cash,
+            'total_trades': int(result.trades_opened[j]),
+            'win_rate': int((closed >= 0.0).sum()) / max(int(result.trades_opened[j]), 1),
+            'final_position': float(result.positions[-1, j]),
+            'drawdown_contribution': float(drawdown_pnl[j]),
+        }
+
+    metrics['symbols'] = list(result.symbols)
+    metrics['attribution'] = attribution
+    metrics['correlation'] = {
+        symbol: dict(zip(result.symbols, correlation[j].tolist()))
+        for j, symbol in enumerate(result.symbols)
+    }
+    return metrics
@@ -48,6 +48,26 @@ portfolio_value = Gauge(
     'Current portfolio value'
 )
 
+inference_batch_size = Histogram(
+    'inference_batch_size',
+    'Samples per batched model predict call',
+    ['model'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+inference_latency = Histogram(
+    'inference_latency_seconds',
+    'Time from prediction request to result, including batching wait',
+    ['model'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, float('inf'))
+)
+
+inference_requests = Counter(
+    'inference_requests_total',
+    'Prediction requests served by micro-batchers',
+    ['model']
+)
+
 active_grid_orders = Gauge(
     'active_grid_orders_total',
     'Number of active grid orders',
@@ -0,0 +1,234 @@
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.database import SessionLocal
+from app.db.models import MLSignal
+from app.services.feature_store import DEFAULT_FEATURE_SET, WARMUP_BARS, FeatureStore
+
+if TYPE_CHECKING:
+    from app.services.ml_signal_service import MLSignalService
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_COLUMNS = ['lstm', 'rf', 'ensemble']
+_UNIQUE_BAR = ['symbol', 'model_name', 'model_version', 'signal_timestamp']
+
+
+def _utc(index: Sequence) -> pd.DatetimeIndex:
+    """Bar timestamps as a UTC index; naive timestamps are taken as UTC"""
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+
+
+class SignalStore:
+    """
+    Per-bar model predictions persisted in ``ml_signals``
+
+    Rows are keyed on (symbol, model name, model version, bar), so a
+    version's prediction for a bar is computed once and then served from
+    the table by every later backtest or dashboard read. A bar keeps the
+    prediction first computed for it.
+
+    That is only sound if the prediction does not depend on the bars a
+    caller asked for, so ``signals`` stores a bar only when its features
+    come from ``feature_store``'s full history of the symbol and its
+    rolling windows, EMAs and LSTM window are warmed up there.
+
+    Args:
+        session_factory: Session factory of the database holding ``ml_signals``
+        batch_size: Rows per bulk INSERT statement
+        feature_store: History the stored predictions are computed over;
+            without one, ``signals`` stores nothing
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        batch_size: int = 5000,
+        feature_store: Optional[FeatureStore] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.feature_store = feature_store
+
+    @staticmethod
+    def _insert(db: Session) -> Any:
+        """INSERT that skips bars another writer stored first"""
+        dialect = db.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return insert(MLSignal)
+        return dialect_insert(MLSignal).on_conflict_do_nothing(index_elements=_UNIQUE_BAR)
+
+    def write(
+        self,
+        symbol: str,
+        model_name: str,
+        model_version: int,
+        timestamps: Sequence,
+        predictions: Dict[str, Optional[np.ndarray]],
+    ) -> int:
+        """
+        Bulk insert predictions for a run of bars
+
+        Args:
+            symbol: Traded symbol
+            model_name: Registry name of the model
+            model_version: Registry version of the model
+            timestamps: Bar timestamps
+            predictions: ``{'lstm', 'rf', 'ensemble'}`` arrays aligned with
+                ``timestamps``, as returned by ``MLSignalService.predict_components``;
+                None stores NULL for a model that is not trained
+
+        Returns:
+            Number of rows sent
+        """
+        bars = _utc(timestamps).to_pydatetime()
+        columns = {
+            'lstm_prediction': predictions.get('lstm'),
+            'rf_prediction': predictions.get('rf'),
+            'ensemble_signal': predictions.get('ensemble'),
+        }
+        columns = {name: [None] * len(bars) if values is None else np.asarray(values, dtype=float).tolist()
+                   for name, values in columns.items()}
+        rows: List[Dict[str, Any]] = [
+            {
+                'symbol': symbol,
+                'model_name': model_name,
+                'model_version': model_version,
+                'signal_timestamp': bar,
+                **{name: values[k] for name, values in columns.items()},
+            }
+            for k, bar in enumerate(bars)
+        ]
+
+        with self.session_factory() as db:
+            statement = self._insert(db)
+            # One executemany per chunk instead of an ORM flush per row
+            for start in range(0, len(rows), self.batch_size):
+                db.execute(statement, rows[start:start + self.batch_size])
+            db.commit()
+        logger.debug(f"Stored {len(rows)} {model_name}:{model_version} signals for {symbol}")
+        return len(rows)
+
+    def read(
+        self,
+        symbol: str,
+        model_name: str,
+        model_version: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Stored predictions of a model version over ``[start, end]``
+
+        Returns:
+            ``lstm``, ``rf`` and ``ensemble`` columns on a UTC bar index;
+            NaN where a model was not trained
+        """
+        query = select(
+            MLSignal.signal_timestamp, MLSignal.lstm_prediction, MLSignal.rf_prediction, MLSignal.ensemble_signal,
+        ).where(
+            MLSignal.symbol == symbol,
+            MLSignal.model_name == model_name,
+            MLSignal.model_version == model_version,
+        )
+        if start is not None:
+            query = query.where(MLSignal.signal_timestamp >= _utc([start])[0].to_pydatetime())
+        if end is not None:
+            query = query.where(MLSignal.signal_timestamp <= _utc([end])[0].to_pydatetime())
+
+        with self.session_factory() as db:
+            rows = db.execute(query.order_by(MLSignal.signal_timestamp)).all()
+        frame = pd.DataFrame([row[1:] for row in rows], columns=SIGNAL_COLUMNS, dtype=float)
+        frame.index = _utc([row[0] for row in rows])
+        return frame
+
+    def signals(
+        self,
+        service: 'MLSignalService',
+        data: pd.DataFrame,
+        symbol: str,
+        model_name: str,
+        model_version: int,
+        timeframe: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Read-through predictions of a trained model for every bar of ``data``
+
+        Stored bars come from the table. Missing bars are predicted from
+        the feature store's rows of ``symbol`` (appending the new bars of
+        ``data`` first), so a bar gets the same features whatever range it
+        is requested in; only the missing bars (and their LSTM windows) run
+        through the models. Those at least ``WARMUP_BARS + lookback_period``
+        rows into the stored history are then written.
+
+        Bars the store cannot provide (no feature store, another feature
+        set, or bars before the stored history) are predicted from ``data``
+        alone, on the training feature scale, and not written.
+
+        Args:
+            service: Trained service of ``model_name:model_version``, with a
+                fitted scaler
+            data: OHLCV bars
+            symbol: Traded symbol
+            model_name: Registry name of the model
+            model_version: Registry version of the model
+            timeframe: Bar length, for duration features; the service's
+                training timeframe by default
+
+        Returns:
+            ``lstm``, ``rf`` and ``ensemble`` columns on ``data``'s index
+
+        Raises:
+            ValueError: If a default-set model's MACD scale is unknown
+        """
+        bars = _utc(data.index)
+        if not len(bars):
+            return pd.DataFrame(columns=SIGNAL_COLUMNS, index=data.index, dtype=float)
+        timeframe = timeframe or service.timeframe
+
+        stored = self.read(symbol, model_name, model_version, bars.min(), bars.max())
+        missing = np.flatnonzero(~bars.isin(stored.index))
+        written = 0
+        if len(missing):
+            located = None
+            if self.feature_store is not None and service.feature_set == DEFAULT_FEATURE_SET:
+                located = self.feature_store.lookup(symbol, timeframe, data)
+            if located is None:
+                X = service.serving_features(data, timeframe)
+                predictions = service.predict_components(service.scaler.transform(X), missing)
+            else:
+                features, rows = located
+                rows = rows[missing]
+                # Only the rows of the missing bars and their LSTM windows
+                start = max(int(rows.min()) - service.lookback_period, 0)
+                X = service.finish_raw(features.raw[start:rows.max() + 1])
+                predictions = service.predict_components(service.scaler.transform(X), rows - start)
+                warm = rows >= WARMUP_BARS + service.lookback_period
+                written = self.write(
+                    symbol, model_name, model_version, bars[missing[warm]],
+                    {name: None if values is None else values[warm] for name, values in predictions.items()},
+                )
+            computed = pd.DataFrame(
+                {name: np.nan if predictions[name] is None else predictions[name] for name in SIGNAL_COLUMNS},
+                index=bars[missing],
+            )
+            stored = pd.concat([stored, computed])
+        logger.info(
+            f"{symbol} {model_name}:{model_version} signals: "
+            f"{len(bars) - len(missing)} stored, {len(missing)} computed, {written} written"
+        )
+
+        signals = stored.reindex(bars)
+        signals.index = data.index
+        return signals
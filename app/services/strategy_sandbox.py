@@ -0,0 +1,500 @@
+from __future__ import annotations
+
+import ast
+import builtins
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import Future, as_completed
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.schemas.strategy import StrategyRunResult
+
+logger = logging.getLogger(__name__)
+
+# Modules strategy code may import (top-level package names)
+ALLOWED_MODULES = frozenset({"math", "statistics", "numpy", "pandas"})
+
+# The only attribute names strategy code may use, on modules and values alike.
+# Anything else (file readers such as np.fromregex or pd.read_csv, writers,
+# submodules, string-dispatching helpers such as apply/agg/eval/format) is
+# rejected, since the check cannot tell which object an attribute is read from.
+ALLOWED_ATTRIBUTES = frozenset({
+    # math / statistics
+    "ceil", "e", "exp", "fabs", "floor", "fmean", "inf", "isfinite", "isnan", "log", "log10", "log1p",
+    "mean", "median", "nan", "pi", "pstdev", "pvariance", "sqrt", "stdev", "tanh", "variance",
+    # numpy functions and constants
+    "abs", "absolute", "all", "any", "arange", "argmax", "argmin", "argsort", "array", "asarray",
+    "bool_", "clip", "column_stack", "concatenate", "convolve", "corrcoef", "cos", "count_nonzero",
+    "cov", "cumprod", "cumsum", "diff", "divide", "empty", "empty_like", "float32", "float64", "full",
+    "full_like", "hstack", "int32", "int64", "interp", "isclose", "linspace", "logical_and",
+    "logical_not", "logical_or", "max", "maximum", "min", "minimum", "multiply", "nan_to_num",
+    "nanmax", "nanmean", "nanmin", "nanstd", "nansum", "ones", "ones_like", "percentile", "polyfit",
+    "power", "prod", "quantile", "ravel", "repeat", "reshape", "roll", "round", "sign", "sin", "sort",
+    "square", "stack", "std", "subtract", "sum", "tile", "unique", "var", "vstack", "where", "zeros",
+    "zeros_like",
+    # numpy random generators
+    "choice", "default_rng", "integers", "normal", "random", "standard_normal", "uniform",
+    # pandas constructors and helpers
+    "DataFrame", "Series", "Timedelta", "Timestamp", "concat", "isna", "notna",
+    # array, Series and DataFrame attributes and methods
+    "astype", "at", "between", "bfill", "columns", "copy", "corr", "count", "cummax", "cummin",
+    "dropna", "dt", "dtype", "ewm", "expanding", "ffill", "fillna", "head", "iat", "idxmax", "idxmin",
+    "iloc", "index", "isnull", "loc", "mask", "name", "ndim", "nlargest", "notnull", "nsmallest",
+    "nunique", "pct_change", "rank", "reindex", "replace", "rolling", "shape", "shift", "size",
+    "sort_index", "sort_values", "tail", "to_dict", "to_frame", "to_list", "to_numpy", "to_series",
+    "tolist", "value_counts", "values",
+    "add", "div", "eq", "ge", "gt", "le", "lt", "mul", "ne", "pow", "sub",
+    # datetime fields of the .dt accessor and timestamps
+    "date", "day", "dayofweek", "hour", "minute", "month", "year",
+    # list and dict methods
+    "append", "extend", "get", "insert", "items", "keys", "pop",
+})
+
+_SAFE_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        "abs", "all", "any", "bool", "dict", "divmod", "enumerate", "filter", "float", "int",
+        "isinstance", "len", "list", "map", "max", "min", "pow", "range", "reversed", "round",
+        "set", "slice", "sorted", "str", "sum", "tuple", "zip",
+        "ArithmeticError", "Exception", "IndexError", "KeyError", "ValueError", "ZeroDivisionError",
+    )
+}
+
+# Environment applied to workers before NumPy loads: one BLAS thread per worker
+_WORKER_ENV = {"OMP_NUM_THREADS": "1", "OPENBLAS_NUM_THREADS": "1", "MKL_NUM_THREADS": "1"}
+# Inherited variables a worker keeps; the rest (API keys, database URLs...) are dropped
+_WORKER_ENV_KEEP = frozenset({"HOME", "LANG", "LC_ALL", "LC_CTYPE", "PATH", "TMPDIR", "TZ"})
+
+
+class StrategyCPUTimeExceeded(Exception):
+    """Raised inside a worker when a job uses up its CPU-time budget."""
+
+
+def check_strategy_code(code: str) -> List[str]:
+    """Problems that keep ``code`` from running in the sandbox (empty if none).
+
+    Strategy code must define ``generate_signals(data)``. Only the modules
+    in ALLOWED_MODULES can be imported, by their plain names, and only the
+    attribute names in ALLOWED_ATTRIBUTES can be read or imported from them.
+    Dunder names, attribute assignment and class definitions are rejected.
+    This is a first line of defence; the worker's scrubbed environment,
+    resource limits and process boundary contain code that gets past it.
+    """
+    try:
+        tree = ast.parse(code, "<strategy>")
+    except SyntaxError as exc:
+        return [f"line {exc.lineno}: {exc.msg}"]
+
+    problems = []
+    for node in ast.walk(tree):
+        line = getattr(node, "lineno", "?")
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [node.module or ""] if not node.level else ["."]
+            for alias in node.names:
+                if alias.name not in ALLOWED_ATTRIBUTES:
+                    problems.append(f"line {line}: import of {alias.name!r} is not allowed")
+        else:
+            names = []
+        for name in names:
+            # Plain module names only: submodules such as numpy.lib hold the file readers
+            if name not in ALLOWED_MODULES:
+                problems.append(f"line {line}: import of {name!r} is not allowed")
+
+        if isinstance(node, ast.Attribute):
+            attr = node.attr
+            if attr.startswith("__"):
+                problems.append(f"line {line}: dunder attribute {attr!r} is not allowed")
+            elif attr not in ALLOWED_ATTRIBUTES:
+                problems.append(f"line {line}: attribute {attr!r} is not allowed")
+            if isinstance(node.ctx, (ast.Store, ast.Del)):
+                problems.append(f"line {line}: assigning attributes is not allowed")
+        elif isinstance(node, ast.Name) and node.id.startswith("__"):
+            problems.append(f"line {line}: dunder name {node.id!r} is not allowed")
+        elif isinstance(node, ast.ClassDef):
+            problems.append(f"line {line}: class definitions are not allowed")
+
+    if not any(isinstance(node, ast.FunctionDef) and node.name == "generate_signals" for node in tree.body):
+        problems.append("generate_signals(data) is not defined")
+    return problems
+
+
+def _import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name not in ALLOWED_MODULES:
+        raise ImportError(f"import of {name!r} is not allowed")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+def run_strategy_code(
+    code: str,
+    data: Any,
+    initial_capital: float = 10000.0,
+    commission: float = 0.001,
+) -> Dict[str, Any]:
+    """Execute strategy code on OHLCV data and backtest its signals.
+
+    ``generate_signals(data)`` returns one value per bar; above 0.5 goes
+    long and below 0.5 exits, as in BacktestStrategy. Runs in the calling
+    process: use StrategySandbox for untrusted code.
+    """
+    import numpy as np
+
+    from app.services.vectorized_backtest import compute_metrics, run_vectorized_backtest
+
+    problems = check_strategy_code(code)
+    if problems:
+        raise ValueError("; ".join(problems))
+
+    namespace: Dict[str, Any] = {"__builtins__": {**_SAFE_BUILTINS, "__import__": _import}, "__name__": "strategy"}
+    exec(compile(code, "<strategy>", "exec"), namespace)
+    signals = np.asarray(namespace["generate_signals"](data.copy()), dtype=float).ravel()
+    if len(signals) != len(data):
+        raise ValueError(f"generate_signals returned {len(signals)} values for {len(data)} bars")
+
+    # Exits come from the strategy's signals only
+    result = run_vectorized_backtest(
+        data, signals, initial_cash=initial_capital, commission=commission, take_profit=None, stop_loss=None,
+    )
+    metrics = compute_metrics(result, initial_capital)
+    index = result.index
+    trades = []
+    for k, bar in enumerate(result.entry_bars):
+        trades.append({"timestamp": index[bar], "side": "buy", "price": float(result.entry_prices[k]), "size": float(result.sizes[k])})
+        if k < len(result.exit_bars):
+            bar = result.exit_bars[k]
+            trades.append({"timestamp": index[bar], "side": "sell", "price": float(result.exit_prices[k]), "size": float(result.sizes[k])})
+    return {
+        "total_return": metrics["total_return"],
+        "max_drawdown": metrics["max_drawdown"] / 100.0,
+        "sharpe": metrics["sharpe_ratio"],
+        "trades": trades,
+    }
+
+
+def _on_cpu_limit(signum, frame):
+    raise StrategyCPUTimeExceeded("CPU time limit exceeded")
+
+
+def _limit_resources(memory_bytes: Optional[int]) -> None:
+    import resource
+
+    # Writes to regular files fail with EFBIG instead of killing the worker
+    signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    if memory_bytes:
+        try:
+            with open("/proc/self/statm") as statm:
+                baseline = int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            baseline = 0
+        # Budget on top of the warmed-up interpreter, whose size varies by platform
+        limit = baseline + memory_bytes
+        resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+
+def _set_cpu_budget(cpu_seconds: Optional[float]) -> None:
+    import resource
+
+    if not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, resource.getrlimit(resource.RLIMIT_CPU)[1]))
+
+
+def _scrub_environment() -> None:
+    """Drop the inherited environment except _WORKER_ENV_KEEP.
+
+    Clearing ``os.environ`` leaves the original block that
+    /proc/self/environ reads, so on Linux that block is zeroed too.
+    """
+    keep = {name: value for name, value in os.environ.items() if name in _WORKER_ENV_KEEP}
+    os.environ.clear()
+    try:
+        with open("/proc/self/stat") as stat:
+            # Fields after the command name start at field 3; env_start and env_end are 50 and 51
+            fields = stat.read().rsplit(")", 1)[1].split()
+        start, end = int(fields[47]), int(fields[48])
+    except (OSError, IndexError, ValueError):
+        start = end = 0
+    if end > start:
+        import ctypes
+
+        # Nothing points into the block any more: the clear above unset every variable
+        ctypes.memset(start, 0, end - start)
+    os.environ.update(keep)
+
+
+def _worker_main(conn: Connection, cpu_seconds: Optional[float], memory_bytes: Optional[int]) -> None:
+    """Sandbox worker: warm up, then run jobs received on ``conn`` until told to stop."""
+    _scrub_environment()
+    os.environ.update(_WORKER_ENV)
+    # Warm-up: every job reuses these imports
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import app.services.vectorized_backtest  # noqa: F401
+
+    os.chdir(tempfile.mkdtemp(prefix="strategy-"))
+    if os.name == "posix":
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        _limit_resources(memory_bytes)
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        code, data, initial_capital, commission = job
+        try:
+            if os.name == "posix":
+                _set_cpu_budget(cpu_seconds)
+            reply = ("ok", run_strategy_code(code, data, initial_capital, commission))
+        except StrategyCPUTimeExceeded:
+            reply = ("error", f"CPU time limit of {cpu_seconds}s exceeded")
+        except MemoryError:
+            reply = ("error", f"Memory limit of {memory_bytes} bytes exceeded")
+        except Exception as exc:
+            reply = ("error", "".join(traceback.format_exception_only(type(exc), exc)).strip())
+        conn.send(reply)
+
+
+@dataclass
+class _Worker:
+    process: Any
+    conn: Connection
+    ready: bool = False
+    jobs_run: int = 0
+    job: Optional[Tuple[Future, Tuple]] = None
+    deadline: float = field(default=float("inf"))
+
+
+class StrategySandbox:
+    """Pool of isolated, pre-warmed subprocesses running user strategy code.
+
+    Workers are spawned (never forked from the API process), import NumPy,
+    pandas and the vectorized engine once, then take jobs one at a time
+    under per-job limits:
+
+    - ``cpu_seconds``: RLIMIT_CPU budget, reported as a job error
+    - ``memory_bytes``: address space on top of the warmed-up worker
+    - ``wall_seconds``: the dispatcher kills the worker (sleeping or
+      stuck code burns no CPU)
+
+    A worker is replaced after ``max_jobs_per_worker`` jobs or whenever it
+    dies, and its replacement warms up while the other workers keep
+    running, so spawn cost stays off the job path. A dispatcher thread owns
+    all workers; ``submit`` is thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cpu_seconds: Optional[float] = 30.0,
+        memory_bytes: Optional[int] = 512 * 1024 * 1024,
+        wall_seconds: Optional[float] = 60.0,
+        max_jobs_per_worker: int = 50,
+    ) -> None:
+        self.max_workers = max_workers or max((os.cpu_count() or 2) // 2, 1)
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.wall_seconds = wall_seconds
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs: "queue.Queue[Tuple[Future, Tuple]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._wakeup_r: Optional[Connection] = None
+        self._wakeup_w: Optional[Connection] = None
+        self._stopping = False
+
+    def __enter__(self) -> "StrategySandbox":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def start(self) -> None:
+        """Spawn and warm up the workers (also done by the first submit)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._wakeup_r, self._wakeup_w = self._context.Pipe(duplex=False)
+            self._thread = threading.Thread(target=self._dispatch, name="strategy-sandbox", daemon=True)
+            self._thread.start()
+
+    def submit(
+        self,
+        code: str,
+        data: Any,
+        initial_capital: float = 10000.0,
+        commission: float = 0.001,
+    ) -> "Future[StrategyRunResult]":
+        """Queue one strategy run; the future resolves to its StrategyRunResult."""
+        self.start()
+        future: Future = Future()
+        problems = check_strategy_code(code)
+        if problems:
+            future.set_result(_failed("; ".join(problems)))
+            return future
+        self._jobs.put((future, (code, data, initial_capital, commission)))
+        self._wake()
+        return future
+
+    def run_many(self, jobs: Iterable[Dict[str, Any]]) -> Iterator[Tuple[int, StrategyRunResult]]:
+        """Yield ``(position, result)`` for each job as soon as it finishes.
+
+        Each job is a dict of ``submit`` keyword arguments.
+        """
+        futures = {self.submit(**job): position for position, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    def shutdown(self) -> None:
+        """Stop the workers; queued jobs that have not started fail."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._stopping = True
+            self._wake()
+        thread.join()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def _wake(self) -> None:
+        try:
+            self._wakeup_w.send_bytes(b"\0")
+        except (AttributeError, OSError):
+            pass
+
+    def _spawn(self) -> _Worker:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child, self.cpu_seconds, self.memory_bytes),
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        return _Worker(process, parent)
+
+    def _retire(self, worker: _Worker, kill: bool = False) -> None:
+        if kill:
+            worker.process.kill()
+        else:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        worker.process.join(5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        worker.conn.close()
+
+    def _dispatch(self) -> None:
+        workers = [self._spawn() for _ in range(self.max_workers)]
+        try:
+            while not self._stopping:
+                self._assign(workers)
+                now = time.monotonic()
+                timeout = min([w.deadline - now for w in workers if w.job] + [1.0])
+                ready = wait(
+                    [self._wakeup_r] + [w.conn for w in workers] + [w.process.sentinel for w in workers],
+                    max(timeout, 0.0),
+                )
+                if self._wakeup_r in ready:
+                    while self._wakeup_r.poll():
+                        self._wakeup_r.recv_bytes()
+                for k, worker in enumerate(workers):
+                    replace = False
+                    if worker.conn in ready:
+                        try:
+                            status, payload = worker.conn.recv()
+                        except (EOFError, OSError):
+                            status, payload = "died", None
+                        if status == "ready":
+                            worker.ready = True
+                        elif status == "died":
+                            replace = True
+                        else:
+                            future, _ = worker.job
+                            worker.job, worker.deadline = None, float("inf")
+                            worker.jobs_run += 1
+                            future.set_result(StrategyRunResult(**payload) if status == "ok" else _failed(payload))
+                            replace = worker.jobs_run >= self.max_jobs_per_worker
+                    if worker.process.sentinel in ready and not worker.process.is_alive():
+                        replace = True
+                    if worker.job and time.monotonic() >= worker.deadline:
+                        worker.job[0].set_result(_failed(f"Wall-clock limit of {self.wall_seconds}s exceeded"))
+                        worker.job = None
+                        self._retire(worker, kill=True)
+                        workers[k] = self._spawn()
+                        continue
+                    if replace:
+                        if worker.job:
+                            code = worker.process.exitcode
+                            worker.job[0].set_result(_failed(f"Strategy worker exited with code {code}"))
+                            worker.job = None
+                        self._retire(worker, kill=not worker.process.is_alive())
+                        workers[k] = self._spawn()
+        finally:
+            for worker in workers:
+                if worker.job:
+                    worker.job[0].set_result(_failed("Strategy sandbox shut down"))
+                self._retire(worker, kill=bool(worker.job))
+            while True:
+                try:
+                    future, _ = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                future.set_result(_failed("Strategy sandbox shut down"))
+
+    def _assign(self, workers: List[_Worker]) -> None:
+        for worker in workers:
+            if not worker.ready or worker.job is not None:
+                continue
+            try:
+                future, job = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                worker.conn.send(job)
+            except OSError as exc:
+                future.set_result(_failed(f"Could not send job to strategy worker: {exc}"))
+                continue
+            worker.job = (future, job)
+            if self.wall_seconds:
+                worker.deadline = time.monotonic() + self.wall_seconds
+
+
+def _failed(error: str) -> StrategyRunResult:
+    return StrategyRunResult(total_return=0.0, max_drawdown=0.0, sharpe=None, trades=[], error=error)
+
+
+_default_sandbox: Optional[StrategySandbox] = None
+
+
+def default_strategy_sandbox() -> StrategySandbox:
+    """Process-wide sandbox, created on first use."""
+    global _default_sandbox
+    if _default_sandbox is None:
+        _default_sandbox = StrategySandbox()
+    return _default_sandbox
@@ -1,9 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timezone
+import asyncio
 import logging
-from typing import List
 
-from app.schemas.strategy import StrategyRunRequest, StrategyRunResult, Trade
+from app.schemas.strategy import StrategyRunRequest, StrategyRunResult
+from app.services.data_service import DataService
+from app.services.strategy_sandbox import check_strategy_code, default_strategy_sandbox
 
 logger = logging.getLogger(__name__)
 
@@ -11,62 +12,38 @@ async def run_backtest(
     db: AsyncSession,
     request: StrategyRunRequest
 ) -> StrategyRunResult:
-    """Run a backtest with the given strategy."""
+    """Run a backtest with the given strategy in the strategy sandbox."""
     try:
         logger.info("Running backtest for %s", request.symbol)
         
-        # TODO: Implement actual backtest logic
-        # Mock data for now
-        mock_trades: List[Trade] = [
-            Trade(
-                timestamp=datetime.now(timezone.utc),
-                side="buy",
-                price=50000.0,
-                size=0.1
-            ),
-            Trade(
-                timestamp=datetime.now(timezone.utc),
-                side="sell",
-                price=51000.0,
-                size=0.1
-            )
-        ]
-        
-        return StrategyRunResult(
-            total_return=0.05,  # 5% return
-            max_drawdown=0.02,  # 2% drawdown
-            sharpe=1.5,
-            trades=mock_trades
+        data = await DataService().get_historical_data(
+            request.symbol,
+            request.start,
+            request.end,
+            request.timeframe
         )
+        if data.empty:
+            raise ValueError(f"No candles for {request.symbol} between {request.start} and {request.end}")
+        
+        future = default_strategy_sandbox().submit(request.strategy_code, data, request.initial_capital)
+        return await asyncio.wrap_future(future)
     except Exception as exc:
         logger.error("Error running backtest: %s", exc)
         return StrategyRunResult(
             total_return=0.0,
             max_drawdown=0.0,
             sharpe=None,
-            trades=[]
+            trades=[],
+            error=str(exc)
         )
 
 async def validate_strategy_code(code: str) -> bool:
-    """Validate strategy code for security."""
+    """Validate strategy code against the sandbox rules."""
     try:
-        # Basic validation - prevent dangerous imports/functions
-        dangerous_keywords = [
-            "import os",
-            "import sys",
-            "exec(",
-            "eval(",
-            "__import__",
-            "open(",
-            "file("
-        ]
-        
-        for keyword in dangerous_keywords:
-            if keyword in code:
-                logger.warning("Dangerous keyword detected: %s", keyword)
-                return False
-        
-        return True
+        problems = check_strategy_code(code)
+        for problem in problems:
+            logger.warning("Strategy code rejected: %s", problem)
+        return not problems
     except Exception as exc:
         logger.error("Error validating strategy code: %s", exc)
         return False
@@ -0,0 +1,313 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+
+from app.strategies.arbitrage import ArbitrageStrategy
+from app.strategies.dca_strategy import DCAStrategy
+from app.strategies.grid_trading import GridTradingStrategy
+from app.services.vectorized_backtest import summary_metrics
+
+logger = logging.getLogger(__name__)
+
+# Bars scanned by the first probe for the next fill; doubled on every miss
+_FIRST_SCAN = 64
+
+
+class SimulatedClock:
+    """Stand-in for ``datetime.now`` that returns the bar being replayed"""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+@dataclass
+class StrategySimulationResult:
+    """Per-bar account state and closed-trade PnL of a simulated strategy"""
+    index: pd.DatetimeIndex
+    equity: np.ndarray
+    cash: np.ndarray
+    position: np.ndarray
+    trade_pnl: np.ndarray
+    total_trades: int
+    rejected_orders: int = 0
+
+
+def _bars(data: pd.DataFrame) -> Tuple[pd.DatetimeIndex, Dict[str, np.ndarray]]:
+    index = pd.DatetimeIndex(data.index)
+    columns = {name: data[name].to_numpy(dtype=float) for name in ('open', 'high', 'low', 'close')}
+    return index, columns
+
+
+def _step_state(n_bars: int, event_bars: List[int], *states: List[float]) -> List[np.ndarray]:
+    """Forward-fill account state recorded at event bars onto every bar"""
+    held = np.searchsorted(np.asarray(event_bars), np.arange(n_bars), side='right') - 1
+    return [np.asarray(values)[held] for values in states]
+
+
+def _first_touch(
+    lows: np.ndarray,
+    highs: np.ndarray,
+    start: int,
+    max_buy: float,
+    min_sell: float,
+) -> Optional[int]:
+    """First bar from ``start`` whose range reaches a buy or sell level"""
+    n_bars = len(lows)
+    span = _FIRST_SCAN
+    while start < n_bars:
+        stop = min(start + span, n_bars)
+        hit = np.flatnonzero((lows[start:stop] <= max_buy) | (highs[start:stop] >= min_sell))
+        if len(hit):
+            return start + int(hit[0])
+        start = stop
+        span *= 2
+    return None
+
+
+def simulate_grid(
+    strategy: GridTradingStrategy,
+    data: pd.DataFrame,
+    initial_cash: float = 10000,
+    commission: float = 0.001,
+) -> StrategySimulationResult:
+    """
+    Replay a grid strategy over OHLC bars
+
+    The grid is initialized at the first bar's open, and the sell levels
+    above it are stocked with inventory bought at that price, as a grid bot
+    does when it starts. Only bars whose high/low range reaches an active
+    level are visited: the next one is found with a vectorized scan against
+    the highest buy and lowest sell price, and the orders it fills with one
+    range check over all active orders. Limit orders fill at their price,
+    or at the open when the bar gaps through it. Offset orders placed by
+    ``on_fill`` become active on the next bar. Buys the account cannot pay
+    for are cancelled.
+
+    Args:
+        strategy: Fresh strategy; its order and trade lists are filled in
+        data: OHLC bars
+        initial_cash: Starting capital
+        commission: Fee as a fraction of notional
+
+    Returns:
+        Account state per bar; every sell closes a lot and is one trade
+    """
+    index, bars = _bars(data)
+    opens, highs, lows, closes = bars['open'], bars['high'], bars['low'], bars['close']
+    clock = SimulatedClock(index[0].to_pydatetime())
+    strategy.clock = clock
+
+    strategy.initialize_grid(float(opens[0]))
+    cash = float(initial_cash)
+    units = 0.0
+    for order in strategy.active_orders:
+        if order['side'] == 'sell':
+            order['cost'] = order['amount'] * opens[0] * (1.0 + commission)
+            cash -= order['cost']
+            units += order['amount']
+    if cash < 0.0:
+        raise ValueError(f"initial_cash {initial_cash} cannot stock the grid's sell levels")
+
+    event_bars, event_cash, event_units = [0], [cash], [units]
+    pnl = []
+    rejected = 0
+    start = 0
+    while strategy.active_orders:
+        active = strategy.active_orders
+        prices = np.array([order['price'] for order in active])
+        is_buy = np.array([order['side'] == 'buy' for order in active])
+        max_buy = prices[is_buy].max() if is_buy.any() else -np.inf
+        min_sell = prices[~is_buy].min() if not is_buy.all() else np.inf
+
+        bar = _first_touch(lows, highs, start, max_buy, min_sell)
+        if bar is None:
+            break
+        clock.now = index[bar].to_pydatetime()
+        filled = np.flatnonzero(np.where(is_buy, lows[bar] <= prices, highs[bar] >= prices))
+
+        done = set()
+        for k in filled:
+            order = active[k]
+            done.add(id(order))
+            if is_buy[k]:
+                fill_price = min(order['price'], opens[bar])
+                cost = order['amount'] * fill_price * (1.0 + commission)
+                if cost > cash:
+                    rejected += 1
+                    continue
+                order['cost'] = cost
+                cash -= cost
+                units += order['amount']
+            else:
+                fill_price = max(order['price'], opens[bar])
+                proceeds = order['amount'] * fill_price * (1.0 - commission)
+                # Offset sells close the lot of their linked buy
+                lot_cost = order['linked_order']['cost'] if 'linked_order' in order else order['cost']
+                cash += proceeds
+                units -= order['amount']
+                pnl.append(proceeds - lot_cost)
+                strategy.completed_trades.append({
+                    'entry_price': lot_cost / order['amount'],
+                    'exit_price': fill_price,
+                    'amount': order['amount'],
+                    'pnl': proceeds - lot_cost,
+                    'closed_at': clock.now,
+                })
+            strategy.on_fill(order, fill_price)
+
+        strategy.active_orders = [order for order in strategy.active_orders if id(order) not in done]
+        event_bars.append(bar)
+        event_cash.append(cash)
+        event_units.append(units)
+        start = bar + 1
+
+    cash_per_bar, units_per_bar = _step_state(len(index), event_bars, event_cash, event_units)
+    return StrategySimulationResult(
+        index=index,
+        equity=cash_per_bar + units_per_bar * closes,
+        cash=cash_per_bar,
+        position=units_per_bar,
+        trade_pnl=np.asarray(pnl, dtype=float),
+        total_trades=len(pnl),
+        rejected_orders=rejected,
+    )
+
+
+def simulate_dca(
+    strategy: DCAStrategy,
+    data: pd.DataFrame,
+    initial_cash: float = 10000,
+    commission: float = 0.001,
+) -> StrategySimulationResult:
+    """
+    Replay a DCA schedule over bars, buying at the close
+
+    A fresh strategy starts buying on the first bar. The next buy is the
+    first bar at or after ``next_buy_date`` whose close is inside the price
+    limits, found by binary search, so the cost is per purchase rather than
+    per bar. Buying stops when cash no longer covers an installment.
+    """
+    index, bars = _bars(data)
+    closes = bars['close']
+    stamps = index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    clock = SimulatedClock(index[0].to_pydatetime())
+    strategy.clock = clock
+    if not strategy.purchases:
+        strategy.next_buy_date = clock.now
+
+    in_range = np.ones(len(closes), dtype=bool)
+    if strategy.min_price:
+        in_range &= closes >= strategy.min_price
+    if strategy.max_price:
+        in_range &= closes <= strategy.max_price
+    candidates = np.flatnonzero(in_range)
+
+    cash = float(initial_cash)
+    installment = strategy.investment_amount * (1.0 + commission)
+    event_bars, event_cash, event_units = [0], [cash], [strategy.total_quantity]
+    while cash >= installment:
+        due = np.searchsorted(stamps, pd.Timestamp(strategy.next_buy_date).value, side='left')
+        k = np.searchsorted(candidates, due)
+        if k == len(candidates):
+            break
+        bar = int(candidates[k])
+        clock.now = index[bar].to_pydatetime()
+        if not strategy.should_buy(float(closes[bar])):
+            break
+        strategy.execute_buy(float(closes[bar]))
+        cash -= installment
+        event_bars.append(bar)
+        event_cash.append(cash)
+        event_units.append(strategy.total_quantity)
+
+    cash_per_bar, units_per_bar = _step_state(len(index), event_bars, event_cash, event_units)
+    return StrategySimulationResult(
+        index=index,
+        equity=cash_per_bar + units_per_bar * closes,
+        cash=cash_per_bar,
+        position=units_per_bar,
+        trade_pnl=np.empty(0),
+        total_trades=len(event_bars) - 1,
+    )
+
+
+def simulate_arbitrage(
+    strategy: ArbitrageStrategy,
+    prices: Dict[str, Union[pd.Series, pd.DataFrame]],
+    amount: float,
+    initial_cash: float = 10000,
+    fee_percent: float = 0.1,
+    transfer_fee: float = 0.0,
+) -> StrategySimulationResult:
+    """
+    Replay cross-exchange arbitrage over two aligned price histories
+
+    Bars where the spread clears ``min_spread_percent`` are found in one
+    vectorized pass; only those go through ``scan_arbitrage`` and
+    ``execute_arbitrage``, and each trade books the strategy's
+    ``calculate_net_profit``.
+
+    Args:
+        strategy: Fresh strategy
+        prices: Exchange name -> close prices (or OHLC bars) for exactly
+            two exchanges
+        amount: Quote amount per trade (capped by ``max_position_size``)
+        initial_cash: Starting capital
+        fee_percent: Fee per leg, in percent
+        transfer_fee: Flat fee per trade
+    """
+    if len(prices) != 2:
+        raise ValueError("Arbitrage needs prices from exactly two exchanges")
+    (first, a), (second, b) = prices.items()
+    closes = pd.concat(
+        [a['close'] if isinstance(a, pd.DataFrame) else a, b['close'] if isinstance(b, pd.DataFrame) else b],
+        axis=1,
+        join='inner',
+    )
+    index = pd.DatetimeIndex(closes.index)
+    price_a = closes.iloc[:, 0].to_numpy(dtype=float)
+    price_b = closes.iloc[:, 1].to_numpy(dtype=float)
+    clock = SimulatedClock(index[0].to_pydatetime())
+    strategy.clock = clock
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread = np.abs(price_a - price_b) / np.minimum(price_a, price_b)
+    candidates = np.flatnonzero((price_a > 0) & (price_b > 0) & (spread >= strategy.min_spread_percent))
+
+    profit = np.zeros(len(index))
+    pnl = []
+    for bar in candidates:
+        clock.now = index[bar].to_pydatetime()
+        opportunity = strategy.scan_arbitrage(price_a[bar], price_b[bar], first, second)
+        if opportunity is None:
+            continue
+        trade = strategy.execute_arbitrage(opportunity, amount)
+        net = strategy.calculate_net_profit(
+            trade['gross_profit'], trade['buy_order']['amount'], fee_percent, fee_percent, transfer_fee,
+        )
+        trade['net_profit'] = net['net_profit']
+        profit[bar] += net['net_profit']
+        pnl.append(net['net_profit'])
+
+    equity = initial_cash + np.cumsum(profit)
+    return StrategySimulationResult(
+        index=index,
+        equity=equity,
+        cash=equity,
+        position=np.zeros(len(index)),
+        trade_pnl=np.asarray(pnl, dtype=float),
+        total_trades=len(pnl),
+    )
+
+
+def simulation_metrics(result: StrategySimulationResult, initial_cash: float) -> Dict:
+    """Metrics dict with the same keys as BacktestService._extract_metrics"""
+    metrics = summary_metrics(result.index, result.equity, result.total_trades, result.trade_pnl, initial_cash)
+    metrics['rejected_orders'] = result.rejected_orders
+    return metrics
@@ -0,0 +1,214 @@
+import bisect
+import itertools
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.services.vectorized_backtest import simulate_signal_strategy, compute_metrics
+
+logger = logging.getLogger(__name__)
+
+# Per-worker view of the shared market data, set by _attach_worker
+_worker_state: Dict = {}
+
+
+def grid_parameters(grid: Dict[str, List[float]]) -> List[Dict]:
+    """Cartesian product of per-parameter value lists"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def random_parameters(
+    ranges: Dict[str, Tuple[float, float]],
+    n_samples: int,
+    seed: Optional[int] = None,
+) -> List[Dict]:
+    """Uniform random samples from per-parameter (low, high) ranges"""
+    rng = random.Random(seed)
+    return [
+        {name: rng.uniform(low, high) for name, (low, high) in sorted(ranges.items())}
+        for _ in range(n_samples)
+    ]
+
+
+class SharedMarketData:
+    """
+    OHLCV close/open, signals and timestamps in one shared-memory block
+
+    Workers attach by name once, so the arrays are never pickled per task.
+    """
+
+    def __init__(self, data: pd.DataFrame, signals: List[float]):
+        self.n_bars = len(data)
+        self.n_signals = min(len(signals), self.n_bars)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(4 * self.n_bars * 8, 1))
+
+        prices, index = self.views(self._shm.buf, self.n_bars)
+        prices[0] = data['open'].to_numpy(dtype=float)
+        prices[1] = data['close'].to_numpy(dtype=float)
+        prices[2, :self.n_signals] = np.asarray(signals[:self.n_signals], dtype=float).ravel()
+        index[:] = (
+            pd.DatetimeIndex(pd.to_datetime(data.index)).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        )
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @staticmethod
+    def views(buf, n_bars: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(open, close, signal) float64 rows and int64 nanosecond timestamps"""
+        prices = np.ndarray((3, n_bars), dtype=np.float64, buffer=buf)
+        index = np.ndarray((n_bars,), dtype=np.int64, buffer=buf, offset=3 * n_bars * 8)
+        return prices, index
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _attach_worker(
+    shm_name: str,
+    n_bars: int,
+    n_signals: int,
+    initial_cash: float,
+    commission: float,
+):
+    """Process pool initializer: map the shared block once per worker"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    prices, index = SharedMarketData.views(shm.buf, n_bars)
+    _worker_state.update(
+        shm=shm,
+        prices=prices,
+        n_signals=n_signals,
+        index=pd.DatetimeIndex(index.view('datetime64[ns]')),
+        initial_cash=initial_cash,
+        commission=commission,
+    )
+
+
+def _run_batch(param_sets: List[Dict]) -> List[Dict]:
+    """Backtest a batch of parameter sets against the shared data"""
+    prices = _worker_state['prices']
+    initial_cash = _worker_state['initial_cash']
+    results = []
+    for params in param_sets:
+        result = simulate_signal_strategy(
+            _worker_state['index'],
+            prices[0],
+            prices[1],
+            prices[2, :_worker_state['n_signals']],
+            initial_cash=initial_cash,
+            commission=_worker_state['commission'],
+            **params,
+        )
+        results.append({'params': params, **compute_metrics(result, initial_cash)})
+    return results
+
+
+class ParameterSweepService:
+    """Fan BacktestStrategy parameter sets out over a process pool"""
+
+    def __init__(self, max_workers: Optional[int] = None, batch_size: int = 16):
+        cpus = os.cpu_count() or 1
+        # More processes than cores only adds interpreters competing for them
+        self.max_workers = min(max_workers or cpus, cpus)
+        self.batch_size = batch_size
+
+    def iter_results(
+        self,
+        data: pd.DataFrame,
+        signals: List[float],
+        param_sets: List[Dict],
+        initial_cash: float = 10000.0,
+        commission: float = 0.001,
+    ) -> Iterator[Dict]:
+        """
+        Run every parameter set and stream results as they complete
+
+        Args:
+            data: OHLCV DataFrame shared with every worker
+            signals: ML-generated signals aligned with ``data`` rows
+            param_sets: Overrides for BacktestStrategy.params
+            initial_cash: Starting capital
+            commission: Trading fee
+
+        Yields:
+            Metrics dict with ``params`` and ``rank`` (rank by per-bar
+            annualized Sharpe among the runs completed so far, 1 = best)
+        """
+        from app.services.backtest_service import BacktestService
+
+        # Resolve eagerly so bad params fail before any worker starts
+        resolved = [BacktestService.strategy_params(p) for p in param_sets]
+        batches = [
+            resolved[i:i + self.batch_size]
+            for i in range(0, len(resolved), self.batch_size)
+        ]
+        logger.info(
+            f"Sweeping {len(resolved)} parameter sets over {self.max_workers} workers"
+        )
+        return self._stream(data, signals, batches, initial_cash, commission)
+
+    def _stream(
+        self,
+        data: pd.DataFrame,
+        signals: List[float],
+        batches: List[List[Dict]],
+        initial_cash: float,
+        commission: float,
+    ) -> Iterator[Dict]:
+        ranked_sharpes: List[float] = []
+        with SharedMarketData(data, signals) as shared:
+            # spawn: the API process may hold TensorFlow threads, unsafe to fork
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_attach_worker,
+                initargs=(shared.name, shared.n_bars, shared.n_signals, initial_cash, commission),
+            ) as pool:
+                futures = [pool.submit(_run_batch, batch) for batch in batches]
+                for future in as_completed(futures):
+                    for result in future.result():
+                        key = -result['sharpe_ratio']
+                        bisect.insort(ranked_sharpes, key)
+                        result['rank'] = bisect.bisect_left(ranked_sharpes, key) + 1
+                        yield result
+
+    def run(
+        self,
+        data: pd.DataFrame,
+        signals: List[float],
+        param_sets: List[Dict],
+        initial_cash: float = 10000.0,
+        commission: float = 0.001,
+    ) -> List[Dict]:
+        """Run every parameter set and return results ranked by Sharpe"""
+        results = list(self.iter_results(data, signals, param_sets, initial_cash, commission))
+        return rank_by_sharpe(results)
+
+
+def rank_by_sharpe(results: List[Dict]) -> List[Dict]:
+    """
+    Sort results best-first by per-bar annualized Sharpe, then total return
+
+    The Sharpe of summary_metrics is defined for runs of any length, so
+    short sweeps are ranked by it rather than falling back on the tie-break.
+    """
+    ranked = sorted(results, key=lambda r: (-r['sharpe_ratio'], -r['total_return']))
+    for rank, result in enumerate(ranked, start=1):
+        result['rank'] = rank
+    return ranked
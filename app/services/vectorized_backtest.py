@@ -0,0 +1,327 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.services.cost_model import CostModel
+from app.services.performance_metrics import equity_metrics, periods_per_year
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VectorizedBacktestResult:
+    """Per-bar state and closed/open trades of a vectorized run"""
+    index: pd.DatetimeIndex
+    equity: np.ndarray
+    cash: np.ndarray
+    position: np.ndarray
+    entry_bars: np.ndarray
+    exit_bars: np.ndarray
+    sizes: np.ndarray
+    entry_prices: np.ndarray
+    exit_prices: np.ndarray
+    pnl: np.ndarray
+    pnlcomm: np.ndarray
+
+
+def target_exposure(signals: np.ndarray, n_bars: int) -> np.ndarray:
+    """
+    Desired long/flat state decided at the close of each bar
+
+    Mirrors BacktestStrategy.next(): buy when flat and signal > 0.5, sell when
+    long and signal < 0.5, otherwise keep the current state. Bars without a
+    signal keep the current state as well. A 2-D ``signals`` array is treated
+    as one column per symbol.
+    """
+    signals = np.asarray(signals, dtype=float)
+    sig = np.full((n_bars,) + signals.shape[1:], 0.5)
+    k = min(len(signals), n_bars)
+    sig[:k] = signals[:k]
+
+    decided = np.where(sig > 0.5, 1.0, np.where(sig < 0.5, 0.0, np.nan))
+    # Forward-fill "keep" bars with the last explicit decision (flat at start)
+    bars = np.arange(n_bars).reshape((n_bars,) + (1,) * (sig.ndim - 1))
+    idx = np.where(np.isnan(decided), 0, bars)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    state = np.take_along_axis(decided, idx, axis=0)
+    state[np.isnan(state)] = 0.0
+    return state.astype(bool)
+
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """Index of the first True at or after each position (len(mask) if none)"""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def _first_exit(
+    close: np.ndarray,
+    start: int,
+    stop: int,
+    lower: float,
+    upper: float,
+) -> int:
+    """First bar in [start, stop) whose close breaches a stop level, else stop"""
+    chunk = 64
+    while start < stop:
+        end = min(start + chunk, stop)
+        window = close[start:end]
+        hits = np.flatnonzero((window >= upper) | (window <= lower))
+        if len(hits):
+            return start + int(hits[0])
+        start = end
+        chunk *= 2
+    return stop
+
+
+def trade_bars(
+    open_: np.ndarray,
+    close: np.ndarray,
+    signals: np.ndarray,
+    take_profit: Optional[float],
+    stop_loss: Optional[float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Entry and exit fill bars of the signal strategy"""
+    n = len(close)
+    if not take_profit and not stop_loss:
+        # Exposure is a pure function of the signals: fully vectorized
+        held = np.zeros(n, dtype=bool)
+        held[1:] = target_exposure(signals, n)[:-1]
+        change = np.diff(held.astype(np.int8), prepend=0)
+        return np.flatnonzero(change == 1), np.flatnonzero(change == -1)
+
+    # Exits depend on the entry price, so walk trade by trade and let NumPy
+    # scan the bars inside each trade
+    sig = np.full(n, 0.5)
+    k = min(len(signals), n)
+    sig[:k] = signals[:k]
+    next_buy = _next_true(sig > 0.5)
+    next_sell = _next_true(sig < 0.5)
+    upper_mult = 1.0 + take_profit if take_profit else np.inf
+    lower_mult = 1.0 - stop_loss if stop_loss else -np.inf
+
+    entries, exits = [], []
+    bar = 0
+    while bar < n:
+        fill = next_buy[bar] + 1
+        if fill >= n:
+            break
+        entry_price = open_[fill]
+        # Bars past the last signal take no action at all, not even exits
+        decision = _first_exit(
+            close, fill, min(next_sell[fill], k),
+            entry_price * lower_mult, entry_price * upper_mult,
+        )
+        entries.append(fill)
+        if decision >= k or decision + 1 >= n:
+            break
+        exits.append(decision + 1)
+        bar = decision + 1
+
+    return np.asarray(entries, dtype=np.intp), np.asarray(exits, dtype=np.intp)
+
+
+def simulate_signal_strategy(
+    index: pd.DatetimeIndex,
+    open_: np.ndarray,
+    close: np.ndarray,
+    signals: np.ndarray,
+    initial_cash: float = 10000.0,
+    commission: float = 0.001,
+    position_size: float = 0.1,
+    take_profit: Optional[float] = None,
+    stop_loss: Optional[float] = None,
+    cost_model: Optional[CostModel] = None,
+    volume: Optional[np.ndarray] = None,
+) -> VectorizedBacktestResult:
+    """
+    Simulate the signal strategy on raw price arrays
+
+    Orders decided on bar i fill at the open of bar i+1, exactly like the
+    default Backtrader broker. Entry size is ``cash * position_size / close``
+    at the decision bar, so cash only changes per round trip and the cash
+    path is a cumulative product of per-trade growth factors. Take-profit
+    and stop-loss are checked against each bar's close, relative to the
+    entry fill price.
+
+    With a ``cost_model`` every fill pays its own cost rate instead of the
+    flat ``commission``. Rates depend on fill sizes (impact, fee tiers) and
+    sizes on the cash left by earlier trades, so the cash path and the
+    rates of all fills are recomputed together until they stop changing.
+    Each pass fixes at least one more trade, and in practice a few passes
+    suffice because costs barely move the next trade's size.
+    """
+    n = len(close)
+    entry_bars, exit_bars = trade_bars(
+        open_, close, np.asarray(signals, dtype=float).ravel(), take_profit, stop_loss
+    )
+    n_closed = len(exit_bars)
+
+    entry_prices = open_[entry_bars]
+    exit_prices = open_[exit_bars]
+    # Units bought per unit of cash at the decision bar's close
+    alloc = position_size / close[entry_bars - 1]
+
+    entry_rate = np.full(len(entry_bars), commission)
+    exit_rate = np.full(n_closed, commission)
+    if cost_model is not None:
+        market = cost_model.market(index, close, volume)
+        # Execution order: every exit falls between its entry and the next
+        fill_bars = np.empty(len(entry_bars) + n_closed, dtype=np.intp)
+        fill_bars[0::2], fill_bars[1::2] = entry_bars, exit_bars
+        fill_prices = open_[fill_bars]
+        fill_sizes = np.empty(len(fill_bars))
+
+    for _ in range(len(entry_bars) + 1):
+        # Cash growth per closed round trip
+        growth = (
+            1.0
+            - alloc[:n_closed] * entry_prices[:n_closed] * (1.0 + entry_rate[:n_closed])
+            + alloc[:n_closed] * exit_prices * (1.0 - exit_rate)
+        )
+        cash_before = initial_cash * np.concatenate(([1.0], np.cumprod(growth)))
+        sizes = cash_before[:len(entry_bars)] * alloc
+        if cost_model is None:
+            break
+        fill_sizes[0::2], fill_sizes[1::2] = sizes, sizes[:n_closed]
+        rates = cost_model.run_rates(market, fill_bars, fill_sizes, fill_prices)
+        if np.array_equal(rates[0::2], entry_rate) and np.array_equal(rates[1::2], exit_rate):
+            break
+        entry_rate, exit_rate = rates[0::2], rates[1::2]
+
+    entry_cost = sizes * entry_prices * (1.0 + entry_rate)
+
+    pnl = sizes[:n_closed] * (exit_prices - entry_prices[:n_closed])
+    fees = sizes[:n_closed] * (entry_prices[:n_closed] * entry_rate[:n_closed] + exit_prices * exit_rate)
+    pnlcomm = pnl - fees
+
+    entries_so_far = np.zeros(n, dtype=np.intp)
+    np.add.at(entries_so_far, entry_bars, 1)
+    entries_so_far = np.cumsum(entries_so_far)
+    exits_so_far = np.zeros(n, dtype=np.intp)
+    np.add.at(exits_so_far, exit_bars, 1)
+    exits_so_far = np.cumsum(exits_so_far)
+    held = entries_so_far > exits_so_far
+    open_trade = np.maximum(entries_so_far - 1, 0)
+
+    if len(sizes):
+        position = np.where(held, sizes[open_trade], 0.0)
+        cash = np.where(
+            held,
+            cash_before[open_trade] - entry_cost[open_trade],
+            cash_before[exits_so_far],
+        )
+    else:
+        position = np.zeros(n)
+        cash = np.full(n, float(initial_cash))
+    equity = cash + position * close
+
+    return VectorizedBacktestResult(
+        index=index,
+        equity=equity,
+        cash=cash,
+        position=position,
+        entry_bars=entry_bars,
+        exit_bars=exit_bars,
+        sizes=sizes,
+        entry_prices=entry_prices,
+        exit_prices=exit_prices,
+        pnl=pnl,
+        pnlcomm=pnlcomm,
+    )
+
+
+def run_vectorized_backtest(
+    data: pd.DataFrame,
+    signals: List[float],
+    initial_cash: float = 10000.0,
+    commission: float = 0.001,
+    position_size: float = 0.1,
+    take_profit: Optional[float] = None,
+    stop_loss: Optional[float] = None,
+    cost_model: Optional[CostModel] = None,
+) -> VectorizedBacktestResult:
+    """
+    Simulate the signal strategy with array operations
+
+    Args:
+        data: OHLCV DataFrame
+        signals: ML-generated signals aligned with ``data`` rows
+        initial_cash: Starting capital
+        commission: Percentage fee charged on every fill's notional
+        position_size: Fraction of cash committed per entry
+        take_profit: Exit once close rises this fraction above entry
+        stop_loss: Exit once close falls this fraction below entry
+        cost_model: Per-fill fees, slippage and impact replacing ``commission``
+
+    Returns:
+        VectorizedBacktestResult with per-bar equity and trade arrays
+    """
+    return simulate_signal_strategy(
+        pd.DatetimeIndex(pd.to_datetime(data.index)),
+        data['open'].to_numpy(dtype=float),
+        data['close'].to_numpy(dtype=float),
+        np.asarray(signals, dtype=float),
+        initial_cash=initial_cash,
+        commission=commission,
+        position_size=position_size,
+        take_profit=take_profit,
+        stop_loss=stop_loss,
+        cost_model=cost_model,
+        volume=data['volume'].to_numpy(dtype=float) if 'volume' in data else None,
+    )
+
+
+def compute_metrics(result: VectorizedBacktestResult, initial_cash: float) -> Dict:
+    """Metrics dict with the same keys as BacktestService._extract_metrics"""
+    return summary_metrics(
+        result.index, result.equity, len(result.entry_bars), result.pnlcomm, initial_cash
+    )
+
+
+def summary_metrics(
+    index: pd.DatetimeIndex,
+    equity: np.ndarray,
+    total_trades: int,
+    pnlcomm: np.ndarray,
+    initial_cash: float,
+) -> Dict:
+    """
+    Headline and risk metrics from an equity curve and closed-trade net PnL
+
+    Sharpe, Sortino, Calmar, VaR and the rest all come from per-bar
+    returns via performance_metrics.equity_metrics, annualized by the
+    bars per year of ``index``.
+
+    Args:
+        index: Bar timestamps
+        equity: Account value at the close of every bar
+        total_trades: Opened trades, including one still open
+        pnlcomm: Net PnL of every closed trade
+        initial_cash: Starting capital
+    """
+    final_value = float(equity[-1])
+    risk = equity_metrics(equity, periods_per_year(index), initial_cash)
+
+    won = pnlcomm >= 0.0
+    gross_profit = float(pnlcomm[won].sum())
+    gross_loss = abs(float(pnlcomm[~won].sum()))
+
+    return {
+        'final_value': final_value,
+        'total_return': (final_value - initial_cash) / initial_cash,
+        'sharpe_ratio': risk['sharpe_ratio'],
+        'max_drawdown': risk['max_drawdown'],
+        'total_trades': total_trades,
+        'win_rate': int(won.sum()) / max(total_trades, 1),
+        'profit_factor': gross_profit / max(gross_loss, 0.001),
+        'sortino_ratio': risk['sortino_ratio'],
+        'calmar_ratio': risk['calmar_ratio'],
+        'annual_return': risk['annual_return'],
+        'volatility': risk['volatility'],
+        'value_at_risk': risk['value_at_risk'],
+        'expected_shortfall': risk['expected_shortfall'],
+    }
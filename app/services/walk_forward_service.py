@@ -0,0 +1,234 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from app.services.backtest_service import BacktestService
+from app.services.feature_store import FeatureStore
+from app.services.ml_signal_service import MLSignalService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WalkForwardWindow:
+    """Row ranges of one fold: train on [train_start, train_end), test on [train_end, test_end)"""
+    fold: int
+    train_start: int
+    train_end: int
+    test_end: int
+
+
+def walk_forward_windows(
+    n_bars: int,
+    train_size: int,
+    test_size: int,
+    step: Optional[int] = None,
+    anchored: bool = False,
+) -> List[WalkForwardWindow]:
+    """
+    Rolling (or anchored/expanding) in-sample/out-of-sample windows
+
+    Args:
+        n_bars: Number of rows in the dataset
+        train_size: In-sample rows (initial size when anchored)
+        test_size: Out-of-sample rows per fold
+        step: Rows between fold starts (defaults to test_size)
+        anchored: Keep every in-sample window starting at row 0
+    """
+    if train_size <= 0 or test_size <= 0:
+        raise ValueError("train_size and test_size must be positive")
+    step = step or test_size
+
+    windows = []
+    start = 0
+    while start + train_size < n_bars:
+        train_end = start + train_size
+        windows.append(WalkForwardWindow(
+            fold=len(windows),
+            train_start=0 if anchored else start,
+            train_end=train_end,
+            test_end=min(train_end + test_size, n_bars),
+        ))
+        start += step
+    return windows
+
+
+def fit_window_scalers(X: np.ndarray, windows: List[WalkForwardWindow]) -> List[MinMaxScaler]:
+    """
+    In-sample MinMaxScalers for every fold from shared segment statistics
+
+    All in-sample boundaries split the rows into elementary segments whose
+    min/max are reduced once; each window's scaler then combines the stats of
+    the segments it spans, so overlapping windows never rescan shared rows.
+    """
+    bounds = np.unique(np.concatenate([
+        [w.train_start for w in windows], [w.train_end for w in windows]
+    ]))
+    # Cut at the last in-sample row so no segment reaches into test data
+    in_sample = X[:bounds[-1]]
+    seg_min = np.minimum.reduceat(in_sample, bounds[:-1], axis=0)
+    seg_max = np.maximum.reduceat(in_sample, bounds[:-1], axis=0)
+
+    scalers = []
+    for w in windows:
+        first, last = np.searchsorted(bounds, [w.train_start, w.train_end])
+        scaler = MinMaxScaler()
+        # Fitting on the [min; max] rows yields the same scaling as the full slice
+        scaler.fit(np.vstack([
+            seg_min[first:last].min(axis=0), seg_max[first:last].max(axis=0)
+        ]))
+        scalers.append(scaler)
+    return scalers
+
+
+def _run_fold(task: Dict) -> Dict:
+    """Retrain on one in-sample slice, predict and backtest its out-of-sample slice"""
+    window: WalkForwardWindow = task['window']
+    lookback = task['lookback_period']
+    ml_service = MLSignalService(lookback_period=lookback)
+    ml_service.scaler = task['scaler']
+
+    # Drop the last in-sample row: its target is the first out-of-sample bar
+    X_train = ml_service.scaler.transform(task['X_train'])[:-1]
+    y_train = task['y_train'][:-1]
+    ml_service.train_rf_model(X_train, y_train, n_jobs=task['n_jobs'])
+    if task['use_lstm'] and len(X_train) > lookback:
+        ml_service.train_lstm_model(X_train, y_train, epochs=task['epochs'])
+
+    # Prefix the test rows with in-sample context so the LSTM sees full windows
+    X_context = ml_service.scaler.transform(task['X_context'])
+    signals = ml_service.predict_signals(X_context)[-len(task['test_data']):]
+
+    test_data = task['test_data']
+    metrics = BacktestService(None).run_backtest(
+        task['symbol'],
+        test_data.index[0],
+        test_data.index[-1],
+        test_data,
+        signals.tolist(),
+        task['initial_cash'],
+        task['commission'],
+        engine=task['engine'],
+    )
+    return {'fold': window.fold, 'signals': signals, 'metrics': metrics}
+
+
+class WalkForwardService:
+    """Walk-forward retraining of MLSignalService with out-of-sample backtests"""
+
+    def __init__(self, max_workers: Optional[int] = None, feature_store: Optional[FeatureStore] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Source of the features when set, so repeated runs only featurize new bars
+        self.feature_store = feature_store
+
+    def run(
+        self,
+        symbol: str,
+        data: pd.DataFrame,
+        train_size: int,
+        test_size: int,
+        step: Optional[int] = None,
+        anchored: bool = False,
+        lookback_period: int = 60,
+        use_lstm: bool = False,
+        epochs: int = 10,
+        initial_cash: float = 10000.0,
+        commission: float = 0.001,
+        engine: str = "vectorized",
+        timeframe: str = "1d",
+    ) -> Dict:
+        """
+        Run walk-forward optimization over ``data``
+
+        Features are computed once for the whole range (read from the
+        feature store when there is one) and sliced per fold.
+        Folds run in parallel worker processes; each retrains the RF (and the
+        LSTM when ``use_lstm``) on its in-sample slice only, so signals never
+        see future bars. The stitched out-of-sample signals are backtested
+        once more as one continuous run.
+
+        Returns:
+            Per-fold metrics plus metrics of the combined out-of-sample run
+        """
+        windows = walk_forward_windows(len(data), train_size, test_size, step, anchored)
+        if not windows:
+            raise ValueError("Not enough bars for a single walk-forward fold")
+
+        ml_service = MLSignalService(lookback_period, feature_store=self.feature_store, timeframe=timeframe)
+        located = ml_service.stored_features(data, symbol)
+        if located is not None:
+            stored, rows = located
+            X, y = stored.features(rows), stored.target(rows)
+        else:
+            X, y = ml_service.compute_features(data)
+        scalers = fit_window_scalers(X, windows)
+        n_jobs = max((os.cpu_count() or 1) // self.max_workers, 1)
+
+        tasks = []
+        for window, scaler in zip(windows, scalers):
+            context_start = max(window.train_end - lookback_period, 0)
+            tasks.append({
+                'window': window,
+                'scaler': scaler,
+                'X_train': X[window.train_start:window.train_end],
+                'y_train': y[window.train_start:window.train_end],
+                'X_context': X[context_start:window.test_end],
+                'test_data': data.iloc[window.train_end:window.test_end],
+                'symbol': symbol,
+                'lookback_period': lookback_period,
+                'use_lstm': use_lstm,
+                'epochs': epochs,
+                'n_jobs': n_jobs,
+                'initial_cash': initial_cash,
+                'commission': commission,
+                'engine': engine,
+            })
+
+        logger.info(f"Walk-forward for {symbol}: {len(tasks)} folds over {self.max_workers} workers")
+        # spawn: the API process may hold TensorFlow threads, unsafe to fork
+        with ProcessPoolExecutor(
+            max_workers=min(self.max_workers, len(tasks)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            fold_results = sorted(pool.map(_run_fold, tasks), key=lambda r: r['fold'])
+
+        # Later folds overwrite overlapping test rows when step < test_size
+        oos_start, oos_end = windows[0].train_end, windows[-1].test_end
+        oos_signals = np.full(oos_end - oos_start, 0.5)
+        for window, result in zip(windows, fold_results):
+            oos_signals[window.train_end - oos_start:window.test_end - oos_start] = result['signals']
+
+        oos_data = data.iloc[oos_start:oos_end]
+        combined = BacktestService(None).run_backtest(
+            symbol,
+            oos_data.index[0],
+            oos_data.index[-1],
+            oos_data,
+            oos_signals.tolist(),
+            initial_cash,
+            commission,
+            engine=engine,
+        )
+
+        return {
+            'symbol': symbol,
+            'folds': [
+                {
+                    'fold': window.fold,
+                    'train_start': data.index[window.train_start],
+                    'train_end': data.index[window.train_end - 1],
+                    'test_start': data.index[window.train_end],
+                    'test_end': data.index[window.test_end - 1],
+                    **{k: v for k, v in result['metrics'].items() if k not in ('symbol', 'start_date', 'end_date')},
+                }
+                for window, result in zip(windows, fold_results)
+            ],
+            'combined': combined,
+        }
@@ -0,0 +1,139 @@
+import numpy as np
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+import logging
+
+if TYPE_CHECKING:
+    from sklearn.preprocessing import MinMaxScaler
+
+logger = logging.getLogger(__name__)
+
+
+def sliding_windows(X: np.ndarray, lookback: int) -> np.ndarray:
+    """
+    Zero-copy ``(n - lookback, lookback, n_features)`` view of all LSTM windows
+
+    Window ``k`` is ``X[k:k + lookback]``, the history seen by the
+    prediction for row ``k + lookback``. Works on memory-mapped arrays
+    without reading them.
+    """
+    if len(X) <= lookback:
+        return np.empty((0, lookback, X.shape[1]), dtype=X.dtype)
+    view = np.lib.stride_tricks.sliding_window_view(X, lookback, axis=0)
+    # sliding_window_view puts the window axis last
+    return view.transpose(0, 2, 1)[:-1]
+
+
+class WindowDataset:
+    """
+    Batches of LSTM windows and targets streamed from a feature matrix
+
+    Only one batch of windows is materialized at a time, so memory stays at
+    ``batch_size * lookback * n_features`` floats whatever the length of
+    ``X``. ``X`` can be a memory-mapped matrix larger than RAM. A fitted
+    ``scaler`` is applied per batch, so unscaled stored features never
+    need a scaled copy.
+
+    Args:
+        X: Feature matrix, one row per bar
+        y: Targets per bar, or None for prediction
+        lookback: Bars per window
+        batch_size: Windows per batch
+        start: First window (the one predicting row ``start + lookback``)
+        stop: One past the last window (defaults to all windows)
+        shuffle: Visit windows in a new random order on every pass
+        seed: Seed of the shuffling order
+        scaler: Fitted MinMaxScaler applied to each batch
+    """
+
+    def __init__(
+        self,
+        X: np.ndarray,
+        y: Optional[np.ndarray],
+        lookback: int,
+        batch_size: int = 32,
+        start: int = 0,
+        stop: Optional[int] = None,
+        shuffle: bool = False,
+        seed: Optional[int] = None,
+        scaler: Optional['MinMaxScaler'] = None,
+    ):
+        self.windows = sliding_windows(X, lookback)
+        self.y = y
+        self.lookback = lookback
+        self.batch_size = batch_size
+        self.start = start
+        self.stop = len(self.windows) if stop is None else min(stop, len(self.windows))
+        self.shuffle = shuffle
+        self.scaler = scaler
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        """Batches per pass"""
+        return -(-max(self.stop - self.start, 0) // self.batch_size)
+
+    @property
+    def n_windows(self) -> int:
+        return max(self.stop - self.start, 0)
+
+    def split(self, validation_split: float) -> Tuple['WindowDataset', 'WindowDataset']:
+        """Training and validation datasets; validation takes the last windows, as in Keras"""
+        cut = self.start + int(self.n_windows * (1.0 - validation_split))
+        train = self._subset(self.start, cut, self.shuffle)
+        validation = self._subset(cut, self.stop, False)
+        return train, validation
+
+    def _subset(self, start: int, stop: int, shuffle: bool) -> 'WindowDataset':
+        subset = object.__new__(WindowDataset)
+        subset.__dict__.update(self.__dict__)
+        subset.start, subset.stop, subset.shuffle = start, stop, shuffle
+        subset._rng = np.random.default_rng(self._rng.integers(2 ** 63))
+        return subset
+
+    def _batch(self, windows: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        # Fancy indexing or slicing copies just this batch out of the view
+        batch = np.array(self.windows[windows], dtype=np.float32)
+        if self.scaler is not None:
+            batch *= self.scaler.scale_.astype(np.float32)
+            batch += self.scaler.min_.astype(np.float32)
+        if self.y is None:
+            return batch, None
+        # Window k predicts row k + lookback
+        targets = np.asarray(self.y[self._target_rows(windows)], dtype=np.float32)
+        return batch, targets
+
+    def _target_rows(self, windows) -> np.ndarray:
+        if isinstance(windows, slice):
+            return slice(windows.start + self.lookback, windows.stop + self.lookback)
+        return windows + self.lookback
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        if self.shuffle:
+            order = self._rng.permutation(np.arange(self.start, self.stop))
+            for k in range(0, len(order), self.batch_size):
+                # Sorted indices read memory-mapped pages in order
+                yield self._batch(np.sort(order[k:k + self.batch_size]))
+        else:
+            for k in range(self.start, self.stop, self.batch_size):
+                yield self._batch(slice(k, min(k + self.batch_size, self.stop)))
+
+    def to_tf_dataset(self, prefetch: int = 2):
+        """
+        ``tf.data`` source over the batches; reshuffles on every epoch
+
+        Without targets the dataset yields windows only, for ``predict``.
+        """
+        import tensorflow as tf
+
+        n_features = self.windows.shape[2]
+        window_spec = tf.TensorSpec(shape=(None, self.lookback, n_features), dtype=tf.float32)
+        if self.y is None:
+            dataset = tf.data.Dataset.from_generator(
+                lambda: (batch for batch, _ in self), output_signature=window_spec,
+            )
+        else:
+            dataset = tf.data.Dataset.from_generator(
+                lambda: iter(self),
+                output_signature=(window_spec, tf.TensorSpec(shape=(None,), dtype=tf.float32)),
+            )
+        # Known length lets Keras end epochs cleanly instead of running dry
+        return dataset.apply(tf.data.experimental.assert_cardinality(len(self))).prefetch(prefetch)
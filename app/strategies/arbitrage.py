@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from decimal import Decimal
 import logging
 from datetime import datetime
@@ -19,12 +19,14 @@ class ArbitrageStrategy:
         symbol: str,
         min_spread_percent: float = 0.5,
         max_position_size: float = 10000,
+        clock: Callable[[], datetime] = datetime.now,
     ):
         self.symbol = symbol
         self.min_spread_percent = min_spread_percent / 100
         self.max_position_size = max_position_size
         self.opportunities: List[Dict] = []
         self.executed_trades: List[Dict] = []
+        self.clock = clock
         
     def scan_arbitrage(
         self,
@@ -67,7 +69,7 @@ class ArbitrageStrategy:
             'buy_price': buy_price,
             'sell_price': sell_price,
             'spread_percent': spread * 100,
-            'timestamp': datetime.now(),
+            'timestamp': self.clock(),
             'status': 'detected',
         }
         
@@ -120,7 +122,7 @@ class ArbitrageStrategy:
             },
             'gross_profit': (opportunity['sell_price'] - opportunity['buy_price']) * buy_qty,
             'spread_percent': opportunity['spread_percent'],
-            'created_at': datetime.now(),
+            'created_at': self.clock(),
         }
         
         self.executed_trades.append(trade)
@@ -134,6 +136,7 @@ class ArbitrageStrategy:
     def calculate_net_profit(
         self,
         gross_profit: float,
+        amount: float,
         buy_fee_percent: float = 0.1,
         sell_fee_percent: float = 0.1,
         transfer_fee: float = 0.0,
@@ -141,10 +144,13 @@ class ArbitrageStrategy:
         """
         Calculate net profit after fees
         
+        Exchange fees are charged on each leg's notional: ``amount`` on the
+        buy side and ``amount + gross_profit`` on the sell side.
+        
         Typical Kraken fees: 0.16% - 0.26%
         """
-        buy_fee = gross_profit * (buy_fee_percent / 100)
-        sell_fee = gross_profit * (sell_fee_percent / 100)
+        buy_fee = amount * (buy_fee_percent / 100)
+        sell_fee = (amount + gross_profit) * (sell_fee_percent / 100)
         total_fees = buy_fee + sell_fee + transfer_fee
         net_profit = gross_profit - total_fees
         
@@ -155,7 +161,7 @@ class ArbitrageStrategy:
             'transfer_fee': transfer_fee,
             'total_fees': total_fees,
             'net_profit': net_profit,
-            'roi_percent': (net_profit / gross_profit * 100) if gross_profit > 0 else 0,
+            'roi_percent': (net_profit / amount * 100) if amount > 0 else 0,
         }
     
     def get_statistics(self) -> Dict:
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 import logging
 
@@ -20,13 +20,16 @@ class DCAStrategy:
         interval_days: int = 1,
         min_price: Optional[float] = None,
         max_price: Optional[float] = None,
+        clock: Callable[[], datetime] = datetime.now,
     ):
         self.symbol = symbol
         self.investment_amount = investment_amount
         self.interval_days = interval_days
         self.min_price = min_price
         self.max_price = max_price
-        self.next_buy_date = datetime.now()
+        # Injectable so a backtest can replay the buy schedule
+        self.clock = clock
+        self.next_buy_date = self.clock()
         self.purchases: List[Dict] = []
         self.total_invested = 0.0
         self.total_quantity = 0.0
@@ -34,7 +37,7 @@ class DCAStrategy:
     def should_buy(self, current_price: float) -> bool:
         """Determine if DCA buy should execute"""
         # Check time interval
-        if datetime.now() < self.next_buy_date:
+        if self.clock() < self.next_buy_date:
             return False
         
         # Check price constraints
@@ -58,14 +61,14 @@ class DCAStrategy:
             'price': current_price,
             'quantity': quantity,
             'amount': self.investment_amount,
-            'timestamp': datetime.now(),
+            'timestamp': self.clock(),
             'average_cost': self.get_average_cost(),
         }
         
         self.purchases.append(order)
         self.total_invested += self.investment_amount
         self.total_quantity += quantity
-        self.next_buy_date = datetime.now() + timedelta(days=self.interval_days)
+        self.next_buy_date = self.clock() + timedelta(days=self.interval_days)
         
         logger.info(
             f"DCA buy executed: {quantity:.4f} {self.symbol} @ {current_price} "
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import logging
 from decimal import Decimal
 from datetime import datetime, timedelta
@@ -21,6 +21,7 @@ class GridTradingStrategy:
         profit_percentage: float = 0.5,
         upper_price: float = None,
         lower_price: float = None,
+        clock: Callable[[], datetime] = datetime.now,
     ):
         self.symbol = symbol
         self.grid_levels = grid_levels
@@ -30,6 +31,8 @@ class GridTradingStrategy:
         self.lower_price = lower_price
         self.active_orders: List[Dict] = []
         self.completed_trades = []
+        # Time source, replaced by a simulated clock in backtests
+        self.clock = clock
         
     def initialize_grid(self, current_price: float) -> List[Dict]:
         """
@@ -58,7 +61,7 @@ class GridTradingStrategy:
                     'amount': self.grid_amount / grid_price,
                     'grid_level': i,
                     'type': 'grid_buy',
-                    'created_at': datetime.now(),
+                    'created_at': self.clock(),
                 }
             else:
                 # Sell grid
@@ -68,7 +71,7 @@ class GridTradingStrategy:
                     'amount': self.grid_amount / grid_price,
                     'grid_level': i,
                     'type': 'grid_sell',
-                    'created_at': datetime.now(),
+                    'created_at': self.clock(),
                 }
             
             orders.append(order)
@@ -94,7 +97,7 @@ class GridTradingStrategy:
                 'grid_level': order['grid_level'],
                 'type': 'offset_sell',
                 'linked_order': order,
-                'created_at': datetime.now(),
+                'created_at': self.clock(),
             }
         else:
             # Place buy order below sell price
@@ -106,7 +109,7 @@ class GridTradingStrategy:
                 'grid_level': order['grid_level'],
                 'type': 'offset_buy',
                 'linked_order': order,
-                'created_at': datetime.now(),
+                'created_at': self.clock(),
             }
         
         self.active_orders.append(offset_order)
@@ -1,20 +1,40 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 import numpy as np
-import tensorflow as tf
 
+from app.services.inference_batcher import InferenceServer, default_inference_server
 from app.strategies.base import StrategyBase
 
+if TYPE_CHECKING:
+    import tensorflow as tf
+
 logger = logging.getLogger(__name__)
 
 
 class TensorFlowAIStrategy(StrategyBase):
-    def __init__(self, model_path: str, lookback: int = 10) -> None:
-        self.model = tf.keras.models.load_model(model_path)
+    def __init__(
+        self,
+        model_path: str,
+        lookback: int = 10,
+        inference_server: Optional[InferenceServer] = None,
+    ) -> None:
+        self.model_path = model_path
         self.lookback = lookback
+        self._model: Optional[tf.keras.Model] = None
+        # Strategies sharing a model file share its batcher
+        self.inference_server = inference_server or default_inference_server()
+
+    @property
+    def model(self) -> tf.keras.Model:
+        # Loaded on the first signal, so idle strategies cost no memory
+        if self._model is None:
+            import tensorflow as tf
+
+            self._model = tf.keras.models.load_model(self.model_path)
+        return self._model
 
     def preprocess(self, data: List[Dict[str, float]]) -> np.ndarray:
         closes = np.array([bar["close"] for bar in data], dtype=float).reshape(-1, 1)
@@ -25,7 +45,10 @@ class TensorFlowAIStrategy(StrategyBase):
             return {"action": "hold"}
 
         X = self.preprocess(data[-self.lookback :])
-        pred = float(self.model.predict(X[np.newaxis, ...], verbose=0)[0][0])
+        future = self.inference_server.submit(
+            self.model_path, lambda batch: self.model.predict(batch, verbose=0), X
+        )
+        pred = float(future.result()[0])
 
         if pred > 0.6:
             return {"action": "buy", "confidence": pred}
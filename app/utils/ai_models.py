@@ -1,7 +1,11 @@
 """AI models for trading strategies."""
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.services.model_registry import ModelNotFoundError, ModelRegistry, default_model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -9,21 +13,30 @@ logger = logging.getLogger(__name__)
 class TradingAIModels:
     """AI models for trading strategies and predictions."""
 
-    def __init__(self) -> None:
+    def __init__(self, registry: Optional[ModelRegistry] = None) -> None:
         """Initialize trading AI models."""
         logger.info("Initializing TradingAIModels")
-        self.models: dict[str, Any] = {}
+        self.registry = registry or default_model_registry()
         self._load_models()
 
     def _load_models(self) -> None:
-        """Load pre-trained AI models."""
-        # TODO: Load your ML models here (e.g., from pickle, TensorFlow, PyTorch)
-        pass
+        """List registered models; each one is loaded on its first prediction."""
+        logger.info("%d models registered in %s", len(self.registry.names()), self.registry.root)
 
     def predict(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Make predictions based on market data."""
-        # TODO: Implement prediction logic
-        return {"prediction": None, "confidence": 0.0}
+        """Make predictions based on market data.
+
+        ``data`` holds the model ``symbol`` (its registry name), ``candles``
+        with close and volume, oldest first, and optionally a ``version``.
+        """
+        try:
+            candles = pd.DataFrame(data["candles"])
+            signal = self.registry.predict(data["symbol"], candles, data.get("version"))
+        except ModelNotFoundError as exc:
+            logger.warning("No model for prediction: %s", exc)
+            return {"prediction": None, "confidence": 0.0}
+        prediction = "up" if signal > 0.5 else "down"
+        return {"prediction": prediction, "confidence": abs(signal - 0.5) * 2, "signal": signal}
 
     def train(self, training_data: List[Dict[str, Any]]) -> None:
         """Train models with new data."""
@@ -32,4 +45,5 @@ class TradingAIModels:
 
     def get_model_status(self) -> Dict[str, Any]:
         """Get status of all loaded models."""
-        return {"status": "ready", "models_loaded": len(self.models)}
+        status = self.registry.status()
+        return {"status": "ready", "models_loaded": len(status["loaded"]), **status}
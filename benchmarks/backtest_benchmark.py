@@ -0,0 +1,260 @@
+"""
+Backtest pipeline benchmarks on deterministic synthetic OHLCV
+
+Times every stage of the backtest pipeline (data feed preparation, feature
+building, model training, signal generation, engine run, metric
+extraction) at several dataset sizes and records each stage's peak traced
+memory. Feed preparation and loading are also timed for the former
+PandasData path (``:pandas`` stages) so the ArrayData feed can be
+compared against it. Results are written as JSON tagged with the git commit so two runs
+can be compared:
+
+    python -m benchmarks.backtest_benchmark --sizes 1e3 1e4 1e5 -o new.json
+    python -m benchmarks.backtest_benchmark --sizes 1e3 1e4 1e5 --compare old.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from app.services.backtest_service import BacktestService
+from app.services.ml_signal_service import MLSignalService
+from app.services.vectorized_backtest import compute_metrics, run_vectorized_backtest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+# Cerebro needs minutes per million bars; skip it above this size by default
+BACKTRADER_MAX_BARS = 100_000
+# The RF is trained on a fixed-size prefix so training cost stays constant
+TRAIN_BARS = 2_000
+
+
+def synthetic_ohlcv(n_bars: int, seed: int = 42) -> pd.DataFrame:
+    """Deterministic minute bars from a geometric random walk"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.001, n_bars)))
+    open_ = close * (1.0 + rng.normal(0.0, 0.0003, n_bars))
+    spread = np.abs(rng.normal(0.0, 0.0005, n_bars))
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) * (1.0 + spread),
+        'low': np.minimum(open_, close) * (1.0 - spread),
+        'close': close,
+        'volume': rng.integers(1_000, 100_000, n_bars).astype(float),
+    }, index=pd.date_range('2015-01-01', periods=n_bars, freq='min'))
+
+
+def pandas_datafeed(data: pd.DataFrame) -> bt.feeds.PandasData:
+    """The DataFrame-copying PandasData feed ArrayData replaced, as a baseline"""
+    data_copy = data.copy()
+    data_copy['datetime'] = pd.to_datetime(data_copy.index)
+    data_copy.set_index('datetime', inplace=True)
+    return bt.feeds.PandasData(
+        dataname=data_copy,
+        fromdate=data_copy.index[0],
+        todate=data_copy.index[-1],
+    )
+
+
+def load_datafeed(feed: bt.feed.DataBase) -> int:
+    """Pull every bar of a feed through Cerebro without a strategy"""
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(bt.Strategy)
+    strategy = cerebro.run()[0]
+    return len(strategy.data)
+
+
+def _measure(fn: Callable, repeat: int, memory: bool) -> Tuple[object, float, Optional[float]]:
+    """(result, best wall time, peak traced MiB) of ``fn``"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        # Separate pass: tracing slows pure-Python code and would skew timings
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+
+def run_benchmarks(
+    sizes: List[int],
+    engines: List[str],
+    repeat: int = 1,
+    memory: bool = True,
+    backtrader_max_bars: int = BACKTRADER_MAX_BARS,
+    seed: int = 42,
+) -> List[Dict]:
+    """
+    Time each pipeline stage at every dataset size
+
+    Returns:
+        One record per (bars, stage) with ``seconds``, ``bars_per_second``
+        and ``peak_memory_mb`` (None when memory tracing is off)
+    """
+    records = []
+
+    def record(n_bars: int, stage: str, seconds: float, peak: Optional[float]):
+        records.append({
+            'bars': n_bars,
+            'stage': stage,
+            'seconds': seconds,
+            'bars_per_second': n_bars / seconds if seconds > 0 else None,
+            'peak_memory_mb': peak,
+        })
+        logger.info(f"{n_bars:>10} bars  {stage:<28} {seconds:10.4f} s")
+
+    for n_bars in sizes:
+        data = synthetic_ohlcv(n_bars, seed)
+        service = BacktestService(None)
+        ml_service = MLSignalService()
+
+        _, seconds, peak = _measure(lambda: service._prepare_datafeed(data, 'BENCH'), repeat, memory)
+        record(n_bars, 'datafeed_preparation', seconds, peak)
+        _, seconds, peak = _measure(lambda: pandas_datafeed(data), repeat, memory)
+        record(n_bars, 'datafeed_preparation:pandas', seconds, peak)
+
+        (X, y), seconds, peak = _measure(lambda: ml_service.prepare_features(data), repeat, memory)
+        record(n_bars, 'feature_building', seconds, peak)
+
+        train = min(TRAIN_BARS, n_bars)
+        _, seconds, peak = _measure(lambda: ml_service.train_rf_model(X[:train], y[:train]), 1, memory)
+        record(n_bars, 'model_training', seconds, peak)
+
+        signals, seconds, peak = _measure(lambda: ml_service.predict_signals(X), repeat, memory)
+        record(n_bars, 'signal_generation', seconds, peak)
+        signals = signals.tolist()
+
+        if 'vectorized' in engines:
+            result, seconds, peak = _measure(
+                lambda: run_vectorized_backtest(data, signals), repeat, memory
+            )
+            record(n_bars, 'engine_run:vectorized', seconds, peak)
+            _, seconds, peak = _measure(lambda: compute_metrics(result, 10000.0), repeat, memory)
+            record(n_bars, 'metric_extraction:vectorized', seconds, peak)
+
+        if 'backtrader' in engines and n_bars <= backtrader_max_bars:
+            _, seconds, peak = _measure(
+                lambda: load_datafeed(service._prepare_datafeed(data, 'BENCH')), repeat, memory
+            )
+            record(n_bars, 'datafeed_load:array', seconds, peak)
+            _, seconds, peak = _measure(lambda: load_datafeed(pandas_datafeed(data)), repeat, memory)
+            record(n_bars, 'datafeed_load:pandas', seconds, peak)
+            _, seconds, peak = _measure(
+                lambda: service.run_backtest('BENCH', None, None, data, signals), repeat, memory
+            )
+            record(n_bars, 'engine_run:backtrader', seconds, peak)
+            strategy = service.cerebro.runstrats[0][0]
+            _, seconds, peak = _measure(lambda: service._extract_metrics(strategy, 10000.0, data.index), repeat, memory)
+            record(n_bars, 'metric_extraction:backtrader', seconds, peak)
+
+    return records
+
+
+def environment() -> Dict:
+    """Commit and interpreter/library versions the results belong to"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def compare(baseline: Dict, current: Dict) -> List[Dict]:
+    """Per (bars, stage) time ratio current / baseline for stages in both runs"""
+    before = {(r['bars'], r['stage']): r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        old = before.get((r['bars'], r['stage']))
+        if old is None or not old['seconds']:
+            continue
+        rows.append({
+            'bars': r['bars'],
+            'stage': r['stage'],
+            'baseline_seconds': old['seconds'],
+            'seconds': r['seconds'],
+            'ratio': r['seconds'] / old['seconds'],
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=float, default=DEFAULT_SIZES,
+                        help='Dataset sizes in bars (e.g. 1e3 1e5)')
+    parser.add_argument('--engines', nargs='+', default=['vectorized', 'backtrader'],
+                        choices=['vectorized', 'backtrader'])
+    parser.add_argument('--backtrader-max-bars', type=float, default=BACKTRADER_MAX_BARS)
+    parser.add_argument('--repeat', type=int, default=1, help='Best-of-N timing runs')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the traced-memory pass')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', help='Write JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='Baseline JSON to compare against')
+    parser.add_argument('--fail-above', type=float,
+                        help='Exit 1 if any stage is slower than baseline by this ratio')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(message)s', stream=sys.stderr)
+    # Keep service progress logs out of the timing table
+    logger.setLevel(logging.INFO)
+    report = {
+        'environment': environment(),
+        'results': run_benchmarks(
+            [int(size) for size in args.sizes],
+            args.engines,
+            repeat=args.repeat,
+            memory=not args.no_memory,
+            backtrader_max_bars=int(args.backtrader_max_bars),
+            seed=args.seed,
+        ),
+    }
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            report['comparison'] = compare(json.load(f), report)
+        for row in report['comparison']:
+            logger.info(f"{row['bars']:>10} bars  {row['stage']:<28} x{row['ratio']:.2f}")
+            if args.fail_above and row['ratio'] > args.fail_above:
+                status = 1
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
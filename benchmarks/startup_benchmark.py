@@ -0,0 +1,181 @@
+"""
+API worker startup time and memory budget check
+
+Starts fresh interpreters that import ``app.main``, run its lifespan
+against a freshly migrated SQLite database and serve one ``GET /health``,
+as a uvicorn worker does before its first request, and records the import
+time, the time to the first response, the resident memory afterwards and
+which heavy libraries got imported. Exits 1 when the median run exceeds a
+budget, the backtest job queue did not start or any heavy library was
+loaded:
+
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --runs 5 --max-seconds 2 --max-rss-mb 200 -o startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from benchmarks.backtest_benchmark import environment
+
+logger = logging.getLogger(__name__)
+
+# Libraries a worker serving only /health, /trade or /data must not import
+HEAVY_MODULES = ('tensorflow', 'keras', 'sklearn', 'scipy', 'backtrader', 'ccxt', 'joblib')
+DEFAULT_MAX_SECONDS = 3.0
+DEFAULT_MAX_RSS_MB = 250.0
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+# Upgrades the database of the child's working directory to the latest revision
+_MIGRATE = """
+import sys
+from alembic import command
+from alembic.config import Config
+config = Config(sys.argv[1])
+config.set_main_option('script_location', sys.argv[2])
+command.upgrade(config, 'head')
+"""
+
+# Runs in the child interpreter; prints one JSON record
+_WORKER = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.services.job_service import backtest_jobs
+# Entering the client runs the lifespan: AI models, strategies, job queue
+with TestClient(app.main.app) as client:
+    response = client.get('/health')
+    served = time.perf_counter()
+    job_queue_running = backtest_jobs.running
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open('/proc/self/status') as status:
+            rss_mb = next(int(line.split()[1]) for line in status if line.startswith('VmRSS:')) / 1024
+    except (OSError, StopIteration):
+        pass
+print(json.dumps({
+    'status_code': response.status_code,
+    'job_queue_running': job_queue_running,
+    'import_seconds': imported - start,
+    'first_response_seconds': served - start,
+    'rss_mb': rss_mb,
+    'heavy_modules': sorted(m for m in %r if m in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _child_env() -> Dict[str, str]:
+    """
+    Environment of the child interpreters
+
+    DATABASE_URL is dropped so the job queue and the migration both use
+    ``ai_trading.db`` in the working directory rather than a configured
+    database.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(_ROOT), os.environ.get('PYTHONPATH')])))
+    env.pop('DATABASE_URL', None)
+    return env
+
+
+def prepare_workdir(workdir: str) -> None:
+    """Copy the settings file into ``workdir`` and migrate its database to the latest revision"""
+    if (_ROOT / '.env').exists():
+        shutil.copy(_ROOT / '.env', workdir)
+    subprocess.run(
+        [sys.executable, '-c', _MIGRATE, str(_ROOT / 'alembic.ini'), str(_ROOT / 'alembic')],
+        capture_output=True, text=True, cwd=workdir, env=_child_env(), check=True,
+    )
+
+
+def measure_startup(workdir: str) -> Dict:
+    """Startup record of one fresh interpreter running in a prepare_workdir directory"""
+    completed = subprocess.run(
+        [sys.executable, '-c', _WORKER], capture_output=True, text=True, cwd=workdir, env=_child_env(), check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_benchmarks(runs: int = 3) -> Dict:
+    """
+    Startup records of ``runs`` fresh interpreters and their medians
+
+    Returns:
+        ``runs`` (one record each) and ``median`` import seconds, first
+        response seconds and RSS
+    """
+    records = []
+    with tempfile.TemporaryDirectory(prefix='startup-benchmark-') as workdir:
+        prepare_workdir(workdir)
+        for k in range(runs):
+            record = measure_startup(workdir)
+            records.append(record)
+            logger.info(
+                f"run {k + 1}: import {record['import_seconds']:.2f} s  "
+                f"first response {record['first_response_seconds']:.2f} s  rss {record['rss_mb']:.0f} MB"
+            )
+    return {
+        'runs': records,
+        'median': {
+            key: statistics.median(record[key] for record in records)
+            for key in ('import_seconds', 'first_response_seconds', 'rss_mb')
+        },
+    }
+
+
+def check_budget(report: Dict, max_seconds: float, max_rss_mb: float) -> List[str]:
+    """Budget violations of a run_benchmarks report (empty when within budget)"""
+    problems = []
+    median = report['median']
+    if median['first_response_seconds'] > max_seconds:
+        problems.append(f"first /health after {median['first_response_seconds']:.2f} s > {max_seconds} s")
+    if median['rss_mb'] > max_rss_mb:
+        problems.append(f"RSS {median['rss_mb']:.0f} MB > {max_rss_mb} MB")
+    heavy = sorted({module for record in report['runs'] for module in record['heavy_modules']})
+    if heavy:
+        problems.append(f"heavy libraries imported at startup: {', '.join(heavy)}")
+    if any(record['status_code'] != 200 for record in report['runs']):
+        problems.append("/health did not return 200")
+    if not all(record['job_queue_running'] for record in report['runs']):
+        problems.append("backtest job queue did not start")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters to start')
+    parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS,
+                        help='Budget for the median time to the first /health response')
+    parser.add_argument('--max-rss-mb', type=float, default=DEFAULT_MAX_RSS_MB,
+                        help='Budget for the median resident memory after it')
+    parser.add_argument('-o', '--output', help='Write JSON results here (default: stdout)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(message)s', stream=sys.stderr)
+    logger.setLevel(logging.INFO)
+    report = {'environment': environment(), **run_benchmarks(args.runs)}
+    report['violations'] = check_budget(report, args.max_seconds, args.max_rss_mb)
+    for problem in report['violations']:
+        logger.error(f"Over budget: {problem}")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 1 if report['violations'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
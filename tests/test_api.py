@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services.job_service import backtest_jobs
 
 
 @pytest.fixture
@@ -21,6 +22,23 @@ class TestHealthEndpoint:
         assert "timestamp" in response.json()
 
 
+class TestStartup:
+    """Test application startup"""
+    
+    def test_startup_survives_a_broken_job_queue(self, monkeypatch):
+        """Without the job queue the API still boots and only backtest routes answer 503"""
+        async def broken_start():
+            raise RuntimeError("no backtest_jobs table")
+        
+        monkeypatch.setattr(backtest_jobs, "start", broken_start)
+        with TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+            response = client.get(app.url_path_for("get_backtest_job", job_id="missing"))
+        
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Backtest job queue is not running"
+
+
 class TestBacktestAPI:
     """Test backtest API endpoints"""
     
@@ -70,6 +70,406 @@ class TestBacktestService:
         service = BacktestService(mock_db)
         
         assert service.db_session is not None
+    
+    @pytest.mark.parametrize("periods,params", [
+        (100, None),
+        (800, None),
+        (800, {'take_profit': 0.05, 'stop_loss': None, 'position_size': 0.5}),
+        (800, {'take_profit': 0.0, 'stop_loss': 0.0}),
+    ])
+    def test_vectorized_matches_backtrader(self, periods, params):
+        """Test vectorized engine reproduces Backtrader metrics"""
+        from unittest.mock import Mock
+        
+        dates = pd.date_range(start='2023-06-01', periods=periods, freq='D')
+        rng = np.random.default_rng(7)
+        close = 100 * np.exp(np.cumsum(rng.standard_normal(periods) * 0.02))
+        data = pd.DataFrame({
+            'open': close * (1 + rng.standard_normal(periods) * 0.005),
+            'high': close * 1.01,
+            'low': close * 0.99,
+            'close': close,
+            'volume': rng.integers(1000000, 5000000, periods),
+        }, index=dates)
+        signals = rng.random(periods).tolist()
+        
+        service = BacktestService(Mock())
+        expected = service.run_backtest(
+            'XRPUSD', dates[0], dates[-1], data, signals, params=params
+        )
+        actual = service.run_backtest(
+            'XRPUSD', dates[0], dates[-1], data, signals, engine='vectorized', params=params
+        )
+        
+        assert actual['total_trades'] == expected['total_trades']
+        for key in ['final_value', 'total_return', 'sharpe_ratio', 'max_drawdown',
+                    'win_rate', 'profit_factor']:
+            assert actual[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-9)
+    
+    def test_unknown_engine_rejected(self, sample_ohlcv_data):
+        """Test invalid engine name raises"""
+        from unittest.mock import Mock
+        service = BacktestService(Mock())
+        
+        with pytest.raises(ValueError):
+            service.run_backtest(
+                'XRPUSD', datetime(2025, 1, 1), datetime(2025, 4, 10),
+                sample_ohlcv_data, [0.5] * 100, engine='numba'
+            )
+
+
+class TestPortfolioBacktest:
+    """Test multi-symbol backtests on a shared cash account"""
+    
+    @staticmethod
+    def _ohlcv(periods, seed):
+        rng = np.random.default_rng(seed)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, periods)))
+        return pd.DataFrame({
+            'open': close * (1 + rng.normal(0, 0.003, periods)),
+            'high': close * 1.01,
+            'low': close * 0.99,
+            'close': close,
+            'volume': 1.0,
+        }, index=pd.date_range('2020-01-01', periods=periods, freq='D'))
+    
+    @pytest.mark.parametrize("exits", [{}, {'take_profit': 0.02, 'stop_loss': 0.01}])
+    def test_single_symbol_matches_vectorized(self, exits):
+        """Test a one-symbol portfolio reproduces the single-symbol engine"""
+        from app.services.portfolio_backtest import run_portfolio_backtest
+        from app.services.vectorized_backtest import run_vectorized_backtest
+        
+        data = self._ohlcv(800, 1)
+        signals = np.random.default_rng(2).random(800).tolist()
+        
+        portfolio = run_portfolio_backtest({'A': data}, {'A': signals}, position_size=0.3, **exits)
+        single = run_vectorized_backtest(data, signals, position_size=0.3, **exits)
+        
+        np.testing.assert_allclose(portfolio.equity, single.equity, rtol=1e-9)
+        np.testing.assert_allclose(portfolio.pnlcomm, single.pnlcomm, rtol=1e-9, atol=1e-9)
+    
+    def test_attribution_sums_to_portfolio(self):
+        """Test per-symbol PnL and drawdown contributions add up"""
+        data = {'A': self._ohlcv(800, 1), 'B': self._ohlcv(700, 3), 'C': self._ohlcv(800, 4)}
+        rng = np.random.default_rng(5)
+        signals = {symbol: rng.random(len(frame)).tolist() for symbol, frame in data.items()}
+        
+        service = BacktestService(None)
+        metrics = service.run_portfolio_backtest(None, None, data, signals, params={'position_size': 0.3})
+        attribution = metrics['attribution']
+        
+        assert metrics['symbols'] == ['A', 'B', 'C']
+        assert sum(a['pnl'] for a in attribution.values()) == pytest.approx(metrics['final_value'] - 10000.0)
+        assert metrics['total_trades'] == sum(a['total_trades'] for a in attribution.values())
+        assert metrics['correlation']['A']['A'] == 1.0
+        assert metrics['correlation']['A']['B'] == metrics['correlation']['B']['A']
+        
+        equity = service.equity_curve
+        peak = np.maximum.accumulate(equity)
+        trough = int(np.argmax((peak - equity) / peak))
+        drawdown = equity[trough] - equity[:trough + 1].max()
+        assert sum(a['drawdown_contribution'] for a in attribution.values()) == pytest.approx(drawdown)
+        assert metrics['max_drawdown'] == pytest.approx(100.0 * -drawdown / equity[:trough + 1].max())
+    
+    def test_defaults_match_single_symbol_run(self):
+        """Test a default one-symbol portfolio run matches a default vectorized run, exit levels included"""
+        data = self._ohlcv(400, 1)
+        signals = np.random.default_rng(6).random(400).tolist()
+        
+        single = BacktestService(None).run_backtest(
+            'A', None, None, data, signals, engine='vectorized'
+        )
+        portfolio = BacktestService(None).run_portfolio_backtest(None, None, {'A': data}, {'A': signals})
+        
+        assert portfolio['final_value'] == pytest.approx(single['final_value'])
+        assert portfolio['total_trades'] == single['total_trades']
+
+
+class TestIncrementalBacktest:
+    """Test resuming a checkpointed backtest on appended bars"""
+    
+    @pytest.mark.parametrize("params", [
+        None,
+        {'take_profit': 0.05, 'stop_loss': 0.03, 'position_size': 0.5},
+    ])
+    def test_extension_matches_full_rerun(self, params):
+        """Test nightly-style extensions reproduce a run over the whole history"""
+        rng = np.random.default_rng(1)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 900)))
+        data = pd.DataFrame({
+            'open': close * (1 + rng.normal(0, 0.003, 900)),
+            'high': close * 1.01,
+            'low': close * 0.99,
+            'close': close,
+            'volume': 1.0,
+        }, index=pd.date_range('2020-01-01', periods=900, freq='D'))
+        signals = rng.random(900).tolist()
+        
+        full = BacktestService(None)
+        expected = full.run_backtest('XRPUSD', None, None, data, signals, engine='vectorized', params=params)
+        
+        service = BacktestService(None)
+        service.run_backtest('XRPUSD', None, None, data.iloc[:360], signals[:360], engine='vectorized', params=params)
+        checkpoint = service.checkpoint
+        curves = [service.equity_curve]
+        # Cross a year boundary with multi-bar and single-bar steps
+        for start, stop in [(360, 700), *((bar, bar + 1) for bar in range(700, 900))]:
+            metrics = service.extend_backtest(
+                'XRPUSD', None, None, checkpoint, data.iloc[start:stop], signals[start:stop]
+            )
+            curves.append(service.equity_curve)
+        
+        np.testing.assert_allclose(np.concatenate(curves), full.equity_curve, rtol=1e-12)
+        np.testing.assert_allclose(service.trade_returns, full.trade_returns, atol=1e-12)
+        # Checkpoints keep no equity curve, so only the headline metrics carry over
+        assert set(metrics) < set(expected)
+        for key, value in metrics.items():
+            assert value == pytest.approx(expected[key], rel=1e-9), key
+    
+    def test_checkpoint_round_trips_and_rejects_old_bars(self, sample_ohlcv_data, tmp_path):
+        """Test saved checkpoints reload and refuse already-processed bars"""
+        from app.services.incremental_backtest import load_checkpoint, save_checkpoint
+        
+        service = BacktestService(None)
+        service.run_backtest(
+            'XRPUSD', None, None, sample_ohlcv_data.iloc[:80], [0.6] * 80, engine='vectorized'
+        )
+        path = str(tmp_path / 'checkpoint.json')
+        save_checkpoint(service.checkpoint, path)
+        checkpoint = load_checkpoint(path)
+        
+        assert checkpoint == service.checkpoint
+        with pytest.raises(ValueError, match="after the checkpoint"):
+            service.extend_backtest(
+                'XRPUSD', None, None, checkpoint, sample_ohlcv_data.iloc[79:], [0.6] * 21
+            )
+
+
+class TestBacktestProgress:
+    """Test throttled progress reporting from inside the engines"""
+    
+    @pytest.mark.parametrize("engine", ["backtrader", "vectorized"])
+    def test_final_report_carries_downsampled_equity(self, sample_ohlcv_data, engine):
+        """Test the last report is complete and its curve samples the equity"""
+        from app.services.backtest_progress import ProgressTracker
+        
+        reports = []
+        tracker = ProgressTracker(len(sample_ohlcv_data), reports.append, interval=0.0, max_points=16)
+        service = BacktestService(None)
+        service.run_backtest(
+            'XRPUSD', None, None, sample_ohlcv_data, [0.6] * 100, engine=engine, progress=tracker
+        )
+        
+        final = reports[-1]
+        assert final['progress'] == 100.0
+        assert final['bars_processed'] == 100
+        assert len(final['equity']) <= 16
+        for bar, value in final['equity']:
+            assert value == pytest.approx(service.equity_curve[int(bar) - 1])
+        if engine == "backtrader":
+            # Intermediate reports were published while Cerebro was running
+            assert len(reports) > 1 and reports[0]['progress'] < 100.0
+    
+    def test_reports_are_throttled(self):
+        """Test per-bar updates publish at most once per interval"""
+        from app.services.backtest_progress import ProgressTracker
+        
+        reports = []
+        tracker = ProgressTracker(100000, reports.append, interval=3600.0)
+        for bar in range(1, 100001):
+            tracker.update(bar, 10000.0 + bar)
+        
+        assert reports == []
+        tracker.complete()
+        assert len(reports) == 1 and reports[0]['progress'] == 100.0
+        assert len(tracker.points) <= tracker.max_points
+
+
+class TestBacktestCache:
+    """Test content-addressed result caching"""
+    
+    def test_repeat_run_served_from_cache(self, sample_ohlcv_data, tmp_path):
+        """Test identical inputs hit the cache and return the same curve"""
+        from unittest.mock import Mock, patch
+        from app.services.backtest_cache import BacktestCache
+        
+        signals = np.random.default_rng(0).random(len(sample_ohlcv_data)).tolist()
+        service = BacktestService(Mock(), cache=BacktestCache(str(tmp_path)))
+        args = ('XRPUSD', datetime(2025, 1, 1), datetime(2025, 4, 10), sample_ohlcv_data, signals)
+        
+        first = service.run_backtest(*args)
+        first_curve = service.equity_curve
+        with patch.object(BacktestService, '_run_backtrader') as engine:
+            second = service.run_backtest(*args)
+        
+        engine.assert_not_called()
+        assert second == first
+        np.testing.assert_array_equal(service.equity_curve, first_curve)
+        assert len(first_curve) == len(sample_ohlcv_data)
+    
+    def test_changed_inputs_miss(self, sample_ohlcv_data, tmp_path):
+        """Test any input change produces a different key"""
+        from app.services.backtest_cache import BacktestCache
+        
+        signals = [0.6] * len(sample_ohlcv_data)
+        base = ('XRPUSD', None, None, sample_ohlcv_data, signals, 10000.0, 0.001, 'vectorized', {})
+        key = BacktestCache.key(*base)
+        
+        assert BacktestCache.key(*base) == key
+        assert BacktestCache.key(*base[:4], [0.4] * len(signals), *base[5:]) != key
+        assert BacktestCache.key(*base[:6], 0.002, *base[7:]) != key
+        assert BacktestCache.key(*base[:8], {'stop_loss': 0.05}) != key
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test least recently used entries are evicted first"""
+        import os
+        from app.services.backtest_cache import BacktestCache
+        
+        cache = BacktestCache(str(tmp_path), max_entries=2)
+        for i, key in enumerate(['a', 'b']):
+            cache.put(key, {'final_value': float(i)}, {'equity': np.arange(3.0)})
+            os.utime(tmp_path / f"{key}.npz", (i, i))
+        cache.get('a')  # 'a' becomes most recent
+        cache.put('c', {'final_value': 2.0}, {})
+        
+        assert cache.get('b') is None
+        assert cache.get('a')[0] == {'final_value': 0.0}
+        assert cache.get('c') == ({'final_value': 2.0}, {})
+
+
+class TestParameterSweep:
+    """Test parallel parameter sweeps"""
+    
+    def test_grid_parameters(self):
+        """Test grid expansion covers every combination"""
+        from app.services.sweep_service import grid_parameters
+        
+        param_sets = grid_parameters({'take_profit': [0.02, 0.05], 'stop_loss': [0.01, 0.02, 0.03]})
+        
+        assert len(param_sets) == 6
+        assert {'take_profit': 0.05, 'stop_loss': 0.03} in param_sets
+    
+    def test_sweep_matches_single_runs(self, sample_ohlcv_data):
+        """Test pooled results equal sequential backtests, ranked by Sharpe"""
+        from unittest.mock import Mock
+        from app.services.sweep_service import ParameterSweepService, random_parameters
+        
+        signals = np.random.default_rng(0).random(len(sample_ohlcv_data)).tolist()
+        param_sets = random_parameters(
+            {'take_profit': (0.01, 0.1), 'position_size': (0.1, 0.9)}, n_samples=6, seed=1
+        )
+        
+        results = ParameterSweepService(max_workers=2, batch_size=2).run(
+            sample_ohlcv_data, signals, param_sets
+        )
+        
+        assert [r['rank'] for r in results] == list(range(1, 7))
+        sharpes = [r['sharpe_ratio'] for r in results]
+        assert sharpes == sorted(sharpes, reverse=True)
+        # 100 bars inside one year still rank by distinct Sharpe ratios, not the return tie-break
+        assert len(set(sharpes)) == len(sharpes)
+        
+        service = BacktestService(Mock())
+        for result in results:
+            expected = service.run_backtest(
+                'XRPUSD', None, None, sample_ohlcv_data, signals,
+                engine='vectorized', params=result['params']
+            )
+            assert result['final_value'] == pytest.approx(expected['final_value'])
+    
+    def test_sweep_size_is_bounded(self):
+        """Test oversized grids are rejected and worker counts are capped at the CPU count"""
+        import os
+        from pydantic import ValidationError
+        from app.schemas.backtest import ParameterSweepRequest
+        from app.services.sweep_service import ParameterSweepService
+        
+        request = {'symbol': 'XRPUSD', 'start_date': '2025-01-01', 'end_date': '2025-06-01'}
+        grid = {name: [0.01 * k for k in range(1, 21)] for name in ('take_profit', 'stop_loss', 'position_size', 'threshold')}
+        with pytest.raises(ValidationError, match="160000 combinations"):
+            ParameterSweepRequest(**request, grid=grid)
+        with pytest.raises(ValidationError):
+            ParameterSweepRequest(**request, grid={'take_profit': [0.02]}, max_workers=1000)
+        
+        assert ParameterSweepService(max_workers=64).max_workers == min(64, os.cpu_count() or 1)
+    
+    def test_unknown_param_rejected(self, sample_ohlcv_data):
+        """Test invalid parameter names fail before workers start"""
+        from app.services.sweep_service import ParameterSweepService
+        
+        with pytest.raises(ValueError):
+            ParameterSweepService(max_workers=1).iter_results(
+                sample_ohlcv_data, [0.5] * 100, [{'trailing_stop': 0.01}]
+            )
+
+
+class TestStrategySimulation:
+    """Test replaying grid, DCA and arbitrage strategies on a simulated clock"""
+    
+    def test_grid_fills_from_intrabar_range(self):
+        """Test grid levels fill when the bar's range reaches them, at the open on gaps"""
+        from app.strategies.grid_trading import GridTradingStrategy
+        
+        data = pd.DataFrame({
+            'open': [100.0, 100.0, 99.0, 101.0],
+            'high': [100.5, 100.0, 99.5, 102.0],
+            'low': [99.0, 98.0, 98.5, 100.5],
+            'close': [100.0, 99.0, 99.0, 101.0],
+            'volume': 1.0,
+        }, index=pd.date_range('2024-01-01', periods=4, freq='h'))
+        strategy = GridTradingStrategy(
+            'XRPUSD', grid_levels=2, grid_amount=1000, profit_percentage=1.0,
+            upper_price=110, lower_price=90,
+        )
+        
+        service = BacktestService(None)
+        metrics = service.run_strategy_backtest('XRPUSD', None, None, strategy, data, commission=0.0)
+        
+        # Stock the 100 sell level, sell it on bar 0, rebuy at 99 on bar 1,
+        # then the 99.99 offset sell fills at bar 3's gap-up open of 101
+        np.testing.assert_allclose(service.equity_curve, [10000.0, 10000.0, 10000.0, 10020.0])
+        assert metrics['total_trades'] == 2
+        assert strategy.get_pnl()['total_profit'] == pytest.approx(20.0)
+        assert strategy.completed_trades[-1]['closed_at'] == data.index[3]
+        assert [o['type'] for o in strategy.active_orders] == ['grid_buy', 'offset_buy']
+    
+    def test_dca_follows_schedule_and_price_limits(self):
+        """Test DCA buys on its cadence and defers buys outside its price limits"""
+        from app.strategies.dca_strategy import DCAStrategy
+        
+        close = np.full(30, 10.0)
+        close[7] = 50.0
+        data = pd.DataFrame({
+            'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0,
+        }, index=pd.date_range('2024-01-01', periods=30, freq='D'))
+        strategy = DCAStrategy('XRPUSD', investment_amount=100, interval_days=7, max_price=20)
+        
+        service = BacktestService(None)
+        metrics = service.run_strategy_backtest('XRPUSD', None, None, strategy, data, initial_cash=1000)
+        
+        bought = [p['timestamp'] for p in strategy.get_purchases()]
+        assert bought == list(data.index[[0, 8, 15, 22, 29]])
+        assert metrics['total_trades'] == 5
+        assert metrics['final_value'] == pytest.approx(1000 - 5 * 100 * 0.001)
+    
+    def test_arbitrage_books_net_profit_of_wide_spreads(self):
+        """Test only bars whose spread clears the minimum are traded"""
+        from app.strategies.arbitrage import ArbitrageStrategy
+        
+        index = pd.date_range('2024-01-01', periods=6, freq='min')
+        kraken = pd.Series([100.0, 100.0, 100.0, 100.0, 100.0, 100.0], index=index)
+        binance = pd.Series([100.1, 101.0, 99.0, 100.2, 102.0, 100.0], index=index)
+        strategy = ArbitrageStrategy('XRPUSD', min_spread_percent=0.5)
+        
+        service = BacktestService(None)
+        metrics = service.run_strategy_backtest(
+            'XRPUSD', None, None, strategy, {'kraken': kraken, 'binance': binance},
+        )
+        
+        traded = [t['created_at'] for t in strategy.executed_trades]
+        assert traded == list(index[[1, 2, 4]])
+        net = sum(t['net_profit'] for t in strategy.executed_trades)
+        assert metrics['final_value'] == pytest.approx(10000 + net)
 
 
 class TestGridTrading:
@@ -0,0 +1,61 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.array_feed import ArrayData, candle_columns, save_candles
+from benchmarks.backtest_benchmark import pandas_datafeed
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 500)))
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.002, 500)),
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": rng.integers(1, 1000, 500),
+    }, index=pd.date_range("2021-03-01 09:30", periods=500, freq="h"))
+
+
+def _bars(feed: bt.feed.DataBase) -> np.ndarray:
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(bt.Strategy)
+    data = cerebro.run()[0].data
+    n = len(data)
+    lines = [data.datetime, data.open, data.high, data.low, data.close, data.volume]
+    return np.array([line.get(ago=0, size=n) for line in lines])
+
+
+def test_float_columns_are_not_copied(ohlcv) -> None:
+    columns = candle_columns(ohlcv)
+
+    assert np.shares_memory(columns["close"], ohlcv["close"].to_numpy())
+    assert columns["volume"].dtype == np.float64
+    assert columns["timestamp"][1] - columns["timestamp"][0] == 3600 * 10**9
+
+
+def test_bars_match_pandas_feed(ohlcv) -> None:
+    expected = _bars(pandas_datafeed(ohlcv))
+
+    np.testing.assert_allclose(_bars(ArrayData.from_frame(ohlcv)), expected, rtol=0, atol=1e-9)
+    assert bt.num2date(expected[0, 0]) == ohlcv.index[0].to_pydatetime()
+
+
+def test_feed_reads_memory_mapped_archive(ohlcv, tmp_path) -> None:
+    path = save_candles(str(tmp_path / "candles.npz"), ohlcv)
+    feed = ArrayData.from_archive(path)
+
+    assert isinstance(feed.p.dataname["close"], np.memmap)
+    np.testing.assert_array_equal(_bars(feed), _bars(ArrayData.from_frame(ohlcv)))
+
+
+def test_missing_columns_rejected(ohlcv) -> None:
+    columns = candle_columns(ohlcv)
+    del columns["volume"]
+
+    with pytest.raises(ValueError, match="volume"):
+        _bars(ArrayData(dataname=columns))
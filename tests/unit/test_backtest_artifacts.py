@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest_artifacts import (
+    equity_frame,
+    load_run_columns,
+    save_run_columns,
+    trade_frame,
+)
+from app.services.backtest_service import BacktestService
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 600)))
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.003, 600)),
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": 1.0,
+    }, index=pd.date_range("2020-01-01", periods=600, freq="D"))
+
+
+def test_columns_round_trip_memory_mapped(tmp_path) -> None:
+    columns = {
+        "timestamp": np.arange(1_000_000, dtype=np.int64) * 60_000_000_000,
+        "equity": np.linspace(10000.0, 12000.0, 1_000_000),
+        "trade_pnlcomm": np.array([1.5, -0.5]),
+        "trade_exit_bar": np.array([], dtype=np.int64),
+    }
+    path = save_run_columns(str(tmp_path / "runs" / "run.npz"), columns)
+
+    mapped = load_run_columns(path)
+    assert isinstance(mapped["equity"], np.memmap)
+    for name, values in columns.items():
+        np.testing.assert_array_equal(mapped[name], values)
+        np.testing.assert_array_equal(load_run_columns(path, mmap=False)[name], values)
+
+    frame = equity_frame(mapped, stride=1000)
+    assert len(frame) == 1000
+    assert frame.index[1] - frame.index[0] == pd.Timedelta(minutes=1000)
+
+
+@pytest.mark.parametrize("engine", ["backtrader", "vectorized"])
+def test_engines_store_the_same_run(ohlcv, tmp_path, engine) -> None:
+    signals = np.random.default_rng(6).random(len(ohlcv)).tolist()
+    reference = BacktestService(None)
+    reference.run_backtest("XRPUSD", None, None, ohlcv, signals, engine="vectorized")
+
+    service = BacktestService(None)
+    service.run_backtest("XRPUSD", None, None, ohlcv, signals, engine=engine)
+    columns = load_run_columns(save_run_columns(str(tmp_path / f"{engine}.npz"), service.run_columns))
+
+    assert set(columns) == set(reference.run_columns)
+    for name, values in reference.run_columns.items():
+        np.testing.assert_allclose(columns[name], values, rtol=1e-9, atol=1e-9, err_msg=name)
+    trades = trade_frame(columns)
+    assert list(trades.columns[:2]) == ["entry_bar", "exit_bar"]
+    assert (trades["exit_bar"] > trades["entry_bar"]).all()
+
+
+def test_repeated_runs_share_one_artifact(ohlcv, tmp_path, monkeypatch) -> None:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.core.config import settings
+    from app.db.models import BacktestResult
+    from app.services.backtest_cache import BacktestCache
+    from app.services.job_service import _save_backtest_result
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    BacktestResult.metadata.create_all(engine, tables=[BacktestResult.__table__])
+    monkeypatch.setattr(settings, "BACKTEST_ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    cache = BacktestCache(str(tmp_path / "cache"))
+    signals = np.random.default_rng(6).random(len(ohlcv)).tolist()
+
+    with sessionmaker(bind=engine)() as db:
+        for _ in range(3):
+            # The second and third runs are cache hits
+            service = BacktestService(None, cache=cache)
+            metrics = service.run_backtest("XRPUSD", ohlcv.index[0], ohlcv.index[-1], ohlcv, signals, engine="vectorized")
+            _save_backtest_result(db, "XRPUSD", metrics, service.run_columns, service.run_key)
+        paths = {row.artifact_path for row in db.query(BacktestResult)}
+
+    assert len(paths) == 1
+    assert [p.name for p in (tmp_path / "artifacts").iterdir()] == [f"{service.run_key}.npz"]
+    np.testing.assert_array_equal(load_run_columns(paths.pop())["equity"], service.run_columns["equity"])
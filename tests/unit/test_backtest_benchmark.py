@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.backtest_benchmark import compare, run_benchmarks, synthetic_ohlcv
+
+
+def test_synthetic_data_is_deterministic() -> None:
+    first, second = synthetic_ohlcv(1000, seed=7), synthetic_ohlcv(1000, seed=7)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert (first["high"] >= first[["open", "close"]].max(axis=1)).all()
+    assert (first["low"] <= first[["open", "close"]].min(axis=1)).all()
+
+
+def test_every_stage_is_recorded_and_comparable() -> None:
+    records = run_benchmarks([300], ["vectorized", "backtrader"], memory=True)
+
+    assert [r["stage"] for r in records] == [
+        "datafeed_preparation",
+        "datafeed_preparation:pandas",
+        "feature_building",
+        "model_training",
+        "signal_generation",
+        "engine_run:vectorized",
+        "metric_extraction:vectorized",
+        "datafeed_load:array",
+        "datafeed_load:pandas",
+        "engine_run:backtrader",
+        "metric_extraction:backtrader",
+    ]
+    assert all(r["seconds"] > 0 and r["peak_memory_mb"] is not None for r in records)
+
+    rows = compare({"results": records}, {"results": records})
+    assert len(rows) == len(records)
+    assert np.allclose([row["ratio"] for row in rows], 1.0)
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest_service import BacktestService
+from app.services.cost_model import CostModel, FeeTier
+from app.strategies.arbitrage import ArbitrageStrategy
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 400)))
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.003, 400)),
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": rng.uniform(5, 50, 400),
+    }, index=pd.date_range("2021-01-01", periods=400, freq="D"))
+
+
+def test_fee_tiers_follow_trailing_notional() -> None:
+    model = CostModel(
+        maker_fee=0.002,
+        taker_fee=0.003,
+        tiers=(FeeTier(1000, 0.001, 0.002), FeeTier(5000, 0.0, 0.001)),
+        tier_window=timedelta(days=3),
+    )
+    stamps = pd.date_range("2024-01-01", periods=5, freq="D")
+    market = model.market(stamps, np.ones(5), None)
+
+    prior = model.prior_notional(market, np.arange(5), np.array([600.0, 600.0, 6000.0, 10.0, 10.0]))
+
+    # Fills three or more days back drop out of the window
+    np.testing.assert_allclose(prior, [0.0, 600.0, 1200.0, 6600.0, 6010.0])
+    np.testing.assert_allclose(model.fee_rates(prior), [0.003, 0.003, 0.002, 0.001, 0.001])
+    np.testing.assert_allclose(model.fee_rates(prior, maker=True), [0.002, 0.002, 0.001, 0.0, 0.0])
+
+
+def test_spread_and_square_root_impact() -> None:
+    model = CostModel(taker_fee=0.001, spread_bps=20, impact_coefficient=0.5)
+    close = np.array([100.0, 102.0, 100.0, 103.0, 101.0])
+    market = model.market(pd.date_range("2024-01-01", periods=5, freq="D"), close, np.array([0, 10, 10, 40, 40.0]))
+
+    rates = model.fill_rates(market, np.array([0, 3, 4]), np.array([5.0, 10.0, 10.0]), np.zeros(3))
+
+    # No volume, no impact; otherwise impact uses volatility known a bar earlier
+    returns = np.diff(close) / close[:-1]
+    assert rates[0] == pytest.approx(0.002)
+    assert rates[1] == pytest.approx(0.002 + 0.5 * returns[:2].std() * 0.5)
+    assert rates[2] == pytest.approx(0.002 + 0.5 * returns[:3].std() * 0.5)
+
+
+def test_engines_agree_with_cost_model(ohlcv: pd.DataFrame) -> None:
+    signals = np.random.default_rng(2).uniform(0, 1, len(ohlcv)).tolist()
+    model = CostModel(
+        tiers=(FeeTier(1000, 0.001, 0.002), FeeTier(5000, 0.0005, 0.001)),
+        spread_bps=10,
+        impact_coefficient=0.5,
+        tier_window=timedelta(days=20),
+    )
+
+    event = BacktestService(None).run_backtest("X", None, None, ohlcv, signals, cost_model=model)
+    vector = BacktestService(None).run_backtest(
+        "X", None, None, ohlcv, signals, engine="vectorized", cost_model=model,
+    )
+    flat = BacktestService(None).run_backtest("X", None, None, ohlcv, signals, engine="vectorized")
+
+    for key in ("final_value", "sharpe_ratio", "max_drawdown", "profit_factor"):
+        assert vector[key] == pytest.approx(event[key], rel=1e-9)
+    assert vector["total_trades"] == event["total_trades"]
+    assert vector["final_value"] < flat["final_value"]
+
+
+def test_flat_cost_model_matches_commission(ohlcv: pd.DataFrame) -> None:
+    signals = np.tile([0.9, 0.9, 0.1], 134)[:len(ohlcv)].tolist()
+
+    plain = BacktestService(None).run_backtest("X", None, None, ohlcv, signals, engine="vectorized")
+    modelled = BacktestService(None).run_backtest(
+        "X", None, None, ohlcv, signals, engine="vectorized", cost_model=CostModel.flat(0.001),
+    )
+
+    assert modelled["final_value"] == pytest.approx(plain["final_value"], rel=1e-12)
+
+
+def test_arbitrage_fees_charged_on_notional() -> None:
+    net = ArbitrageStrategy("XRPUSD").calculate_net_profit(10.0, 1000.0, 0.1, 0.2, transfer_fee=1.0)
+
+    assert net["buy_fee"] == pytest.approx(1.0)
+    assert net["sell_fee"] == pytest.approx(2.02)
+    assert net["net_profit"] == pytest.approx(10.0 - 4.02)
+    assert net["roi_percent"] == pytest.approx(0.598)
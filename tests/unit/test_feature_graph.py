@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_graph import FeatureGraph, load_feature_sets
+from app.services.ml_signal_service import MLSignalService
+from app.services.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+    return pd.DataFrame(
+        {
+            "close": close,
+            "high": close * (1 + rng.uniform(0, 0.01, 400)),
+            "low": close * (1 - rng.uniform(0, 0.01, 400)),
+            "volume": rng.uniform(1, 5, 400),
+        },
+        index=pd.date_range("2024-01-01", periods=400, freq="h"),
+    )
+
+
+def test_default_set_matches_built_in_features(ohlcv: pd.DataFrame) -> None:
+    X, _ = MLSignalService().compute_features(ohlcv)
+
+    np.testing.assert_array_equal(FeatureGraph.from_feature_set("default").evaluate(ohlcv), X)
+
+
+def test_configured_sets_resolve_with_shared_intermediates(ohlcv: pd.DataFrame) -> None:
+    feature_sets = load_feature_sets()
+    assert feature_sets["advanced"][:2] == ["rsi_14", "rsi_20"]
+
+    graph = FeatureGraph.from_feature_set("advanced", "1h")
+    singles = [FeatureGraph([name]) for name in graph.columns]
+    assert len(graph.nodes) < sum(len(single.nodes) for single in singles)
+    # rsi_14 and rsi_20 share the close diff and its gains and losses
+    assert len(FeatureGraph(["rsi_14", "rsi_20"]).nodes) < 2 * len(FeatureGraph(["rsi_14"]).nodes)
+    assert len(FeatureGraph(["rsi", "rsi_14"]).nodes) == len(FeatureGraph(["rsi_14"]).nodes)
+
+    matrix = graph.evaluate(ohlcv)
+    for k, single in enumerate(singles):
+        np.testing.assert_array_equal(matrix[:, [k]], single.evaluate(ohlcv))
+
+
+def test_feature_definitions(ohlcv: pd.DataFrame) -> None:
+    graph = FeatureGraph(["rsi_20", "atr", "volume_sma_ratio", "price_change_4h", "bb_width"], bar_minutes=60)
+    rsi, atr, volume_ratio, change, width = graph.evaluate(ohlcv).T
+    close = ohlcv["close"]
+
+    np.testing.assert_allclose(rsi, MLSignalService()._calculate_rsi(close, 20))
+    true_range = pd.concat(
+        [ohlcv["high"] - ohlcv["low"], (ohlcv["high"] - close.shift()).abs(), (ohlcv["low"] - close.shift()).abs()],
+        axis=1,
+    ).max(axis=1)
+    np.testing.assert_allclose(atr, true_range.rolling(14).mean().fillna(0))
+    np.testing.assert_allclose(volume_ratio[19:], (ohlcv["volume"] / ohlcv["volume"].rolling(20).mean())[19:])
+    np.testing.assert_allclose(change, close.pct_change(4).fillna(0))
+    np.testing.assert_allclose(width[19:], (4 * close.rolling(20).std() / close.rolling(20).mean())[19:])
+
+    daily = FeatureGraph(["price_change_4h"], bar_minutes=1440).evaluate(ohlcv)[:, 0]
+    np.testing.assert_allclose(daily, close.pct_change(1).fillna(0))
+
+    with pytest.raises(ValueError, match="Unknown feature"):
+        FeatureGraph(["rsi_14", "moon_phase"])
+    with pytest.raises(ValueError, match="Unknown feature set"):
+        FeatureGraph.from_feature_set("missing")
+
+
+def test_service_trains_and_serves_a_feature_set(ohlcv: pd.DataFrame, tmp_path) -> None:
+    service = MLSignalService(lookback_period=10, feature_set="advanced")
+    X, y = service.prepare_features(ohlcv, timeframe="1h")
+    assert X.shape == (len(ohlcv), 8)
+    service.train_rf_model(X, y, n_jobs=1)
+
+    registry = ModelRegistry(str(tmp_path))
+    # The training timeframe is saved with the model without being passed as metadata
+    registry.save("XRPUSD", service, {})
+    loaded = registry.load("XRPUSD")
+    assert (loaded.feature_set, loaded.timeframe) == ("advanced", "1h")
+    expected = service.predict_signals(service.scaler.transform(service.compute_features(ohlcv, "1h")[0])[-11:])[-1]
+    assert registry.predict("XRPUSD", ohlcv) == pytest.approx(expected)
+    daily = service.predict_signals(service.scaler.transform(service.compute_features(ohlcv, "1d")[0])[-11:])[-1]
+    assert expected != pytest.approx(daily)
@@ -0,0 +1,109 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_store import FeatureGapError, FeatureStore
+from app.services.ml_signal_service import MLSignalService
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 600)))
+    return pd.DataFrame({
+        "open": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        # Includes zero volume, whose change is infinite
+        "volume": rng.integers(0, 5, 600).astype(float),
+    }, index=pd.date_range("2022-01-01", periods=600, freq="h"))
+
+
+def test_appends_match_full_recompute(ohlcv: pd.DataFrame, tmp_path) -> None:
+    store = FeatureStore(str(tmp_path))
+    for start, stop in ((0, 30), (10, 250), (250, 251), (251, 600)):
+        stored = store.update("XRPUSD", "1h", ohlcv.iloc[start:stop])
+
+    service = MLSignalService()
+    X, y = service.compute_features(ohlcv)
+    X_scaled, _ = service.prepare_features(ohlcv)
+
+    assert len(stored) == len(ohlcv)
+    np.testing.assert_allclose(stored.features(), X, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(stored.scaled(), X_scaled, rtol=1e-9, atol=1e-9)
+    np.testing.assert_array_equal(stored.target(), y)
+    np.testing.assert_array_equal(stored.target(slice(-5, None)), y[-5:])
+
+
+def test_known_bars_are_not_recomputed(ohlcv: pd.DataFrame, tmp_path) -> None:
+    store = FeatureStore(str(tmp_path))
+    store.update("XRPUSD", "1h", ohlcv.iloc[:400])
+    meta_path = next(tmp_path.rglob("meta.json"))
+    before = meta_path.read_text()
+
+    store.update("XRPUSD", "1h", ohlcv.iloc[100:400])
+    assert meta_path.read_text() == before
+
+    # An append that crashed before its metadata is cut off by the next one
+    with open(meta_path.parent / "features.f8", "ab") as handle:
+        handle.write(b"\0" * 48 * 3)
+    stored = store.update("XRPUSD", "1h", ohlcv.iloc[400:])
+    assert json.loads(meta_path.read_text())["rows"] == len(stored) == len(ohlcv)
+    np.testing.assert_allclose(stored.features(), MLSignalService().compute_features(ohlcv)[0], atol=1e-9)
+
+
+def test_latest_signals_match_full_history(ohlcv: pd.DataFrame, tmp_path) -> None:
+    service = MLSignalService(lookback_period=20, feature_store=FeatureStore(str(tmp_path)))
+    X, y = service.prepare_features(ohlcv.iloc[:599], symbol="XRPUSD", timeframe="1h")
+    service.train_rf_model(X, y, n_jobs=1)
+
+    latest = service.latest_signals(ohlcv.iloc[599:], "XRPUSD", "1h", n_bars=3)
+    full = service.generate_signals(ohlcv, symbol="XRPUSD", timeframe="1h")
+
+    np.testing.assert_allclose(latest, full[-3:])
+
+
+def test_concurrent_appends_are_serialized(ohlcv: pd.DataFrame, tmp_path) -> None:
+    store = FeatureStore(str(tmp_path))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda stop: store.update("XRPUSD", "1h", ohlcv.iloc[:stop]), (150, 300, 450, 600) * 3))
+
+    stored = store.load("XRPUSD", "1h")
+    assert len(stored) == len(ohlcv)
+    np.testing.assert_allclose(stored.features(), MLSignalService().compute_features(ohlcv)[0], atol=1e-9)
+
+
+def test_empty_data_is_rejected(ohlcv: pd.DataFrame, tmp_path) -> None:
+    service = MLSignalService(feature_store=FeatureStore(str(tmp_path)))
+    with pytest.raises(ValueError, match="No 1h bars"):
+        service.prepare_features(ohlcv.iloc[:0], symbol="XRPUSD", timeframe="1h")
+
+
+def test_bars_before_the_store_are_computed_from_the_request(ohlcv: pd.DataFrame, tmp_path) -> None:
+    service = MLSignalService(feature_store=FeatureStore(str(tmp_path)))
+    service.prepare_features(ohlcv.iloc[300:], symbol="XRPUSD", timeframe="1h")
+
+    X, y = service.prepare_features(ohlcv.iloc[:400], symbol="XRPUSD", timeframe="1h")
+    expected_X, expected_y = MLSignalService().prepare_features(ohlcv.iloc[:400])
+    np.testing.assert_allclose(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_bars_after_a_gap_are_not_appended(ohlcv: pd.DataFrame, tmp_path) -> None:
+    store = FeatureStore(str(tmp_path))
+    store.update("XRPUSD", "1h", ohlcv.iloc[:300])
+
+    with pytest.raises(FeatureGapError):
+        store.update("XRPUSD", "1h", ohlcv.iloc[350:400])
+    assert store.lookup("XRPUSD", "1h", ohlcv.iloc[350:400]) is None
+    assert len(store.load("XRPUSD", "1h")) == 300
+
+    service = MLSignalService(feature_store=store)
+    X, y = service.prepare_features(ohlcv.iloc[350:400], symbol="XRPUSD", timeframe="1h")
+    expected_X, expected_y = MLSignalService().prepare_features(ohlcv.iloc[350:400])
+    np.testing.assert_allclose(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.hyperparameter_tuner import HyperparameterTuner, _init_worker, halving_schedule
+
+
+def test_halving_schedule() -> None:
+    assert halving_schedule(27, 3, 1, 9) == [(27, 1), (9, 3), (3, 9)]
+    assert halving_schedule(4, 2, 1, 100) == [(4, 1), (2, 2), (1, 4)]
+    assert halving_schedule(1, 3, 2, 9) == [(1, 2)]
+
+
+def test_candidates_start_from_the_configured_settings() -> None:
+    tuner = HyperparameterTuner()
+
+    everything = tuner.candidates("trend_lstm")
+    assert everything[0] == {"lstm_units": [128, 64], "sequence_length": 60, "dropout": 0.2}
+    # The configured settings are a grid point too and appear once
+    assert len(everything) == 3 * 2 * 3
+    assert len({str(sorted(c.items())) for c in everything}) == len(everything)
+
+    sampled = tuner.candidates("momentum_classifier", n_trials=4, seed=3)
+    assert len(sampled) == 4 and sampled[0]["layers"] == [64, 32]
+    assert sampled == tuner.candidates("momentum_classifier", n_trials=4, seed=3)
+
+    with pytest.raises(ValueError, match="Unknown model"):
+        tuner.candidates("feature_engineering")
+
+
+def test_successive_halving_prunes_and_persists(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1, (300, 6))
+    y = (X[:, 0] + rng.normal(0, 0.2, 300) > 0.5).astype(int)
+
+    tuner = HyperparameterTuner(root=str(tmp_path), max_workers=2, eta=3, min_epochs=1, max_epochs=3)
+    result = tuner.tune("momentum_classifier", X, y, n_trials=3, seed=0, run_name="run")
+
+    leaderboard = result["leaderboard"]
+    assert tuner.leaderboard("momentum_classifier", "run") == leaderboard
+    assert [entry["status"] for entry in leaderboard] == ["best", "pruned", "pruned"]
+    assert leaderboard[0]["epochs"] == 3
+    assert all(entry["epochs"] == 1 for entry in leaderboard[1:])
+    assert leaderboard[0]["val_loss"] <= min(entry["val_loss"] for entry in leaderboard[1:])
+    assert all(entry["threads"] == max((os.cpu_count() or 1) // 2, 1) for entry in leaderboard)
+    assert os.listdir(tmp_path / "momentum_classifier" / "run" / "trials") == [f"{result['best']['trial']}.keras"]
+
+
+def test_workers_cap_the_blas_loaded_before_the_initializer(tmp_path, monkeypatch) -> None:
+    from threadpoolctl import threadpool_info
+
+    # Inherited by the spawned worker, whose NumPy loads before the initializer runs
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        monkeypatch.setenv(name, "4")
+    np.save(tmp_path / "X.npy", np.zeros((4, 2)))
+    np.save(tmp_path / "y.npy", np.zeros(4))
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(str(tmp_path), 1),
+    ) as pool:
+        pools = pool.submit(threadpool_info).result()
+
+    blas = [info for info in pools if info["user_api"] == "blas"]
+    assert blas and all(info["num_threads"] == 1 for info in blas)
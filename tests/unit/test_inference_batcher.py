@@ -0,0 +1,147 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.inference_batcher import InferenceServer, MicroBatcher
+from app.services.ml_signal_service import MLSignalService
+from app.services.model_registry import ModelRegistry
+from app.services.prometheus_service import inference_batch_size
+
+
+def test_concurrent_requests_share_one_call() -> None:
+    calls = []
+    release = threading.Event()
+
+    def predict(batch: np.ndarray) -> np.ndarray:
+        release.wait(5)
+        calls.append(len(batch))
+        return batch.sum(axis=1)
+
+    batcher = MicroBatcher(predict, "sum", max_batch_size=16, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(np.full(3, k, dtype=float)) for k in range(10)]
+        release.set()
+        results = [future.result(5) for future in futures]
+    finally:
+        batcher.close()
+
+    assert results == [3.0 * k for k in range(10)]
+    assert calls == [10]
+    stats = batcher.stats()
+    assert stats["requests"] == 10 and stats["batches"] == 1
+    assert stats["mean_batch_size"] == 10
+    assert inference_batch_size.labels(model="sum")._sum.get() == 10
+
+
+def test_batch_size_limit_and_mixed_shapes() -> None:
+    calls = []
+
+    def predict(batch: np.ndarray) -> np.ndarray:
+        calls.append(batch.shape)
+        return batch.reshape(len(batch), -1).sum(axis=1)
+
+    batcher = MicroBatcher(predict, "shapes", max_batch_size=4, max_wait_ms=20)
+    try:
+        samples = [np.ones(2)] * 6 + [np.ones(5)] * 2
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(batcher.predict, samples))
+    finally:
+        batcher.close()
+
+    assert results == [2.0] * 6 + [5.0] * 2
+    assert all(shape[0] <= 4 for shape in calls)
+    assert sum(shape[0] for shape in calls) == 8
+
+
+def test_errors_reach_every_caller() -> None:
+    def predict(batch: np.ndarray) -> np.ndarray:
+        raise ValueError("model broke")
+
+    server = InferenceServer(max_wait_ms=20)
+    try:
+        futures = [server.submit("broken", predict, np.zeros(2)) for _ in range(3)]
+        for future in futures:
+            with pytest.raises(ValueError, match="model broke"):
+                future.result(5)
+    finally:
+        server.close()
+
+
+def test_registry_predictions_are_batched(tmp_path) -> None:
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 200)))
+    ohlcv = pd.DataFrame({"close": close, "volume": rng.uniform(1, 5, 200)})
+    service = MLSignalService(lookback_period=10)
+    X, y = service.prepare_features(ohlcv)
+    service.train_rf_model(X, y, n_jobs=1)
+
+    server = InferenceServer(max_wait_ms=50)
+    registry = ModelRegistry(str(tmp_path), inference_server=server)
+    registry.save("XRPUSD", service)
+    windows = [ohlcv.iloc[:end] for end in range(120, 200, 10)]
+    try:
+        with ThreadPoolExecutor(len(windows)) as pool:
+            batched = list(pool.map(lambda data: registry.predict("XRPUSD", data), windows))
+        stats = registry.status()["inference"]["XRPUSD:1"]
+    finally:
+        server.close()
+
+    loaded = registry.load("XRPUSD")
+    X, _ = service.compute_features(ohlcv)
+    for data, signal in zip(windows, batched):
+        # The training rows of the same bars: MACD on the training scale, not the window's
+        expected = loaded.predict_signals(loaded.scaler.transform(X[:len(data)][-11:]))[-1]
+        assert signal == pytest.approx(expected)
+    assert stats["requests"] == len(windows)
+    assert stats["batches"] < len(windows)
+
+
+def _trained(ohlcv: pd.DataFrame, seed: int) -> MLSignalService:
+    service = MLSignalService(lookback_period=10)
+    X, y = service.prepare_features(ohlcv)
+    service.train_rf_model(X, np.random.default_rng(seed).permutation(y), n_jobs=1)
+    return service
+
+
+def test_evicted_versions_release_their_batchers(tmp_path) -> None:
+    rng = np.random.default_rng(4)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 150)))
+    ohlcv = pd.DataFrame({"close": close, "volume": rng.uniform(1, 5, 150)})
+    # A budget below one model: only the newest loaded version stays
+    registry = ModelRegistry(str(tmp_path), memory_budget=1)
+    registry.save("XRPUSD", _trained(ohlcv, 0))
+    registry.save("XRPUSD", _trained(ohlcv, 1))
+    try:
+        registry.predict("XRPUSD", ohlcv, version=1)
+        assert list(registry.status()["inference"]) == ["XRPUSD:1"]
+        registry.predict("XRPUSD", ohlcv, version=2)
+        assert list(registry.status()["inference"]) == ["XRPUSD:2"]
+
+        registry.evict("XRPUSD")
+        assert registry.status()["inference"] == {}
+        registry.predict("XRPUSD", ohlcv, version=2)
+        assert registry.misses == 3
+    finally:
+        registry.inference_server.close()
+
+
+def test_registries_do_not_share_batchers(tmp_path) -> None:
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 150)))
+    ohlcv = pd.DataFrame({"close": close, "volume": rng.uniform(1, 5, 150)})
+    # Same name and version in two registries
+    first, second = ModelRegistry(str(tmp_path / "a")), ModelRegistry(str(tmp_path / "b"))
+    first.save("XRPUSD", _trained(ohlcv, 0))
+    second.save("XRPUSD", _trained(ohlcv, 1))
+    try:
+        for registry in (first, second):
+            loaded = registry.load("XRPUSD")
+            X, _ = loaded.compute_features(ohlcv)
+            expected = loaded.predict_signals(loaded.scaler.transform(X[-11:]))[-1]
+            assert registry.predict("XRPUSD", ohlcv) == pytest.approx(expected)
+    finally:
+        first.inference_server.close()
+        second.inference_server.close()
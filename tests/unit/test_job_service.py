@@ -0,0 +1,165 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.models import BacktestJob
+from app.services.job_service import BacktestJobQueue, JobQueueFullError, JobStatus
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    BacktestJob.metadata.create_all(engine, tables=[BacktestJob.__table__])
+    return sessionmaker(bind=engine)
+
+
+def _queue(session_factory, **kwargs) -> BacktestJobQueue:
+    # dict() echoes the payload; int() raises TypeError on a dict
+    return BacktestJobQueue(
+        session_factory, max_concurrency=1, poll_interval=0.05,
+        handlers={"echo": dict, "boom": int}, **kwargs,
+    )
+
+
+def _crash(payload: dict) -> dict:
+    os._exit(1)
+
+
+async def _wait_for(queue: BacktestJobQueue, job_id: str, status: JobStatus) -> dict:
+    for _ in range(600):
+        job = queue.get(job_id)
+        if job["status"] == status.value:
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"job stuck in {job['status']}")
+
+
+def test_submit_and_cancel_queued_job(session_factory) -> None:
+    queue = _queue(session_factory)
+    job_id = queue.submit("echo", {"symbol": "XRPUSD"})
+
+    assert queue.get(job_id)["status"] == "queued"
+    assert queue.cancel(job_id) is True
+    assert queue.get(job_id)["status"] == "cancelled"
+    assert queue.cancel(job_id) is False
+
+
+def test_queue_is_bounded(session_factory) -> None:
+    queue = _queue(session_factory, max_queued=1)
+    queue.submit("echo", {})
+
+    with pytest.raises(JobQueueFullError):
+        queue.submit("echo", {})
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_in_worker_processes(session_factory) -> None:
+    queue = _queue(session_factory)
+    await queue.start()
+    try:
+        ok = queue.submit("echo", {"symbol": "XRPUSD", "final_value": 10500.0})
+        bad = queue.submit("boom", {})
+
+        await _wait_for(queue, ok, JobStatus.COMPLETED)
+        failed = await _wait_for(queue, bad, JobStatus.FAILED)
+    finally:
+        await queue.stop()
+
+    assert queue.result(ok) == {"symbol": "XRPUSD", "final_value": 10500.0}
+    assert "dict" in failed["error"]
+
+
+@pytest.mark.asyncio
+async def test_pool_is_replaced_after_a_worker_dies(session_factory) -> None:
+    queue = BacktestJobQueue(
+        session_factory, max_concurrency=1, poll_interval=0.05, handlers={"echo": dict, "crash": _crash},
+    )
+    await queue.start()
+    try:
+        crashed = queue.submit("crash", {})
+        failed = await _wait_for(queue, crashed, JobStatus.FAILED)
+        ok = queue.submit("echo", {"a": 1})
+        await _wait_for(queue, ok, JobStatus.COMPLETED)
+    finally:
+        await queue.stop()
+
+    assert failed["error"] == "Backtest worker process died"
+    assert queue.result(ok) == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_orphaned_running_jobs_are_requeued(session_factory) -> None:
+    now = datetime.now(timezone.utc)
+    with session_factory() as db:
+        db.add(BacktestJob(id="orphan", job_type="echo", status="running", payload='{"a": 1}'))
+        db.add(BacktestJob(id="stale", job_type="echo", status="running", payload='{"b": 2}',
+                           worker_id="dead", heartbeat_at=now - timedelta(minutes=5)))
+        # Running live in another process: must not run twice
+        db.add(BacktestJob(id="live", job_type="echo", status="running", payload='{}',
+                           worker_id="other", heartbeat_at=now))
+        db.commit()
+
+    queue = _queue(session_factory)
+    await queue.start()
+    try:
+        await _wait_for(queue, "orphan", JobStatus.COMPLETED)
+        await _wait_for(queue, "stale", JobStatus.COMPLETED)
+    finally:
+        await queue.stop()
+
+    assert queue.result("orphan") == {"a": 1}
+    assert queue.result("stale") == {"b": 2}
+    assert queue.get("live")["status"] == "running"
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_running_jobs_claimed(session_factory) -> None:
+    queue = _queue(session_factory, heartbeat_interval=0.05, stale_after=0.5)
+    await queue.start()
+    try:
+        with session_factory() as db:
+            db.add(BacktestJob(id="mine", job_type="echo", status="running", payload='{}',
+                               worker_id=queue.worker_id, heartbeat_at=datetime.now(timezone.utc)))
+            db.commit()
+        await asyncio.sleep(1.0)
+        assert queue.get("mine")["status"] == "running"
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_watch_streams_latest_progress_then_final_status(session_factory) -> None:
+    queue = _queue(session_factory)
+    await queue.start()
+    try:
+        job_id = queue.submit("echo", {})
+        # Stand in for a worker publishing several reports between polls
+        with session_factory() as db:
+            db.query(BacktestJob).filter(BacktestJob.id == job_id).update({"status": "running"})
+            db.commit()
+        for pct in (10.0, 20.0, 30.0):
+            queue._progress[job_id] = {"progress": pct}
+
+        updates = queue.watch(job_id, interval=0.01)
+        first = await updates.__anext__()
+        queue._record(job_id, JobStatus.COMPLETED, "{}", None)
+        rest = [update async for update in updates]
+    finally:
+        await queue.stop()
+
+    assert first == {"job_id": job_id, "status": "running", "progress": 30.0}
+    assert rest[-1] == {"job_id": job_id, "status": "completed", "error": None, "progress": 100.0}
+
+
+@pytest.mark.asyncio
+async def test_watch_unknown_job(session_factory) -> None:
+    updates = [update async for update in _queue(session_factory).watch("missing")]
+
+    assert updates == [{"job_id": "missing", "status": None, "error": "Job not found"}]
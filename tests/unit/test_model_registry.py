@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_store import FEATURE_COLUMNS
+from app.services.ml_signal_service import MLSignalService
+from app.services.model_registry import ModelNotFoundError, ModelRegistry
+from app.utils.ai_models import TradingAIModels
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 200)))
+    return pd.DataFrame({"close": close, "volume": rng.uniform(1, 5, 200)})
+
+
+def _trained(ohlcv: pd.DataFrame, lookback: int = 10, lstm: bool = False) -> MLSignalService:
+    service = MLSignalService(lookback_period=lookback)
+    X, y = service.prepare_features(ohlcv)
+    service.train_rf_model(X, y, n_jobs=1)
+    if lstm:
+        service.train_lstm_model(X, y, epochs=1)
+    return service
+
+
+def test_versions_round_trip(ohlcv: pd.DataFrame, tmp_path) -> None:
+    registry = ModelRegistry(str(tmp_path))
+    service = _trained(ohlcv, lstm=True)
+
+    assert registry.save("XRPUSD", service, {"timeframe": "1h"}) == 1
+    assert registry.save("XRPUSD", _trained(ohlcv.iloc[:150])) == 2
+
+    assert registry.names() == ["XRPUSD"]
+    assert registry.versions("XRPUSD") == [1, 2]
+    assert registry.metadata("XRPUSD", 1)["timeframe"] == "1h"
+    assert registry.metadata("XRPUSD")["models"] == ["rf"]
+
+    loaded = registry.load("XRPUSD", 1)
+    X, _ = service.prepare_features(ohlcv)
+    np.testing.assert_allclose(loaded.predict_signals(X), service.predict_signals(X), rtol=1e-5)
+    assert registry.predict("XRPUSD", ohlcv, 1) == pytest.approx(service.predict_signals(X)[-1], rel=1e-5)
+
+    with pytest.raises(ModelNotFoundError):
+        registry.load("XRPUSD", 3)
+
+
+def test_predict_uses_the_training_feature_scale(ohlcv: pd.DataFrame, tmp_path) -> None:
+    registry = ModelRegistry(str(tmp_path))
+    service = _trained(ohlcv)
+    registry.save("XRPUSD", service)
+
+    # MACD is divided by the training closes' std, not by that of the submitted candles
+    np.testing.assert_allclose(service.serving_features(ohlcv), service.compute_features(ohlcv)[0])
+    window = ohlcv.iloc[120:160]
+    served, windowed = service.serving_features(window), service.compute_features(window)[0]
+    macd = FEATURE_COLUMNS.index("macd")
+    np.testing.assert_allclose(served[:, macd], windowed[:, macd] * window["close"].std() / service.macd_scale)
+    expected = service.predict_signals(service.scaler.transform(served[-11:]))[-1]
+    assert registry.predict("XRPUSD", window) == pytest.approx(expected)
+
+    legacy = _trained(ohlcv)
+    legacy.macd_scale = None
+    registry.save("ETHUSD", legacy)
+    with pytest.raises(ValueError, match="ETHUSD:1: The MACD scale"):
+        registry.predict("ETHUSD", window)
+
+
+def test_lru_keeps_memory_budget(ohlcv: pd.DataFrame, tmp_path) -> None:
+    registry = ModelRegistry(str(tmp_path))
+    service = _trained(ohlcv)
+    for name in ("A", "B", "C"):
+        registry.save(name, service)
+    size = registry.metadata("A")["size_bytes"]
+    registry.memory_budget = 2 * size
+
+    assert registry.status()["loaded"] == []
+    first = registry.load("A")
+    registry.load("B")
+    assert registry.load("A") is first
+    registry.load("C")
+
+    # B was least recently used
+    assert registry.status()["loaded"] == ["A:1", "C:1"]
+    assert registry.status()["cached_bytes"] == 2 * size
+    assert (registry.hits, registry.misses) == (1, 3)
+
+
+def test_trading_models_predict_lazily(ohlcv: pd.DataFrame, tmp_path) -> None:
+    registry = ModelRegistry(str(tmp_path))
+    registry.save("ETHUSD", _trained(ohlcv))
+    models = TradingAIModels(registry)
+
+    assert models.get_model_status()["models_loaded"] == 0
+    result = models.predict({"symbol": "ETHUSD", "candles": ohlcv.to_dict("records")})
+    assert result["prediction"] in ("up", "down")
+    assert models.get_model_status()["models_loaded"] == 1
+    assert models.predict({"symbol": "BTCUSD", "candles": []})["prediction"] is None
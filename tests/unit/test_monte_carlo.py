@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest_service import BacktestService
+from app.services.monte_carlo import resample_trade_returns
+
+
+@pytest.fixture
+def trade_returns() -> np.ndarray:
+    return np.random.default_rng(7).normal(0.002, 0.02, 120)
+
+
+def test_shuffle_keeps_final_value_but_varies_drawdown(trade_returns) -> None:
+    report = resample_trade_returns(trade_returns, 10000.0, years=2.0, n_simulations=2000, seed=1)
+    shuffle = report["shuffle"]
+
+    final = 10000.0 * np.prod(1.0 + trade_returns)
+    assert shuffle["final_value"]["lower"] == pytest.approx(final)
+    assert shuffle["final_value"]["upper"] == pytest.approx(final)
+    assert shuffle["max_drawdown"]["lower"] < shuffle["max_drawdown"]["upper"]
+
+
+def test_bootstrap_interval_brackets_realized_result(trade_returns) -> None:
+    report = resample_trade_returns(trade_returns, 10000.0, years=2.0, n_simulations=2000, seed=1)
+    bootstrap = report["bootstrap"]
+
+    final = 10000.0 * np.prod(1.0 + trade_returns)
+    assert bootstrap["final_value"]["lower"] < final < bootstrap["final_value"]["upper"]
+    assert 0.0 <= bootstrap["probability_of_loss"] <= 1.0
+    # Seeded runs are reproducible, chunked or not
+    assert resample_trade_returns(trade_returns, 10000.0, 2.0, 2000, seed=1) == report
+
+
+def test_no_trades_reports_counts_only() -> None:
+    report = resample_trade_returns(np.array([]), 10000.0, years=1.0, n_simulations=100)
+
+    assert report == {"n_simulations": 100, "n_trades": 0, "confidence": 0.95}
+
+
+def test_engines_report_the_same_trade_returns() -> None:
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 400)))
+    data = pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.003, 400)),
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": 1.0,
+    }, index=pd.date_range("2020-01-01", periods=400, freq="D"))
+    signals = rng.random(400).tolist()
+
+    event_driven, vectorized = BacktestService(None), BacktestService(None)
+    metrics = event_driven.run_backtest("XRPUSD", None, None, data, signals, monte_carlo=500)
+    vectorized.run_backtest("XRPUSD", None, None, data, signals, engine="vectorized")
+
+    np.testing.assert_allclose(event_driven.trade_returns, vectorized.trade_returns, atol=1e-12)
+    assert metrics["monte_carlo"]["n_trades"] == len(event_driven.trade_returns)
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import SGDRegressor
+
+from app.services.feature_store import FeatureStore, extend_features, finish_features
+from app.services.ml_signal_service import MLSignalService
+from app.services.online_learning import OnlineLearner
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+    return pd.DataFrame(
+        {"close": close, "volume": rng.uniform(1, 5, 300)},
+        index=pd.date_range("2024-01-01", periods=300, freq="h"),
+    )
+
+
+def test_streamed_rows_match_batch_features(ohlcv: pd.DataFrame) -> None:
+    service = MLSignalService(lookback_period=10)
+    learner = OnlineLearner(service, buffer_size=1000, trees_per_update=2, max_trees=20)
+    learner.start(ohlcv.iloc[:200])
+    trees = len(service.rf_model.estimators_)
+
+    for start in range(200, 300, 25):
+        # Overlapping chunks: already seen bars are skipped
+        result = learner.update(ohlcv.iloc[start - 5:start + 25])
+        assert result["labeled"] == 25 and result["updated"]
+
+    _, y = service.compute_features(ohlcv)
+    assert len(learner.X) == 299
+    np.testing.assert_array_equal(learner.y, y[:-1])
+    # Every row, replayed or new, keeps the MACD scale the scaler was fit with
+    assert service.macd_scale == pytest.approx(ohlcv["close"].iloc[:200].std())
+    raw, _ = extend_features(ohlcv["close"].to_numpy(), ohlcv["volume"].to_numpy())
+    X = service.scaler.transform(finish_features(raw, service.macd_scale))
+    np.testing.assert_allclose(learner.X, X[:-1], atol=1e-9)
+    assert len(service.rf_model.estimators_) == min(trees + 8, 20)
+
+
+def test_store_trained_service_keeps_its_macd_scale(ohlcv: pd.DataFrame, tmp_path) -> None:
+    service = MLSignalService(lookback_period=10, feature_store=FeatureStore(str(tmp_path)))
+    X, y = service.prepare_features(ohlcv.iloc[:200], symbol="XRPUSD", timeframe="1h")
+    service.train_rf_model(X, y, n_jobs=1)
+    learner = OnlineLearner(service, buffer_size=1000)
+    learner.start(ohlcv.iloc[:200])
+    learner.update(ohlcv.iloc[200:])
+
+    # Raw store rows: the learner sees exactly what the scaler and forest were fit on
+    assert service.macd_scale == 1.0
+    stored = service.feature_store.update("XRPUSD", "1h", ohlcv)
+    np.testing.assert_allclose(learner.X, service.scaler.transform(np.asarray(stored.raw))[:-1], atol=1e-9)
+
+
+def test_forest_is_replaced_and_bounded(ohlcv: pd.DataFrame) -> None:
+    service = MLSignalService(lookback_period=10)
+    X, y = service.prepare_features(ohlcv.iloc[:250])
+    service.train_rf_model(X, y, n_jobs=1)
+    before = service.rf_model
+
+    learner = OnlineLearner(service, buffer_size=100, trees_per_update=10, max_trees=105)
+    learner.start(ohlcv.iloc[:250])
+    assert learner.update(ohlcv.iloc[250:])["trees"] == 105
+
+    assert service.rf_model is not before
+    assert len(before.estimators_) == 100
+    assert service.rf_model.estimators_[-1] not in before.estimators_
+    assert service.rf_model.predict(X[:5]).shape == (5,)
+
+
+def test_partial_fit_models_learn_new_rows(ohlcv: pd.DataFrame) -> None:
+    service = MLSignalService(lookback_period=10)
+    X, y = service.prepare_features(ohlcv.iloc[:250])
+    service.rf_model = SGDRegressor(random_state=0).fit(X, y)
+    before = service.rf_model.coef_.copy()
+
+    learner = OnlineLearner(service, min_new_rows=20)
+    learner.start(ohlcv.iloc[:250])
+    assert not learner.update(ohlcv.iloc[250:260])["updated"]
+    np.testing.assert_array_equal(service.rf_model.coef_, before)
+
+    assert learner.update(ohlcv.iloc[260:])["updated"]
+    assert not np.allclose(service.rf_model.coef_, before)
+
+
+def test_lstm_is_fine_tuned_on_a_copy(ohlcv: pd.DataFrame) -> None:
+    service = MLSignalService(lookback_period=5)
+    X, y = service.prepare_features(ohlcv.iloc[:250])
+    service.train_rf_model(X, y, n_jobs=1)
+    service.train_lstm_model(X, y, epochs=1)
+    before = service.lstm_model
+    weights = [w.copy() for w in before.get_weights()]
+
+    learner = OnlineLearner(service, buffer_size=200, lstm_learning_rate=1e-2)
+    learner.start(ohlcv.iloc[:250])
+    learner.update(ohlcv.iloc[250:])
+
+    assert service.lstm_model is not before
+    for old, kept in zip(weights, before.get_weights()):
+        np.testing.assert_array_equal(old, kept)
+    assert any(not np.allclose(old, new) for old, new in zip(weights, service.lstm_model.get_weights()))
+    assert service.predict_signals(X[-20:]).shape == (20,)
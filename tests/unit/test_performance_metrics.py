@@ -0,0 +1,115 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.array_feed import ArrayData
+from app.services.backtest_service import BacktestService, EquityCurve
+from app.services.vectorized_backtest import summary_metrics
+from app.services.performance_metrics import (
+    METRIC_NAMES,
+    annual_sharpe,
+    equity_metrics,
+    periods_per_year,
+    returns_metrics,
+    year_end_bars,
+)
+
+
+@pytest.fixture
+def equity() -> np.ndarray:
+    rng = np.random.default_rng(3)
+    return 10000 * np.cumprod(1 + rng.normal(0.0005, 0.01, (8, 750)), axis=1)
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(8)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, 1100)))
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.003, 1100)),
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": 1.0,
+    }, index=pd.date_range("2020-01-01", periods=1100, freq="D"))
+
+
+def test_single_curve_matches_definitions() -> None:
+    curve = np.array([100.0, 110.0, 99.0, 108.9, 130.68])
+    returns = np.array([0.1, -0.1, 0.1, 0.2])
+
+    metrics = equity_metrics(curve, periods_per_year=4, riskfreerate=0.0, confidence=0.75)
+
+    assert metrics["total_return"] == pytest.approx(0.3068)
+    assert metrics["annual_return"] == pytest.approx(0.3068)
+    assert metrics["max_drawdown"] == pytest.approx(10.0)
+    assert metrics["calmar_ratio"] == pytest.approx(3.068)
+    assert metrics["volatility"] == pytest.approx(returns.std() * 2)
+    assert metrics["sharpe_ratio"] == pytest.approx(returns.mean() / returns.std() * 2)
+    assert metrics["sortino_ratio"] == pytest.approx(returns.mean() / np.sqrt(0.01 / 4) * 2)
+    assert metrics["value_at_risk"] == pytest.approx(-np.quantile(returns, 0.25))
+    assert metrics["expected_shortfall"] == pytest.approx(0.1)
+    assert all(isinstance(metrics[name], float) for name in METRIC_NAMES)
+
+
+def test_batch_matches_row_by_row(equity) -> None:
+    batch = equity_metrics(equity, 365.0, initial_value=10000.0)
+
+    for name in METRIC_NAMES:
+        rows = [equity_metrics(row, 365.0, initial_value=10000.0)[name] for row in equity]
+        np.testing.assert_allclose(batch[name], rows, rtol=1e-12)
+
+
+def test_returns_and_equity_entry_points_agree(equity) -> None:
+    returns = np.diff(equity, axis=1, prepend=10000.0) / np.concatenate(
+        (np.full((len(equity), 1), 10000.0), equity[:, :-1]), axis=1
+    )
+
+    from_returns = returns_metrics(returns, 365.0)
+    from_equity = equity_metrics(equity, 365.0, initial_value=10000.0)
+    for name in METRIC_NAMES:
+        np.testing.assert_allclose(from_returns[name], from_equity[name], rtol=1e-9)
+
+
+def test_summary_sharpe_uses_per_bar_returns() -> None:
+    rng = np.random.default_rng(4)
+    # Hourly bars inside one calendar year: no year-end returns to build a Sharpe from
+    equity = 10000 * np.cumprod(1 + rng.normal(0.0002, 0.002, 5000))
+    index = pd.date_range("2024-01-01", periods=5000, freq="h")
+
+    metrics = summary_metrics(index, equity, 0, np.empty(0), 10000.0)
+    expected = equity_metrics(equity, periods_per_year(index), 10000.0)
+
+    assert metrics["sharpe_ratio"] == pytest.approx(expected["sharpe_ratio"])
+    assert metrics["sharpe_ratio"] > 1.0
+
+
+def test_flat_curve_reports_zero_ratios() -> None:
+    metrics = equity_metrics(np.full(10, 500.0), 252.0, initial_value=500.0, riskfreerate=0.0)
+
+    assert metrics["max_drawdown"] == 0.0
+    assert metrics["sharpe_ratio"] == metrics["sortino_ratio"] == metrics["calmar_ratio"] == 0.0
+
+
+def test_matches_backtrader_analyzers(ohlcv: pd.DataFrame) -> None:
+    signals = np.tile([0.9, 0.9, 0.9, 0.1, 0.1], 220).tolist()
+
+    cerebro = bt.Cerebro()
+    cerebro.broker.setcash(10000)
+    cerebro.broker.setcommission(commission=0.001)
+    cerebro.adddata(ArrayData.from_frame(ohlcv))
+    cerebro.addstrategy(BacktestService(None)._create_signal_strategy(signals))
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="sharpe")
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+    cerebro.addanalyzer(EquityCurve, _name="equity")
+    strategy = cerebro.run()[0]
+
+    values = np.asarray(strategy.analyzers.equity.values)
+    sharpe = annual_sharpe(values[year_end_bars(ohlcv.index)], 10000.0)
+    metrics = equity_metrics(values, periods_per_year(ohlcv.index), 10000.0)
+
+    assert sharpe == pytest.approx(strategy.analyzers.sharpe.get_analysis()["sharperatio"] or 0.0)
+    assert metrics["max_drawdown"] == pytest.approx(
+        strategy.analyzers.drawdown.get_analysis()["max"]["drawdown"]
+    )
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.models import MLSignal
+from app.services.feature_store import FEATURE_COLUMNS, WARMUP_BARS, FeatureStore
+from app.services.ml_signal_service import MLSignalService
+from app.services.model_registry import ModelRegistry
+from app.services.signal_store import SignalStore
+
+
+@pytest.fixture
+def session_factory() -> sessionmaker:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    MLSignal.metadata.create_all(engine, tables=[MLSignal.__table__])
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+    return pd.DataFrame(
+        {"close": close, "volume": rng.uniform(1, 5, 300)},
+        index=pd.date_range("2024-01-01", periods=300, freq="h"),
+    )
+
+
+class CountingForest:
+    """Random Forest stand-in predicting one feature column and recording how many rows it predicted"""
+
+    def __init__(self, column: int = 0) -> None:
+        self.column = column
+        self.rows = 0
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        self.rows += len(X)
+        return X[:, self.column]
+
+
+def _count(session_factory: sessionmaker) -> int:
+    with session_factory() as db:
+        return db.execute(select(func.count()).select_from(MLSignal)).scalar_one()
+
+
+def test_bulk_write_and_range_read(session_factory: sessionmaker) -> None:
+    store = SignalStore(session_factory, batch_size=7)
+    bars = pd.date_range("2024-01-01", periods=20, freq="h", tz="US/Eastern")
+    ensemble = np.linspace(0, 1, 20)
+
+    assert store.write("XRPUSD", "XRPUSD", 1, bars, {"lstm": None, "rf": ensemble, "ensemble": ensemble}) == 20
+    # Bars written again are skipped rather than duplicated
+    store.write("XRPUSD", "XRPUSD", 1, bars[:5], {"lstm": None, "rf": ensemble[:5] + 1, "ensemble": ensemble[:5]})
+    assert _count(session_factory) == 20
+
+    signals = store.read("XRPUSD", "XRPUSD", 1, bars[4], bars[9])
+    assert list(signals.index) == list(bars[4:10].tz_convert("UTC"))
+    np.testing.assert_allclose(signals["rf"], ensemble[4:10], atol=1e-6)
+    assert signals["lstm"].isna().all()
+    assert store.read("XRPUSD", "XRPUSD", 2).empty
+
+
+def test_only_missing_bars_are_predicted(session_factory: sessionmaker, ohlcv: pd.DataFrame, tmp_path) -> None:
+    service = MLSignalService(lookback_period=10, timeframe="1h")
+    X, _ = service.prepare_features(ohlcv)
+    service.rf_model = forest = CountingForest()
+    store = SignalStore(session_factory, feature_store=FeatureStore(str(tmp_path)))
+    warmup = WARMUP_BARS + 10
+
+    first = store.signals(service, ohlcv.iloc[:200], "XRPUSD", "XRPUSD", 1)
+    assert forest.rows == 200
+    np.testing.assert_allclose(first["ensemble"], X[:200, 0])
+    # Bars still warming up are served but not stored
+    assert _count(session_factory) == 200 - warmup
+
+    signals = store.signals(service, ohlcv, "XRPUSD", "XRPUSD", 1)
+    assert forest.rows == 200 + warmup + 100
+    assert list(signals.index) == list(ohlcv.index)
+    np.testing.assert_allclose(signals["ensemble"].iloc[:200], first["ensemble"], atol=1e-6)
+    assert _count(session_factory) == 300 - warmup
+
+    store.signals(service, ohlcv.iloc[50:250], "XRPUSD", "XRPUSD", 1)
+    assert forest.rows == 200 + warmup + 100
+
+
+def test_stored_signals_do_not_depend_on_the_requested_range(
+    session_factory: sessionmaker, ohlcv: pd.DataFrame, tmp_path,
+) -> None:
+    service = MLSignalService(lookback_period=10, timeframe="1h")
+    service.prepare_features(ohlcv)
+    # MACD is the feature that was normalized over the requested bars
+    service.rf_model = CountingForest(FEATURE_COLUMNS.index("macd"))
+    feature_store = FeatureStore(str(tmp_path))
+    full = SignalStore(session_factory, feature_store=feature_store).signals(service, ohlcv, "XRPUSD", "XRPUSD", 1)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    MLSignal.metadata.create_all(engine, tables=[MLSignal.__table__])
+    other = SignalStore(sessionmaker(bind=engine), feature_store=feature_store)
+    part = other.signals(service, ohlcv.iloc[150:250], "XRPUSD", "XRPUSD", 1)
+    np.testing.assert_allclose(part["ensemble"], full["ensemble"].iloc[150:250])
+
+    # Bars before the stored history are computed from the request and not stored
+    late = SignalStore(sessionmaker(bind=engine), feature_store=FeatureStore(str(tmp_path / "late")))
+    late.signals(service, ohlcv.iloc[100:], "ETHUSD", "XRPUSD", 1)
+    stored = _count(sessionmaker(bind=engine))
+    late.signals(service, ohlcv.iloc[:150], "ETHUSD", "XRPUSD", 1)
+    assert _count(sessionmaker(bind=engine)) == stored
+
+
+def test_unstored_signals_use_the_training_feature_scale(session_factory: sessionmaker, ohlcv: pd.DataFrame) -> None:
+    service = MLSignalService(lookback_period=10, timeframe="1h")
+    service.prepare_features(ohlcv)
+    macd = FEATURE_COLUMNS.index("macd")
+    service.rf_model = CountingForest(macd)
+    window = ohlcv.iloc[150:250]
+
+    # No feature store: computed from the request, but MACD keeps its training normalization
+    signals = SignalStore(session_factory).signals(service, window, "XRPUSD", "XRPUSD", 1)
+    expected = service.compute_features(window)[0][:, macd] * window["close"].std() / service.macd_scale
+    np.testing.assert_allclose(signals["rf"], (expected - service.scaler.data_min_[macd]) * service.scaler.scale_[macd])
+    assert _count(session_factory) == 0
+
+    service.macd_scale = None
+    with pytest.raises(ValueError, match="MACD scale"):
+        SignalStore(session_factory).signals(service, window, "XRPUSD", "XRPUSD", 1)
+
+
+def test_registry_serves_stored_signals(session_factory: sessionmaker, ohlcv: pd.DataFrame, tmp_path) -> None:
+    service = MLSignalService(lookback_period=5, timeframe="1h")
+    X, y = service.prepare_features(ohlcv)
+    service.train_rf_model(X, y, n_jobs=1)
+    service.train_lstm_model(X, y, epochs=1)
+
+    signal_store = SignalStore(session_factory, feature_store=FeatureStore(str(tmp_path / "features")))
+    registry = ModelRegistry(str(tmp_path / "models"), signal_store=signal_store)
+    registry.save("XRPUSD", service, {})
+    signals = registry.signals("XRPUSD", ohlcv.iloc[:150], symbol="XRP/USD")
+
+    # The bars get the features they had in training, not ones normalized over the request
+    X = service.scaler.transform(service.compute_features(ohlcv)[0])[:150]
+    components = service.predict_components(X)
+    np.testing.assert_allclose(signals["ensemble"], service.predict_signals(X), atol=1e-6)
+    np.testing.assert_allclose(signals["lstm"], components["lstm"], atol=1e-6)
+    stored = registry.signal_store.read("XRP/USD", "XRPUSD", 1)
+    np.testing.assert_allclose(stored["rf"], components["rf"][WARMUP_BARS + 5:], atol=1e-6)
+
+    # Predicting a subset of rows gives the same values as predicting all of them
+    rows = np.array([2, 40, 149])
+    subset = service.predict_components(X, rows)
+    for name in ("lstm", "rf", "ensemble"):
+        np.testing.assert_allclose(subset[name], components[name][rows], rtol=1e-5)
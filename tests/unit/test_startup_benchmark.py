@@ -0,0 +1,24 @@
+from benchmarks.startup_benchmark import check_budget, run_benchmarks
+
+
+def test_health_worker_skips_heavy_libraries() -> None:
+    report = run_benchmarks(runs=1)
+
+    record = report["runs"][0]
+    assert record["status_code"] == 200
+    assert record["job_queue_running"]
+    assert record["heavy_modules"] == []
+    assert check_budget(report, max_seconds=60, max_rss_mb=1024) == []
+
+
+def test_budget_violations_are_reported() -> None:
+    report = {
+        "runs": [{"status_code": 200, "job_queue_running": False, "heavy_modules": ["tensorflow"]}],
+        "median": {"import_seconds": 4.0, "first_response_seconds": 5.0, "rss_mb": 800.0},
+    }
+
+    problems = check_budget(report, max_seconds=3, max_rss_mb=250)
+
+    assert len(problems) == 4
+    assert "tensorflow" in problems[2]
+    assert "job queue" in problems[3]
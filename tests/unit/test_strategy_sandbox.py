@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.strategy_sandbox import (
+    StrategySandbox,
+    _scrub_environment,
+    check_strategy_code,
+    run_strategy_code,
+)
+
+MOMENTUM = """
+import numpy as np
+
+def generate_signals(data):
+    change = data['close'].pct_change().fillna(0.0).to_numpy()
+    return np.where(change > 0, 0.9, 0.1)
+"""
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    rng = np.random.default_rng(4)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+    return pd.DataFrame({
+        "open": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": 10.0,
+    }, index=pd.date_range("2023-01-01", periods=300, freq="D"))
+
+
+@pytest.fixture(scope="module")
+def sandbox():
+    with StrategySandbox(max_workers=2, cpu_seconds=2, wall_seconds=30, max_jobs_per_worker=3) as pool:
+        yield pool
+
+
+def test_check_rejects_escapes() -> None:
+    code = """
+import os
+from pandas import read_csv
+
+def generate_signals(data):
+    data.to_pickle('x')
+    np.mean = None
+    return ().__class__
+"""
+    problems = " | ".join(check_strategy_code(code))
+
+    assert "import of 'os'" in problems
+    assert "'to_pickle'" in problems
+    assert "assigning attributes" in problems
+    assert "'__class__'" in problems
+    assert check_strategy_code(MOMENTUM) == []
+    assert check_strategy_code("x = 1") == ["generate_signals(data) is not defined"]
+
+
+@pytest.mark.parametrize("body", [
+    "np.fromregex('/etc/hostname', r'(.*)', [('line', 'U64')])",
+    "np.genfromtxt('/etc/hostname')",
+    "np.loadtxt('/etc/hostname')",
+    "np.fromfile('/proc/self/environ')",
+    "np.load('x.npy')",
+    "np.memmap('/etc/hostname')",
+    "np.lib.npyio.fromregex",
+    "np.DataSource().open('/etc/hostname').read()",
+    "pd.read_csv('/etc/hostname')",
+    "pd.io.parsers.read_table('/etc/hostname')",
+    "data.agg('to_pickle', 'x')",
+    "data.eval('close * 2')",
+    "'{0.__class__}'.format(data)",
+])
+def test_check_rejects_file_readers(body: str) -> None:
+    code = f"import numpy as np\nimport pandas as pd\n\ndef generate_signals(data):\n    return {body}\n"
+
+    assert any("is not allowed" in problem for problem in check_strategy_code(code))
+    with pytest.raises(ValueError, match="is not allowed"):
+        run_strategy_code(code, pd.DataFrame({"close": [1.0, 2.0]}))
+
+
+def test_check_rejects_reader_imports() -> None:
+    problems = " | ".join(check_strategy_code(
+        "from numpy import fromregex\nimport numpy.lib.npyio\n\ndef generate_signals(data):\n    return data\n"
+    ))
+
+    assert "import of 'fromregex'" in problems
+    assert "import of 'numpy.lib.npyio'" in problems
+
+
+def _scrubbed_environment(queue) -> None:
+    _scrub_environment()
+    with open("/proc/self/environ", "rb") as environ:
+        queue.put((dict(os.environ), environ.read()))
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/environ"), reason="needs /proc")
+def test_worker_environment_is_scrubbed(monkeypatch) -> None:
+    monkeypatch.setenv("KRAKEN_API_SECRET", "do-not-leak")
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_scrubbed_environment, args=(queue,))
+    process.start()
+    environ, raw = queue.get(timeout=60)
+    process.join()
+
+    assert "KRAKEN_API_SECRET" not in environ
+    assert environ.get("PATH") == os.environ["PATH"]
+    assert b"do-not-leak" not in raw
+
+
+def test_sandbox_matches_in_process_run(sandbox, ohlcv: pd.DataFrame) -> None:
+    expected = run_strategy_code(MOMENTUM, ohlcv)
+
+    result = sandbox.submit(MOMENTUM, ohlcv).result(timeout=60)
+
+    assert result.error is None
+    assert result.total_return == pytest.approx(expected["total_return"])
+    assert len(result.trades) == len(expected["trades"]) > 0
+    assert result.trades[0].side == "buy"
+
+
+def test_limits_fail_the_job_not_the_pool(sandbox, ohlcv: pd.DataFrame) -> None:
+    spin = "def generate_signals(data):\n    while True:\n        pass\n"
+    hog = "import numpy as np\n\ndef generate_signals(data):\n    return np.ones(10 ** 10)\n"
+
+    results = dict(sandbox.run_many([
+        {"code": spin, "data": ohlcv},
+        {"code": hog, "data": ohlcv},
+        {"code": MOMENTUM, "data": ohlcv},
+        {"code": MOMENTUM, "data": ohlcv},
+    ]))
+
+    assert "CPU time limit" in results[0].error
+    assert "Memory limit" in results[1].error
+    assert results[2].error is None and results[3].error is None
+    assert results[2].total_return == results[3].total_return
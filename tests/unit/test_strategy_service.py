@@ -1,2 +1,38 @@
-def test_strategy_service() -> None:
-    pass
+from concurrent.futures import Future
+from datetime import datetime
+
+import pytest
+
+from app.schemas.strategy import StrategyRunRequest, StrategyRunResult
+from app.services import strategy_service
+
+
+class _RecordingSandbox:
+    def __init__(self):
+        self.data = None
+
+    def submit(self, code, data, initial_capital):
+        self.data = data
+        future = Future()
+        future.set_result(StrategyRunResult(total_return=0.0, max_drawdown=0.0, trades=[]))
+        return future
+
+
+@pytest.mark.asyncio
+async def test_backtest_runs_on_the_requested_range_and_timeframe(monkeypatch) -> None:
+    sandbox = _RecordingSandbox()
+    monkeypatch.setattr(strategy_service, "default_strategy_sandbox", lambda: sandbox)
+    request = StrategyRunRequest(
+        strategy_code="pass",
+        symbol="BTC",
+        timeframe="4h",
+        start=datetime(2021, 3, 1),
+        end=datetime(2021, 3, 5),
+    )
+
+    result = await strategy_service.run_backtest(None, request)
+
+    assert result.error is None
+    assert sandbox.data.index[0] == request.start
+    assert sandbox.data.index[-1] == request.end
+    assert len(sandbox.data) == 25
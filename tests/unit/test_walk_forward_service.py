@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from app.services.feature_store import FeatureStore
+from app.services.walk_forward_service import (
+    WalkForwardService,
+    fit_window_scalers,
+    walk_forward_windows,
+)
+
+
+@pytest.fixture
+def ohlcv() -> pd.DataFrame:
+    dates = pd.date_range(start="2024-01-01", periods=240, freq="D")
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.standard_normal(240) * 0.02))
+    return pd.DataFrame({
+        "open": close * (1 + rng.standard_normal(240) * 0.002),
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": rng.integers(1_000_000, 5_000_000, 240).astype(float),
+    }, index=dates)
+
+
+def test_rolling_windows_do_not_overlap_test_rows() -> None:
+    windows = walk_forward_windows(n_bars=100, train_size=40, test_size=20)
+
+    assert [(w.train_start, w.train_end, w.test_end) for w in windows] == [
+        (0, 40, 60), (20, 60, 80), (40, 80, 100),
+    ]
+
+
+def test_anchored_windows_expand_from_first_row() -> None:
+    windows = walk_forward_windows(n_bars=100, train_size=40, test_size=25, anchored=True)
+
+    assert all(w.train_start == 0 for w in windows)
+    assert windows[-1].test_end == 100
+
+
+def test_window_scalers_match_per_slice_fit() -> None:
+    X = np.random.default_rng(0).standard_normal((300, 4))
+    windows = walk_forward_windows(n_bars=300, train_size=90, test_size=40, step=30)
+
+    for window, scaler in zip(windows, fit_window_scalers(X, windows)):
+        expected = MinMaxScaler().fit(X[window.train_start:window.train_end])
+        np.testing.assert_allclose(scaler.data_min_, expected.data_min_)
+        np.testing.assert_allclose(scaler.data_max_, expected.data_max_)
+
+
+def test_walk_forward_backtests_every_fold(ohlcv: pd.DataFrame) -> None:
+    result = WalkForwardService(max_workers=2).run(
+        "XRPUSD", ohlcv, train_size=120, test_size=60, lookback_period=10
+    )
+
+    assert [f["fold"] for f in result["folds"]] == [0, 1]
+    assert result["folds"][0]["test_start"] == ohlcv.index[120]
+    assert result["combined"]["start_date"] == ohlcv.index[120]
+    assert result["combined"]["end_date"] == ohlcv.index[-1]
+
+
+def test_walk_forward_reads_features_from_the_store(ohlcv: pd.DataFrame, tmp_path) -> None:
+    store = FeatureStore(str(tmp_path))
+    result = WalkForwardService(max_workers=2, feature_store=store).run(
+        "XRPUSD", ohlcv, train_size=120, test_size=60, lookback_period=10
+    )
+
+    assert len(store.load("XRPUSD", "1d")) == len(ohlcv)
+    assert [f["fold"] for f in result["folds"]] == [0, 1]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from app.services.ml_signal_service import MLSignalService
+from app.services.window_dataset import WindowDataset, sliding_windows
+
+
+@pytest.fixture
+def features() -> np.ndarray:
+    return np.random.default_rng(6).normal(size=(300, 4))
+
+
+def test_windows_are_views_of_the_matrix(features: np.ndarray) -> None:
+    windows = sliding_windows(features, 20)
+    expected = np.array([features[i - 20:i] for i in range(20, len(features))])
+
+    np.testing.assert_array_equal(windows, expected)
+    assert np.shares_memory(windows, features)
+    assert sliding_windows(features[:20], 20).shape == (0, 20, 4)
+
+
+def test_batches_cover_windows_with_aligned_targets(features: np.ndarray) -> None:
+    y = np.arange(len(features), dtype=float)
+    scaler = MinMaxScaler().fit(features)
+    dataset = WindowDataset(features, y, 20, batch_size=64, shuffle=True, seed=1, scaler=scaler)
+
+    seen = []
+    for batch, targets in dataset:
+        assert len(batch) <= 64
+        rows = targets.astype(int)
+        expected = np.array([scaler.transform(features[r - 20:r]) for r in rows])
+        np.testing.assert_allclose(batch, expected, rtol=1e-5, atol=1e-6)
+        seen.extend(rows)
+    assert sorted(seen) == list(range(20, len(features)))
+    assert len(dataset) == -(-280 // 64)
+
+    train, validation = dataset.split(0.2)
+    assert (train.n_windows, validation.n_windows) == (224, 56)
+    assert not validation.shuffle
+    assert next(iter(validation))[1][0] == 20 + 224
+
+
+def test_lstm_trains_on_memory_mapped_features(features: np.ndarray, tmp_path) -> None:
+    path = tmp_path / "features.f8"
+    features.tofile(path)
+    X = np.memmap(path, dtype=float, mode="r", shape=features.shape)
+    y = (features[:, 0] > 0).astype(int)
+
+    service = MLSignalService(lookback_period=10)
+    service.train_lstm_model(X, y, epochs=1, scaler=MinMaxScaler().fit(features))
+    signals = service.predict_signals(X)
+
+    assert signals.shape == (len(features),)
+    assert np.all(signals[:10] == 0)
+    assert np.all((signals[10:] >= 0) & (signals[10:] <= 1))